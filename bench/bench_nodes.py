@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from corpus import PARAGRAPH  # noqa: E402
+from transform import markdown_to_html_node, text_to_textnodes  # noqa: E402
+
+
+def synthetic_document(blocks: int) -> str:
+    parts = []
+    for i in range(blocks):
+        if i % 4 == 0:
+            parts.append(f"## Section {i}")
+        elif i % 4 == 1:
+            parts.append("\n".join(f"- item {j} with **bold**" for j in range(8)))
+        else:
+            parts.append(PARAGRAPH)
+    return "\n\n".join(parts)
+
+
+def measure(label: str, fn, repeat: int):
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<24} {elapsed * 1000:9.2f} ms {peak / 1024 / 1024:9.2f} MiB peak")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    document = synthetic_document(args.blocks)
+    measure(
+        "text_to_textnodes",
+        lambda: [text_to_textnodes(PARAGRAPH) for _ in range(args.blocks)],
+        args.repeat,
+    )
+    measure("markdown_to_html_node", lambda: markdown_to_html_node(document), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
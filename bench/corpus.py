@@ -0,0 +1,124 @@
+import os
+import random
+
+PARAGRAPH = (
+    "This is **bold** text with an _italic_ word, some `inline code`, "
+    "an ![image](/images/tom.png) and a [link](/blog/tom) in it."
+)
+WORDS = (
+    "the quick brown fox jumps over lazy dog ring bearer council elrond "
+    "rivendell shire hobbit wizard mountain river forest song"
+).split()
+TEMPLATE = """<!doctype html>
+<html>
+    <head>
+        <title>{{ Title }}</title>
+        <link href="/index.css" rel="stylesheet" />
+    </head>
+    <body>
+        <article>{{ Content }}</article>
+    </body>
+</html>
+"""
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    out = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.05:
+            word = f"**{word}**"
+        elif roll < 0.1:
+            word = f"_{word}_"
+        elif roll < 0.12:
+            word = f"`{word}`"
+        out.append(word)
+    return " ".join(out).capitalize() + "."
+
+
+def prose_document(blocks: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = ["# Prose"]
+    for i in range(blocks):
+        if i % 10 == 0:
+            parts.append(f"## Section {i}")
+        else:
+            lines = [" ".join(sentence(rng) for _ in range(3)) for _ in range(3)]
+            parts.append("\n".join(lines))
+    return "\n\n".join(parts)
+
+
+def list_document(blocks: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = ["# Lists"]
+    for i in range(blocks):
+        items = rng.randint(3, 12)
+        if i % 2 == 0:
+            parts.append("\n".join(f"- {sentence(rng, 6)}" for _ in range(items)))
+        else:
+            parts.append(
+                "\n".join(f"{n}. {sentence(rng, 6)}" for n in range(1, items + 1))
+            )
+    return "\n\n".join(parts)
+
+
+def code_document(blocks: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = ["# Code"]
+    for i in range(blocks):
+        if i % 2 == 0:
+            body = "\n".join(
+                f"    value_{n} = compute({rng.randint(0, 999)})"
+                for n in range(rng.randint(3, 20))
+            )
+            parts.append(f"```\ndef block_{i}():\n{body}\n```")
+        else:
+            parts.append(sentence(rng, 20))
+    return "\n\n".join(parts)
+
+
+def link_document(blocks: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = ["# Links"]
+    for i in range(blocks):
+        refs = []
+        for n in range(8):
+            word = rng.choice(WORDS)
+            if n % 3 == 0:
+                refs.append(f"![{word}](/images/{word}.png)")
+            else:
+                refs.append(f"[{word}](/blog/{word}/{i})")
+        parts.append(" and ".join(refs))
+    return "\n\n".join(parts)
+
+
+CORPORA = {
+    "prose": prose_document,
+    "list": list_document,
+    "code": code_document,
+    "link": link_document,
+}
+
+
+def write_site(root: str, pages: int, blocks_per_page: int = 20, seed: int = 0):
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+    os.makedirs(os.path.join(static, "images"), exist_ok=True)
+    with open(os.path.join(static, "index.css"), "w") as file:
+        file.write("body { margin: 0 auto; max-width: 40em; }\n")
+    for word in WORDS:
+        with open(os.path.join(static, "images", f"{word}.png"), "wb") as file:
+            file.write(word.encode() * 256)
+    with open(os.path.join(root, "template.html"), "w") as file:
+        file.write(TEMPLATE)
+    generators = list(CORPORA.values())
+    for page in range(pages):
+        if page == 0:
+            directory = content
+        else:
+            directory = os.path.join(content, f"section{page % 100}", f"page{page}")
+        os.makedirs(directory, exist_ok=True)
+        generate = generators[page % len(generators)]
+        with open(os.path.join(directory, "index.md"), "w") as file:
+            file.write(generate(blocks_per_page, seed + page))
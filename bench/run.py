@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from block import block_to_block_type  # noqa: E402
+from blockparser import parse_document  # noqa: E402
+from corpus import CORPORA, write_site  # noqa: E402
+from extract import markdown_to_blocks  # noqa: E402
+from transform import markdown_to_html_node, text_to_textnodes  # noqa: E402
+
+
+def timed(fn, repeat: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min": min(samples),
+        "mean": sum(samples) / len(samples),
+        "repeat": repeat,
+    }
+
+
+def inline_texts(blocks: list[str]) -> list[str]:
+    texts = []
+    for block in blocks:
+        if block.startswith("```"):
+            continue
+        texts.extend(block.split("\n"))
+    return texts
+
+
+def bench_corpora(blocks: int, repeat: int) -> dict[str, dict[str, float]]:
+    results = {}
+    for name, generate in CORPORA.items():
+        document = generate(blocks)
+        split = markdown_to_blocks(document)
+        texts = inline_texts(split)
+        node = markdown_to_html_node(document)
+        results[f"text_to_textnodes/{name}"] = timed(
+            lambda: [text_to_textnodes(text) for text in texts], repeat
+        )
+        results[f"block_to_block_type/{name}"] = timed(
+            lambda: [block_to_block_type(block) for block in split], repeat
+        )
+        results[f"markdown_to_html_node/{name}"] = timed(
+            lambda: markdown_to_html_node(document), repeat
+        )
+        results[f"parse_document/{name}"] = timed(
+            lambda: parse_document(document), repeat
+        )
+        results[f"to_html/{name}"] = timed(node.to_html, repeat)
+    return results
+
+
+def bench_build(pages: int, repeat: int) -> dict[str, dict[str, float]]:
+    main = os.path.abspath(os.path.join(SRC_DIR, "main.py"))
+    with tempfile.TemporaryDirectory() as root:
+        write_site(root, pages)
+
+        def build(*args: str):
+            subprocess.run(
+                [sys.executable, main, *args],
+                cwd=root,
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+
+        return {
+            f"build/full/{pages}": timed(lambda: build("--force"), repeat),
+            f"build/noop/{pages}": timed(build, repeat),
+        }
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<40} {result['min'] * 1000:10.2f} ms   (new)")
+            continue
+        ratio = result["min"] / previous["min"] if previous["min"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<40} {result['min'] * 1000:10.2f} ms {ratio:7.2f}x{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Markdown-to-HTML pipeline"
+    )
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-build", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a saved JSON result")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed slowdown against the baseline before failing (0.1 = 10%%)",
+    )
+    args = parser.parse_args(argv)
+
+    results = bench_corpora(args.blocks, args.repeat)
+    if not args.skip_build:
+        results.update(bench_build(args.pages, max(1, args.repeat // 2)))
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "blocks": args.blocks,
+        "pages": args.pages,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import gzip
+import io
+import os
+import shutil
+import tarfile
+import zipfile
+from typing import Iterable
+
+TAR_EXTENSIONS = (".tar",)
+GZIP_EXTENSIONS = (".tar.gz", ".tgz")
+ZIP_EXTENSIONS = (".zip",)
+ARCHIVE_EXTENSIONS = TAR_EXTENSIONS + GZIP_EXTENSIONS + ZIP_EXTENSIONS
+# every entry gets the same timestamp so identical sites give identical
+# archives; zip cannot store anything before 1980
+ARCHIVE_MTIME = 315532800
+ARCHIVE_DATE = (1980, 1, 1, 0, 0, 0)
+FILE_MODE = 0o644
+
+
+class ArchiveWriter:
+    # the archive side of output.DirectoryWriter: pages and listings go through
+    # the same calls whichever one the build writes into
+    def __init__(self, path: str, root: str):
+        self.path = path
+        self.root = root
+        self.tmp_path = f"{path}.tmp"
+
+    def exists(self, dest_path: str) -> bool:
+        # an archive starts empty on every build
+        return False
+
+    def describe(self, dest_path: str) -> str:
+        return f"{self.path}:{archive_name(dest_path, self.root)}"
+
+
+class TarArchive(ArchiveWriter):
+    def __init__(self, path: str, root: str):
+        super().__init__(path, root)
+        self.raw = open(self.tmp_path, "wb")
+        self.gzip = None
+        fileobj = self.raw
+        if path.endswith(GZIP_EXTENSIONS):
+            # tarfile's own "w:gz" stamps the current time into the header
+            self.gzip = gzip.GzipFile("", "wb", fileobj=self.raw, mtime=ARCHIVE_MTIME)
+            fileobj = self.gzip
+        self.tar = tarfile.open(fileobj=fileobj, mode="w", format=tarfile.PAX_FORMAT)
+
+    def entry(self, dest_path: str, size: int) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(archive_name(dest_path, self.root))
+        info.size = size
+        info.mtime = ARCHIVE_MTIME
+        info.mode = FILE_MODE
+        return info
+
+    def write_text(self, dest_path: str, text: str):
+        data = text.encode()
+        self.tar.addfile(self.entry(dest_path, len(data)), io.BytesIO(data))
+
+    def write_page(self, dest_path: str, chunks: Iterable[str]):
+        # a tar header carries the size, so the page is joined before it goes in
+        self.write_text(dest_path, "".join(chunks))
+
+    def copy_file(self, source_path: str, dest_path: str):
+        with open(source_path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            self.tar.addfile(self.entry(dest_path, size), file)
+
+    def close(self):
+        self.tar.close()
+        if self.gzip is not None:
+            self.gzip.close()
+        self.raw.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        self.raw.close()
+        os.remove(self.tmp_path)
+
+
+class ZipArchive(ArchiveWriter):
+    def __init__(self, path: str, root: str):
+        super().__init__(path, root)
+        self.zip = zipfile.ZipFile(self.tmp_path, "w", zipfile.ZIP_DEFLATED)
+
+    def entry(self, dest_path: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(archive_name(dest_path, self.root), ARCHIVE_DATE)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = FILE_MODE << 16
+        return info
+
+    def write_text(self, dest_path: str, text: str):
+        self.zip.writestr(self.entry(dest_path), text)
+
+    def write_page(self, dest_path: str, chunks: Iterable[str]):
+        with self.zip.open(self.entry(dest_path), "w") as entry:
+            for chunk in chunks:
+                entry.write(chunk.encode())
+
+    def copy_file(self, source_path: str, dest_path: str):
+        with open(source_path, "rb") as file:
+            with self.zip.open(self.entry(dest_path), "w") as entry:
+                shutil.copyfileobj(file, entry)
+
+    def close(self):
+        self.zip.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        self.zip.close()
+        os.remove(self.tmp_path)
+
+
+Archive = TarArchive | ZipArchive
+
+
+def archive_name(dest_path: str, root: str) -> str:
+    return os.path.relpath(dest_path, root).replace(os.sep, "/")
+
+
+def open_archive(path: str, root: str) -> Archive:
+    # entries are named relative to root, so callers keep using dest paths
+    if path.endswith(ZIP_EXTENSIONS):
+        return ZipArchive(path, root)
+    return TarArchive(path, root)
+
+
+def archive_tree(archive: Archive, source: str):
+    # sorted walk, so the static files land in the same order on every build
+    for directory, directories, files in os.walk(source):
+        directories.sort()
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            dest_path = os.path.join(archive.root, os.path.relpath(path, source))
+            archive.copy_file(path, dest_path)
@@ -11,28 +11,110 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+HEADING_REGEX = re.compile(r"(#{1,6}) (.*)")
+# one match per list line; a block is a list only if every line matches
+UNORDERED_ITEM_REGEX = re.compile(r"^-[^\S\n](.+)$", re.M)
+ORDERED_ITEM_REGEX = re.compile(r"^(\d+)\.[^\S\n](.+)$", re.M)
+
+
+class ClassifiedBlock:
+    __slots__ = ("block_type", "text", "level", "items")
+
+    def __init__(
+        self,
+        block_type: BlockType,
+        text: str,
+        level: int = 0,
+        items: list[str] | None = None,
+    ):
+        self.block_type = block_type
+        self.text = text
+        self.level = level
+        self.items = items
+
+    def __eq__(self, other):
+        if not isinstance(other, ClassifiedBlock):
+            return False
+        return (
+            self.block_type == other.block_type
+            and self.text == other.text
+            and self.level == other.level
+            and self.items == other.items
+        )
+
+    def __repr__(self):
+        return (
+            f"ClassifiedBlock({self.block_type.value}, {self.text!r}, "
+            f"{self.level}, {self.items})"
+        )
+
+
+def classify_heading(block: str) -> ClassifiedBlock | None:
+    match = HEADING_REGEX.fullmatch(block)
+    if match is None:
+        return None
+    return ClassifiedBlock(
+        BlockType.HEADING, match.group(2).lstrip(), len(match.group(1))
+    )
+
+
+def classify_code(block: str) -> ClassifiedBlock | None:
+    if len(block) < 7 or not block.startswith("```") or not block.endswith("```"):
+        return None
+    inner = block[3:-3]
+    if inner.startswith("\n"):
+        inner = inner[1:]
+    # the fence body is one or more non-empty lines
+    if len(inner) == 0 or inner[0] == "\n" or "\n\n" in inner:
+        return None
+    return ClassifiedBlock(BlockType.CODE, "".join(block.splitlines(True)[1:-1]))
+
+
+def classify_quote(block: str) -> ClassifiedBlock:
+    text = block[1:]
+    if len(text) > 0 and text[0].isspace():
+        text = text[1:]
+    return ClassifiedBlock(BlockType.QUOTE, text)
+
+
+def classify_unordered_list(block: str) -> ClassifiedBlock | None:
+    items = UNORDERED_ITEM_REGEX.findall(block)
+    if len(items) != block.count("\n") + 1:
+        return None
+    items = [item.lstrip() for item in items]
+    return ClassifiedBlock(BlockType.UNORDERED_LIST, block, items=items)
+
+
+def classify_ordered_list(block: str) -> ClassifiedBlock | None:
+    matches = ORDERED_ITEM_REGEX.findall(block)
+    if len(matches) != block.count("\n") + 1:
+        return None
+    first = int(matches[0][0])
+    items = []
+    for offset, (number, item) in enumerate(matches):
+        if int(number) != first + offset:
+            return None
+        items.append(item.lstrip())
+    return ClassifiedBlock(BlockType.ORDERED_LIST, block, items=items)
+
+
+def classify_block(block: str) -> ClassifiedBlock:
+    classified = None
+    first = block[:1]
+    if first == "#":
+        classified = classify_heading(block)
+    elif first == "`":
+        classified = classify_code(block)
+    elif first == ">":
+        classified = classify_quote(block)
+    elif first == "-":
+        classified = classify_unordered_list(block)
+    elif first.isdecimal():
+        classified = classify_ordered_list(block)
+    if classified is None:
+        return ClassifiedBlock(BlockType.PARAGRAPH, block)
+    return classified
+
+
 def block_to_block_type(block: str) -> BlockType:
-    if re.fullmatch(r"^#{1,6} .*$", block) is not None:
-        return BlockType.HEADING
-    elif re.fullmatch(r"^`{3}\n?(?:.+\n?)+`{3}$", block, re.M) is not None:
-        return BlockType.CODE
-    elif block.startswith(">"):
-        return BlockType.QUOTE
-    elif re.fullmatch(r"^(?:-\s.+\n?)+$", block, re.M) is not None:
-        return BlockType.UNORDERED_LIST
-    elif re.fullmatch(r"^(?:\d+\.\s.+\n?)+$", block, re.M) is not None:
-        current_digit: int | None = None
-        is_valid = True
-        for line in block.split("\n"):
-            num = int(line[: line.find(".")])
-            if isinstance(current_digit, int):
-                if num == current_digit + 1:
-                    current_digit = num
-                else:
-                    is_valid = False
-                    break
-            else:
-                current_digit = num
-        if is_valid:
-            return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
+    return classify_block(block).block_type
@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import time
+
+from extract import markdown_to_blocks
+from htmlnode import HTMLNode
+from manifest import hash_inputs
+from metadata import PageMetadata
+from parentnode import ParentNode
+from rawnode import RawNode
+from images import apply_image_attributes
+from template import context_digest, rewrite_node_urls
+from transform import block_to_html_node
+from version import PARSER_VERSION
+
+# bumped whenever the blocks table changes shape; older caches are dropped
+SCHEMA_VERSION = 2
+
+# one connection per cache file per process, reused across pages
+connections: dict[str, sqlite3.Connection] = {}
+
+
+def connect(path: str) -> sqlite3.Connection:
+    connection = connections.get(path)
+    if connection is not None:
+        return connection
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        connection.execute("DROP TABLE IF EXISTS blocks")
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS blocks ("
+        "key TEXT PRIMARY KEY, html TEXT NOT NULL, meta TEXT NOT NULL, "
+        "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+    )
+    connection.commit()
+    connections[path] = connection
+    return connection
+
+
+class BlockCache:
+    def __init__(
+        self,
+        path: str,
+        basepath: str = "/",
+        assets: dict[str, str] | None = None,
+        images: dict | None = None,
+    ):
+        self.path = path
+        self.basepath = basepath
+        self.assets = assets
+        self.images = images
+        # cached HTML has asset URLs and image sizes baked in
+        self.context = context_digest(assets, images)
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        return {
+            "path": self.path,
+            "basepath": self.basepath,
+            "assets": self.assets,
+            "images": self.images,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(
+            state["path"], state["basepath"], state["assets"], state["images"]
+        )
+
+    def key(self, block: str) -> str:
+        if self.context:
+            return hash_inputs(PARSER_VERSION, self.basepath, self.context, block)
+        return hash_inputs(PARSER_VERSION, self.basepath, block)
+
+    def lookup(self, keys: list[str]) -> dict[str, tuple[str, str]]:
+        connection = connect(self.path)
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        # stay well under SQLite's bound parameter limit
+        for start in range(0, len(unique), 500):
+            batch = unique[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = connection.execute(
+                f"SELECT key, html, meta FROM blocks WHERE key IN ({placeholders})",
+                batch,
+            )
+            found.update((key, (html, meta)) for key, html, meta in rows)
+        return found
+
+    def store(self, hits: list[str], entries: dict[str, tuple[str, str]]):
+        now = time.time()
+        connection = connect(self.path)
+        with connection:
+            connection.executemany(
+                "UPDATE blocks SET accessed = ? WHERE key = ?",
+                [(now, key) for key in hits],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, html, meta, len(html) + len(meta), now)
+                    for key, (html, meta) in entries.items()
+                ],
+            )
+
+    def render(self, markdown: str, metadata: PageMetadata | None = None) -> HTMLNode:
+        blocks = markdown_to_blocks(markdown)
+        keys = [self.key(block) for block in blocks]
+        cached = self.lookup(keys)
+        fresh: dict[str, tuple[str, str]] = {}
+        children = []
+        for block, key in zip(blocks, keys):
+            entry = cached.get(key)
+            if entry is None:
+                entry = fresh.get(key)
+            if entry is None:
+                # block metadata is cached with the HTML so hits skip the parse
+                block_metadata = PageMetadata()
+                node = block_to_html_node(block, block_metadata)
+                if self.images:
+                    apply_image_attributes(
+                        node, self.images, self.basepath, self.assets
+                    )
+                rewrite_node_urls(node, self.basepath, self.assets)
+                entry = (node.to_html(), json.dumps(block_metadata.to_dict()))
+                fresh[key] = entry
+                self.misses += 1
+            else:
+                self.hits += 1
+            html, meta = entry
+            if metadata is not None:
+                metadata.merge(PageMetadata.from_dict(json.loads(meta)))
+            children.append(RawNode(html))
+        self.store([key for key in keys if key in cached], fresh)
+        return ParentNode("div", children)
+
+    def evict(self, max_bytes: int | None = None, max_age: float | None = None) -> int:
+        connection = connect(self.path)
+        removed = 0
+        with connection:
+            if max_age is not None:
+                cursor = connection.execute(
+                    "DELETE FROM blocks WHERE accessed < ?", (time.time() - max_age,)
+                )
+                removed += cursor.rowcount
+            if max_bytes is not None:
+                total = connection.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM blocks"
+                ).fetchone()[0]
+                if total > max_bytes:
+                    rows = connection.execute(
+                        "SELECT key, size FROM blocks ORDER BY accessed, key"
+                    ).fetchall()
+                    doomed = []
+                    for key, size in rows:
+                        if total <= max_bytes:
+                            break
+                        doomed.append((key,))
+                        total -= size
+                    connection.executemany("DELETE FROM blocks WHERE key = ?", doomed)
+                    removed += len(doomed)
+        return removed
@@ -0,0 +1,916 @@
+import re
+
+from block import BlockType, ClassifiedBlock
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+from metadata import PageMetadata
+from parentnode import ParentNode
+from rawnode import RawNode
+from transform import get_children_for_block, text_to_leaf_nodes
+
+PARSERS = ("simple", "commonmark")
+CODE_INDENT = 4
+TAB_STOP = 4
+
+DOCUMENT = "document"
+BLOCKQUOTE = "blockquote"
+LIST = "list"
+ITEM = "item"
+PARAGRAPH = "paragraph"
+HEADING = "heading"
+THEMATIC_BREAK = "thematic_break"
+FENCED_CODE = "fenced_code"
+INDENTED_CODE = "indented_code"
+
+CONTAINERS = (DOCUMENT, BLOCKQUOTE, ITEM)
+CODE_BLOCKS = (FENCED_CODE, INDENTED_CODE)
+
+# continue_block results
+MATCHED = 0
+FAILED = 1
+LINE_DONE = 2
+
+# block_start results
+NO_START = 0
+CONTAINER_START = 1
+LEAF_START = 2
+
+SPACES_REGEX = re.compile(r"[ \t]*")
+# every block start begins with one of these, anything else is paragraph text
+MAYBE_SPECIAL = frozenset("#`~*+_=>-0123456789")
+# a line starting with none of these can only be paragraph text
+TEXT_BREAKERS = MAYBE_SPECIAL | {" ", "\t", ""}
+ATX_HEADING_REGEX = re.compile(r"#{1,6}(?=[ \t]|$)")
+SETEXT_UNDERLINE_REGEX = re.compile(r"(?:=+|-+)[ \t]*$")
+THEMATIC_BREAK_REGEX = re.compile(
+    r"(?:(?:\*[ \t]*){3,}|(?:_[ \t]*){3,}|(?:-[ \t]*){3,})$"
+)
+BULLET_MARKER_REGEX = re.compile(r"[*+-]")
+ORDERED_MARKER_REGEX = re.compile(r"(\d{1,9})([.)])")
+# a list item marker followed by one space and then the item's text
+LIST_ITEM_REGEX = re.compile(r"(?:[*+-]|(\d{1,9})[.)]) (?=[^ \t])")
+LIST_STARTS = frozenset("*+-0123456789")
+# the start of a line that might be more than paragraph text, which takes in
+# rather more lines than can actually open a block or interrupt a paragraph
+BLOCK_STARTS = (
+    r"$|[#>\d \t\n]|```|~~~|[*+-](?:[ \t]|$)|[*_-](?:[ \t]*[*_-]){2}|[=-]+[ \t]*$"
+)
+BLOCK_START_REGEX = re.compile(f"(?:{BLOCK_STARTS})", re.MULTILINE)
+# the same after a line break, or a line ending in a space paragraph_text strips
+PARAGRAPH_BREAK_REGEX = re.compile(rf"\n(?:(?<= \n)|{BLOCK_STARTS})", re.MULTILINE)
+# every line of a chunk that is a list of plain one-line items with the given
+# marker, with the item's text
+ITEM_TEXT_REGEXES = {
+    marker: re.compile(rf"^{prefix} (?!{BLOCK_STARTS})([^\n]*[^ \n]) *$", re.MULTILINE)
+    for marker, prefix in (
+        ("*", r"\*"),
+        ("+", r"\+"),
+        ("-", "-"),
+        (".", r"\d{1,9}\."),
+        (")", r"\d{1,9}\)"),
+    )
+}
+SPACE_OR_TAB = ("", " ", "\t")
+FENCE_OPENERS = ("```", "~~~")
+
+
+class Block:
+    __slots__ = (
+        "kind",
+        "parent",
+        "children",
+        "open",
+        "start",
+        "end",
+        "lines",
+        "level",
+        "fence",
+        "fence_offset",
+        "info",
+        "ordered",
+        "marker",
+        "number",
+        "marker_offset",
+        "padding",
+        "node",
+        "inline",
+    )
+
+    def __init__(self, kind: str, parent: "Block | None", start: int):
+        self.kind = kind
+        self.parent = parent
+        # only containers hold blocks and only leaves hold lines; the other
+        # gets a shared empty tuple, which keeps allocations down
+        if kind in CONTAINERS or kind == LIST:
+            self.children: list[Block] | tuple = []
+            self.lines: list[str] | tuple = ()
+        else:
+            self.children = ()
+            self.lines = []
+        self.open = True
+        # first and last line with content, for list tightness
+        self.start = start
+        self.end = start
+        # the rest is set by whatever opens a block of the kind that uses it
+        self.node: HTMLNode | None = None
+
+    def __repr__(self):
+        return f"Block({self.kind}, {self.start}-{self.end}, {len(self.children)})"
+
+
+def can_contain(parent: str, child: str) -> bool:
+    if parent == LIST:
+        return child == ITEM
+    return parent in CONTAINERS and child != ITEM
+
+
+class BlockParser:
+    # A single pass over lines in the style of the CommonMark reference
+    # parser: each line first continues the open containers it still matches,
+    # then may open new blocks, and anything left over is a lazy paragraph
+    # continuation or new text. A block is turned into its HTML node as soon
+    # as it closes, so the tree is complete when the last line is consumed.
+
+    def __init__(self, metadata: PageMetadata | None = None):
+        self.metadata = metadata
+        self.document = Block(DOCUMENT, None, 0)
+        # the nodes of finished top-level blocks, in document order; blocks
+        # that are read in one go never need a Block of their own
+        self.nodes: list[HTMLNode] = []
+        self.tip = self.document
+        self.old_tip = self.document
+        self.last_matched = self.document
+        self.all_closed = True
+        self.line = ""
+        self.line_number = 0
+        # line numbers only ever tell apart blocks in a container that is
+        # still open, so chunks built in one go at the top level are not counted
+        self.line_offset = 0
+        self.tabs = False
+        self.offset = 0
+        self.column = 0
+        self.partial_tab = False
+        self.next_nonspace = 0
+        self.next_nonspace_column = 0
+        self.indent = 0
+        self.indented = False
+        self.blank = False
+
+    def parse(self, markdown: str) -> HTMLNode:
+        if markdown.endswith("\n"):
+            markdown = markdown[:-1]
+        # Blank lines cut the text into chunks. A chunk that is a block of its
+        # own at the top level is built straight from its text; the others
+        # are read line by line, together with the blank line after them.
+        chunks = markdown.split("\n\n")
+        last = len(chunks) - 1
+        for number, chunk in enumerate(chunks):
+            if self.tip is self.document and self.add_chunk(chunks, number):
+                continue
+            lines = chunk.split("\n")
+            if number < last:
+                lines.append("")
+            self.add_lines(lines)
+            self.line_offset += len(lines)
+        while self.tip is not None:
+            self.finalize(self.tip)
+        return self.document.node
+
+    def add_lines(self, lines: list[str]):
+        index = 0
+        while index < len(lines):
+            tip = self.tip
+            if tip.kind == FENCED_CODE and tip.parent is self.document:
+                index = self.add_fence_lines(lines, index)
+                if index == len(lines):
+                    break
+            elif tip is self.document:
+                end = self.add_top_level_lines(lines, index)
+                if end > index:
+                    index = end
+                    continue
+            self.line_number = self.line_offset + index
+            self.incorporate_line(lines[index])
+            index += 1
+
+    def add_chunk(self, chunks: list[str], number: int) -> bool:
+        chunk = chunks[number]
+        first = chunk[:1]
+        if chunk[:3] in FENCE_OPENERS:
+            return self.add_fence_chunk(chunk)
+        if first == "#":
+            return self.add_heading_chunk(chunk)
+        if first in LIST_STARTS and self.add_list_chunk(chunks, number):
+            return True
+        return self.add_paragraph_chunk(chunk)
+
+    def add_heading_chunk(self, chunk: str) -> bool:
+        match = ATX_HEADING_REGEX.match(chunk)
+        if match is None or "\n" in chunk:
+            return False
+        level = match.end()
+        text = atx_heading_text(chunk[level:])
+        self.nodes.append(heading_to_html_node(level, text, self.metadata))
+        return True
+
+    def add_paragraph_chunk(self, chunk: str) -> bool:
+        # plain text whose lines all go on with the paragraph its first line
+        # opens, which the blank line after the chunk then closes
+        if (
+            not chunk
+            or BLOCK_START_REGEX.match(chunk)
+            or PARAGRAPH_BREAK_REGEX.search(chunk)
+        ):
+            return False
+        text = chunk.rstrip(" \t")
+        self.nodes.append(ParentNode("p", text_to_leaf_nodes(text, self.metadata)))
+        return True
+
+    def add_fence_chunk(self, chunk: str) -> bool:
+        # a top-level fence that the last line of its chunk closes, with no
+        # line in between that might close it first
+        opening_end = chunk.find("\n")
+        if opening_end == -1:
+            return False
+        closing_start = chunk.rfind("\n") + 1
+        character = chunk[0]
+        text = chunk[opening_end + 1 : closing_start]
+        if character in text:
+            return False
+        opening = chunk[:opening_end]
+        info = opening.lstrip(character)
+        fence = opening[: len(opening) - len(info)]
+        if character == "`" and "`" in info:
+            return False
+        if not closes_fence(chunk[closing_start:], 0, fence):
+            return False
+        self.nodes.append(code_to_html_node(text, info.strip(" \t"), self.metadata))
+        return True
+
+    def add_list_chunk(self, chunks: list[str], number: int) -> bool:
+        # The usual top-level list, one line of text per item with nothing
+        # after it that could still belong to it, is built without an item
+        # and a paragraph block for every line.
+        chunk = chunks[number]
+        if "\t" in chunk:
+            return False
+        first = LIST_ITEM_REGEX.match(chunk)
+        if first is None:
+            return False
+        ordered = first.group(1) is not None
+        marker = chunk[first.end() - 2]
+        texts = ITEM_TEXT_REGEXES[marker].findall(chunk)
+        if len(texts) != chunk.count("\n") + 1:
+            return False
+        for position in range(number + 1, len(chunks)):
+            # the first line with text after the blank ones must not be able
+            # to continue the list
+            following = chunks[position].lstrip("\n")
+            if not following:
+                continue
+            if following[:1] in SPACE_OR_TAB or following[:1] == marker:
+                return False
+            if ordered:
+                match = ORDERED_MARKER_REGEX.match(following)
+                if match is not None and match.group(2) == marker:
+                    return False
+            break
+        metadata = self.metadata
+        items = [
+            ParentNode("li", text_to_leaf_nodes(text, metadata)) for text in texts
+        ]
+        if not ordered:
+            node = ParentNode("ul", items)
+        else:
+            start = int(first.group(1))
+            props = {"start": str(start)} if start != 1 else None
+            node = ParentNode("ol", items, props)
+        self.nodes.append(node)
+        return True
+
+    def add_fence_lines(self, lines: list[str], index: int) -> int:
+        # top-level fence content is verbatim up to a line that might close
+        # it, so whole runs of lines are taken without looking at them twice
+        tip = self.tip
+        if tip.fence_offset:
+            return index
+        fence_character = tip.fence[0]
+        end = len(lines)
+        for position in range(index, len(lines)):
+            line = lines[position]
+            # the substring test rules out most lines without copying them
+            if fence_character in line and line.lstrip(" \t").startswith(
+                fence_character
+            ):
+                end = position
+                break
+        if end > index:
+            tip.lines.extend(lines[index:end])
+            tip.end = self.line_offset + end - 1
+        if end == len(lines):
+            return end
+        line = lines[end]
+        position = SPACES_REGEX.match(line).end()
+        if (
+            position < CODE_INDENT
+            and "\t" not in line[:position]
+            and closes_fence(line, position, tip.fence)
+        ):
+            tip.end = self.line_offset + end
+            self.finalize(tip)
+            return end + 1
+        return end
+
+    def add_top_level_lines(self, lines: list[str], index: int) -> int:
+        # Runs of the most common top-level blocks, paragraphs of plain text,
+        # headings and fenced code, are built here without going through
+        # incorporate_line for every line. A paragraph that something other
+        # than a blank line ends is left open for it to carry on with.
+        document = self.document
+        nodes = self.nodes
+        metadata = self.metadata
+        end = len(lines)
+        while index < end:
+            line = lines[index]
+            first = line[:1]
+            if first in TEXT_BREAKERS:
+                if not line.strip(" \t"):
+                    index += 1
+                    continue
+                if first == "#":
+                    match = ATX_HEADING_REGEX.match(line)
+                    if match is None:
+                        break
+                    level = match.end()
+                    text = atx_heading_text(line[level:])
+                    nodes.append(heading_to_html_node(level, text, metadata))
+                    index += 1
+                    continue
+                if line[:3] in FENCE_OPENERS:
+                    # nothing is open, so the fence needs no container matching
+                    self.line = line
+                    self.line_number = self.line_offset + index
+                    self.indent = 0
+                    self.all_closed = True
+                    if not self.start_fence(0):
+                        break
+                    self.add_line()
+                    index = self.add_fence_lines(lines, index + 1)
+                    if self.tip is not document:
+                        break
+                    continue
+                if first not in MAYBE_SPECIAL or not is_plain_text(line, 0):
+                    break
+            for position in range(index + 1, end):
+                line = lines[position]
+                first = line[:1]
+                if first in TEXT_BREAKERS and not (
+                    first in MAYBE_SPECIAL
+                    and is_plain_text(line, 0)
+                    and SETEXT_UNDERLINE_REGEX.match(line) is None
+                ):
+                    break
+            else:
+                position = end
+            if position < end and lines[position].strip(" \t"):
+                paragraph = Block(PARAGRAPH, document, self.line_offset + index)
+                paragraph.lines = lines[index:position]
+                paragraph.end = self.line_offset + position - 1
+                document.children.append(paragraph)
+                self.tip = paragraph
+                return position
+            text = paragraph_text(lines[index:position])
+            nodes.append(ParentNode("p", text_to_leaf_nodes(text, metadata)))
+            index = position
+        return index
+
+    def find_next_nonspace(self):
+        line = self.line
+        position = SPACES_REGEX.match(line, self.offset).end()
+        if self.tabs:
+            column = self.column
+            for character in line[self.offset : position]:
+                if character == " ":
+                    column += 1
+                else:
+                    column += TAB_STOP - column % TAB_STOP
+        else:
+            column = position
+        self.next_nonspace = position
+        self.next_nonspace_column = column
+        self.indent = column - self.column
+        self.indented = self.indent >= CODE_INDENT
+        self.blank = position == len(line)
+
+    def advance_next_nonspace(self):
+        self.offset = self.next_nonspace
+        self.column = self.next_nonspace_column
+        self.partial_tab = False
+
+    def advance_to_end(self):
+        self.offset = len(self.line)
+        self.partial_tab = False
+
+    def advance_offset(self, count: int, columns: bool = False):
+        # counts characters, or columns when indentation is being measured;
+        # a tab wider than the columns left is then only partly consumed
+        line = self.line
+        if not self.tabs:
+            # without tabs columns and offsets are the same thing
+            self.offset = self.column = min(self.offset + count, len(line))
+            self.partial_tab = False
+            return
+        while count > 0 and self.offset < len(line):
+            if line[self.offset] == "\t":
+                to_tab = TAB_STOP - self.column % TAB_STOP
+                if columns:
+                    self.partial_tab = to_tab > count
+                    advance = min(count, to_tab)
+                    self.column += advance
+                    if not self.partial_tab:
+                        self.offset += 1
+                    count -= advance
+                    continue
+                self.column += to_tab
+            else:
+                self.column += 1
+            self.partial_tab = False
+            self.offset += 1
+            count -= 1
+
+    def skip_quote_marker(self):
+        self.advance_next_nonspace()
+        self.advance_offset(1)
+        if self.line[self.offset : self.offset + 1] in SPACE_OR_TAB:
+            self.advance_offset(1, True)
+
+    def incorporate_line(self, line: str):
+        # shortcuts for the most common lines at the top level or in a plain
+        # list; everything else goes through the general matching below
+        tip = self.tip
+        kind = tip.kind
+        if kind == PARAGRAPH:
+            first = line[:1]
+            if first not in TEXT_BREAKERS or (
+                first in MAYBE_SPECIAL
+                and is_plain_text(line, 0)
+                and SETEXT_UNDERLINE_REGEX.match(line) is None
+            ):
+                # no container prefix or block start can begin like this, so
+                # the line goes on with the open paragraph, lazily if need be
+                tip.lines.append(line)
+                tip.end = self.line_number
+                return
+            if tip.parent is self.document and is_blank(line):
+                self.finalize(tip)
+                return
+            if self.start_sibling_item(tip, line):
+                return
+        elif kind == DOCUMENT:
+            if line[:1] not in TEXT_BREAKERS:
+                paragraph = Block(PARAGRAPH, tip, self.line_number)
+                paragraph.lines.append(line)
+                tip.children.append(paragraph)
+                self.tip = paragraph
+                return
+            if is_blank(line):
+                return
+        self.line = line
+        self.tabs = "\t" in line
+        self.offset = 0
+        self.column = 0
+        self.partial_tab = False
+        self.old_tip = self.tip
+        container = self.document
+        while container.children and container.children[-1].open:
+            container = container.children[-1]
+            self.find_next_nonspace()
+            result = self.continue_block(container)
+            if result == LINE_DONE:
+                return
+            if result == FAILED:
+                container = container.parent
+                break
+        self.all_closed = container is self.old_tip
+        self.last_matched = container
+
+        matched_leaf = container.kind in CODE_BLOCKS
+        while not matched_leaf:
+            self.find_next_nonspace()
+            position = self.next_nonspace
+            if not self.indented and line[position : position + 1] not in MAYBE_SPECIAL:
+                self.advance_next_nonspace()
+                break
+            started = self.start_block(container)
+            if started == NO_START:
+                self.advance_next_nonspace()
+                break
+            container = self.tip
+            matched_leaf = started == LEAF_START
+
+        if not self.all_closed and not self.blank and self.tip.kind == PARAGRAPH:
+            # lazy continuation: the paragraph goes on without its prefixes
+            self.add_line()
+            return
+        self.close_unmatched()
+        if container.kind in CODE_BLOCKS or container.kind == PARAGRAPH:
+            self.add_line()
+        elif self.offset < len(line) and not self.blank:
+            self.add_child(PARAGRAPH)
+            self.advance_next_nonspace()
+            self.add_line()
+
+    def start_sibling_item(self, paragraph: Block, line: str) -> bool:
+        # The common shape of a top-level list, "- text" right after an item
+        # holding a paragraph, handled without the general matching. Anything
+        # that could open another block inside the new item is left to it.
+        item = paragraph.parent
+        if item.kind != ITEM or item.marker_offset or "\t" in line:
+            return False
+        block = item.parent
+        if block.parent is not self.document:
+            return False
+        if block.ordered:
+            match = ORDERED_MARKER_REGEX.match(line)
+            if match is None or match.group(2) != block.marker:
+                return False
+            marker_end = match.end()
+        elif line[:1] == block.marker:
+            marker_end = 1
+        else:
+            return False
+        if line[marker_end : marker_end + 1] != " ":
+            return False
+        position = marker_end + 1
+        if line[position : position + 1] == " ":
+            position = SPACES_REGEX.match(line, position).end()
+        spaces = position - marker_end
+        if spaces > CODE_INDENT or position == len(line):
+            return False
+        if line[position] in MAYBE_SPECIAL and not is_plain_text(line, position):
+            return False
+        self.finalize(paragraph)
+        self.finalize(item)
+        item = Block(ITEM, block, self.line_number)
+        item.marker_offset = 0
+        item.padding = marker_end + spaces
+        block.children.append(item)
+        paragraph = Block(PARAGRAPH, item, self.line_number)
+        paragraph.lines.append(line[position:])
+        item.children.append(paragraph)
+        self.tip = paragraph
+        return True
+
+    def continue_block(self, block: Block) -> int:
+        kind = block.kind
+        if kind == PARAGRAPH:
+            return FAILED if self.blank else MATCHED
+        if kind == LIST:
+            return MATCHED
+        if kind == BLOCKQUOTE:
+            if self.indented or not self.line.startswith(">", self.next_nonspace):
+                return FAILED
+            self.skip_quote_marker()
+            # a bare ">" line is part of the quote, not a gap after it
+            block.end = self.line_number
+            return MATCHED
+        if kind == ITEM:
+            if self.blank:
+                # an item may start with at most one blank line
+                if not block.children:
+                    return FAILED
+                self.advance_next_nonspace()
+                return MATCHED
+            if self.indent >= block.marker_offset + block.padding:
+                self.advance_offset(block.marker_offset + block.padding, True)
+                return MATCHED
+            return FAILED
+        if kind == FENCED_CODE:
+            return self.continue_fence(block)
+        if kind == INDENTED_CODE:
+            if self.indented:
+                self.advance_offset(CODE_INDENT, True)
+            elif self.blank:
+                self.advance_next_nonspace()
+            else:
+                return FAILED
+            return MATCHED
+        # headings and thematic breaks are a single line
+        return FAILED
+
+    def continue_fence(self, block: Block) -> int:
+        line = self.line
+        position = self.next_nonspace
+        if not self.indented and closes_fence(line, position, block.fence):
+            block.end = self.line_number
+            self.finalize(block)
+            return LINE_DONE
+        # the content loses as much indentation as the opening fence had
+        skip = block.fence_offset
+        while skip > 0 and line[self.offset : self.offset + 1] in SPACE_OR_TAB:
+            self.advance_offset(1, True)
+            skip -= 1
+        return MATCHED
+
+    def start_block(self, container: Block) -> int:
+        line = self.line
+        position = self.next_nonspace
+        if self.indented:
+            if self.tip.kind != PARAGRAPH and not self.blank:
+                self.advance_offset(CODE_INDENT, True)
+                self.close_unmatched()
+                self.add_child(INDENTED_CODE)
+                return LEAF_START
+            return NO_START
+        character = line[position]
+        if character == ">":
+            self.skip_quote_marker()
+            self.close_unmatched()
+            self.add_child(BLOCKQUOTE)
+            return CONTAINER_START
+        if character == "#":
+            match = ATX_HEADING_REGEX.match(line, position)
+            if match is not None:
+                self.close_unmatched()
+                heading = self.add_child(HEADING)
+                heading.level = match.end() - position
+                heading.lines.append(atx_heading_text(line[match.end() :]))
+                self.advance_to_end()
+                return LEAF_START
+        if character in "`~" and self.start_fence(position):
+            return LEAF_START
+        if container.kind == PARAGRAPH and character in "=-":
+            if SETEXT_UNDERLINE_REGEX.match(line, position):
+                self.close_unmatched()
+                container.kind = HEADING
+                container.level = 1 if character == "=" else 2
+                container.lines = [paragraph_text(container.lines)]
+                container.end = self.line_number
+                self.advance_to_end()
+                return LEAF_START
+        if character in "*_-" and THEMATIC_BREAK_REGEX.match(line, position):
+            self.close_unmatched()
+            self.add_child(THEMATIC_BREAK)
+            self.advance_to_end()
+            return LEAF_START
+        if self.start_list_item(container, position):
+            return CONTAINER_START
+        return NO_START
+
+    def start_fence(self, position: int) -> bool:
+        line = self.line
+        fence_character = line[position]
+        end = position
+        while end < len(line) and line[end] == fence_character:
+            end += 1
+        if end - position < 3:
+            return False
+        info = line[end:]
+        if fence_character == "`" and "`" in info:
+            return False
+        self.close_unmatched()
+        fence = self.add_child(FENCED_CODE)
+        fence.fence = line[position:end]
+        fence.fence_offset = self.indent
+        fence.info = info.strip(" \t")
+        self.advance_to_end()
+        return True
+
+    def start_list_item(self, container: Block, position: int) -> bool:
+        line = self.line
+        ordered = False
+        number = 1
+        match = BULLET_MARKER_REGEX.match(line, position)
+        if match is not None:
+            marker = match.group()
+        else:
+            match = ORDERED_MARKER_REGEX.match(line, position)
+            if match is None:
+                return False
+            ordered = True
+            number = int(match.group(1))
+            marker = match.group(2)
+            # only a list starting at 1 may interrupt a paragraph
+            if container.kind == PARAGRAPH and number != 1:
+                return False
+        marker_end = match.end()
+        if line[marker_end : marker_end + 1] not in SPACE_OR_TAB:
+            return False
+        if container.kind == PARAGRAPH and not line[marker_end:].strip(" \t"):
+            return False
+        marker_offset = self.indent
+        self.advance_next_nonspace()
+        self.advance_offset(marker_end - position, True)
+        spaces_column = self.column
+        spaces_offset = self.offset
+        while True:
+            self.advance_offset(1, True)
+            following = line[self.offset : self.offset + 1]
+            if self.column - spaces_column >= 5 or following not in (" ", "\t"):
+                break
+        spaces = self.column - spaces_column
+        width = marker_end - position
+        if spaces >= 5 or spaces < 1 or following == "":
+            # content indented further than that is an indented code block
+            padding = width + 1
+            self.column = spaces_column
+            self.offset = spaces_offset
+            self.partial_tab = False
+            if line[self.offset : self.offset + 1] in SPACE_OR_TAB:
+                self.advance_offset(1, True)
+        else:
+            padding = width + spaces
+        self.close_unmatched()
+        tip = self.tip
+        if tip.kind != LIST or tip.ordered != ordered or tip.marker != marker:
+            tip = self.add_child(LIST)
+            tip.ordered = ordered
+            tip.marker = marker
+            tip.number = number
+        item = self.add_child(ITEM)
+        item.marker_offset = marker_offset
+        item.padding = padding
+        return True
+
+    def close_unmatched(self):
+        if self.all_closed:
+            return
+        while self.old_tip is not self.last_matched:
+            parent = self.old_tip.parent
+            self.finalize(self.old_tip)
+            self.old_tip = parent
+        self.all_closed = True
+
+    def add_child(self, kind: str) -> Block:
+        while not can_contain(self.tip.kind, kind):
+            self.finalize(self.tip)
+        block = Block(kind, self.tip, self.line_number)
+        self.tip.children.append(block)
+        self.tip = block
+        return block
+
+    def add_line(self):
+        tip = self.tip
+        text = self.line[self.offset :]
+        if self.partial_tab:
+            # the rest of a partly consumed tab is content
+            to_tab = TAB_STOP - self.column % TAB_STOP
+            text = " " * to_tab + self.line[self.offset + 1 :]
+        if tip.kind == PARAGRAPH:
+            text = text.lstrip(" \t")
+        tip.lines.append(text)
+        # trailing blank lines are not part of an indented code block
+        if tip.kind != INDENTED_CODE or text.strip(" "):
+            tip.end = self.line_number
+
+    def finalize(self, block: Block):
+        block.open = False
+        self.tip = block.parent
+        if block.kind not in CODE_BLOCKS and block.children:
+            block.end = max(block.end, block.children[-1].end)
+        block.node = self.block_to_html_node(block)
+        if block.parent is self.document:
+            self.nodes.append(block.node)
+        # from here on a block is only read through its node, and an item
+        # through its children; without the back links finished parts of the
+        # tree are freed right away instead of waiting for the cycle collector
+        block.parent = None
+        block.lines = ()
+        if block.kind != ITEM:
+            block.children = ()
+
+    def block_to_html_node(self, block: Block) -> HTMLNode | None:
+        kind = block.kind
+        metadata = self.metadata
+        if kind == PARAGRAPH:
+            block.inline = text_to_leaf_nodes(paragraph_text(block.lines), metadata)
+            if block.parent.kind == ITEM:
+                # the list decides on <p> once it knows whether it is tight
+                return None
+            return ParentNode("p", block.inline)
+        if kind == ITEM:
+            return None
+        if kind == HEADING:
+            text = block.lines[0] if block.lines else ""
+            return heading_to_html_node(block.level, text, metadata)
+        if kind in CODE_BLOCKS:
+            lines = block.lines
+            if kind == FENCED_CODE:
+                # the opening fence line was added too; its info is kept apart
+                lines = lines[1:]
+            else:
+                while lines and not lines[-1].strip(" "):
+                    lines.pop()
+            text = "\n".join(lines) + "\n" if lines else ""
+            info = block.info if kind == FENCED_CODE else ""
+            return code_to_html_node(text, info, metadata)
+        if kind == THEMATIC_BREAK:
+            return RawNode("<hr />")
+        if kind == LIST:
+            return list_to_html_node(block)
+        if kind == DOCUMENT:
+            return ParentNode("div", self.nodes)
+        return ParentNode("blockquote", [child.node for child in block.children])
+
+
+def paragraph_text(lines: list[str]) -> str:
+    if len(lines) == 1:
+        return lines[0].rstrip(" \t")
+    text = "\n".join(lines)
+    if " \n" in text:
+        text = "\n".join(line.rstrip(" ") for line in lines)
+    return text.rstrip(" \t")
+
+
+def heading_to_html_node(
+    level: int, text: str, metadata: PageMetadata | None
+) -> ParentNode:
+    heading = ClassifiedBlock(BlockType.HEADING, text, level)
+    return ParentNode(f"h{level}", get_children_for_block(heading, metadata))
+
+
+def code_to_html_node(
+    text: str, info: str, metadata: PageMetadata | None
+) -> ParentNode:
+    if metadata is not None:
+        metadata.add_text(text)
+    props = {"class": f"language-{info.split()[0]}"} if info else None
+    return ParentNode("pre", [LeafNode("code", text, props)])
+
+
+def closes_fence(line: str, position: int, fence: str) -> bool:
+    end = position
+    while end < len(line) and line[end] == fence[0]:
+        end += 1
+    return end - position >= len(fence) and is_blank(line[end:])
+
+
+def is_blank(line: str) -> bool:
+    return not line.strip(" \t")
+
+
+def is_plain_text(line: str, position: int) -> bool:
+    # whether a block start could begin at position, outside of a paragraph
+    character = line[position]
+    if character in ">#":
+        return False
+    if character in "`~":
+        return not line.startswith(character * 3, position)
+    if character in "*+-" and line[position + 1 : position + 2] in SPACE_OR_TAB:
+        return False
+    if character in "*_-":
+        return THEMATIC_BREAK_REGEX.match(line, position) is None
+    if character.isdigit():
+        return ORDERED_MARKER_REGEX.match(line, position) is None
+    return True
+
+
+def atx_heading_text(text: str) -> str:
+    text = text.strip(" \t")
+    # an optional closing sequence of #s must be set off by a space
+    stripped = text.rstrip("#")
+    if not stripped:
+        return ""
+    if stripped[-1] in " \t":
+        return stripped.rstrip(" \t")
+    return text
+
+
+def ends_with_blank_line(block: Block, following: Block) -> bool:
+    return following.start > block.end + 1
+
+
+def is_tight(block: Block) -> bool:
+    items = block.children
+    for index, item in enumerate(items):
+        if index + 1 < len(items) and ends_with_blank_line(item, items[index + 1]):
+            return False
+        children = item.children
+        for position in range(len(children) - 1):
+            if ends_with_blank_line(children[position], children[position + 1]):
+                return False
+    return True
+
+
+def list_to_html_node(block: Block) -> ParentNode:
+    tight = is_tight(block)
+    items = []
+    for item in block.children:
+        children = []
+        for child in item.children:
+            if child.kind != PARAGRAPH:
+                children.append(child.node)
+            elif tight:
+                # paragraphs in a tight list render without their <p>
+                children.extend(child.inline)
+            else:
+                children.append(ParentNode("p", child.inline))
+        items.append(ParentNode("li", children))
+    if not block.ordered:
+        return ParentNode("ul", items)
+    props = {"start": str(block.number)} if block.number != 1 else None
+    return ParentNode("ol", items, props)
+
+
+def parse_document(markdown: str, metadata: PageMetadata | None = None) -> HTMLNode:
+    return BlockParser(metadata).parse(markdown)
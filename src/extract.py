@@ -1,20 +1,104 @@
+import codecs
+import io
+import mmap
 import re
+from typing import IO, Iterator
 
-import constants
+BLOCK_SEPARATOR = "\n\n"
+
+
+def scan_markdown_references(
+    text: str, opener: str = "["
+) -> Iterator[tuple[int, int, str, str]]:
+    # Yields (start, end, label, url) exactly where re.finditer with
+    # MARKDOWN_LINK_CAPTURING_REGEX (or the image one, for opener "![") would,
+    # in linear time. Neither lazy group crosses a newline, so when the first
+    # "](" after an opener has no ")" behind it on the same line, no later
+    # opener on that line can match either and the scan skips to the next line.
+    position = 0
+    length = len(text)
+    while True:
+        start = text.find(opener, position)
+        if start == -1:
+            return
+        line_end = text.find("\n", start)
+        if line_end == -1:
+            line_end = length
+        label_start = start + len(opener)
+        middle = text.find("](", label_start, line_end)
+        close = -1 if middle == -1 else text.find(")", middle + 2, line_end)
+        if close == -1:
+            position = line_end + 1
+            continue
+        yield start, close + 1, text[label_start:middle], text[middle + 2 : close]
+        position = close + 1
 
 
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
-    return re.findall(constants.MARKDOWN_IMAGE_CAPTURING_REGEX, text)
+    return [(alt, url) for _, _, alt, url in scan_markdown_references(text, "![")]
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
-    return re.findall(constants.MARKDOWN_LINK_CAPTURING_REGEX, text)
+    return [(label, url) for _, _, label, url in scan_markdown_references(text)]
 
 
 def markdown_to_blocks(markdown: str) -> list[str]:
-    blocks = markdown.split("\n\n")
-    stripped_blocks = map(lambda x: x.strip(), blocks)
-    return list(filter(lambda x: len(x) > 0, stripped_blocks))
+    blocks = map(str.strip, markdown.split(BLOCK_SEPARATOR))
+    return [block for block in blocks if len(block) > 0]
+
+
+def iter_markdown_blocks(
+    source: IO[str] | IO[bytes] | mmap.mmap,
+    chunk_size: int = 1 << 16,
+    encoding: str = "utf-8",
+) -> Iterator[str]:
+    # Yields exactly what markdown_to_blocks returns for the same text while
+    # holding at most one block plus one chunk in memory.
+    decoder = None
+    buffer = ""
+    search_from = 0
+    while True:
+        chunk = source.read(chunk_size)
+        final = len(chunk) == 0
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                # match the universal newlines of a text-mode read
+                decoder = io.IncrementalNewlineDecoder(
+                    codecs.getincrementaldecoder(encoding)(), translate=True
+                )
+            chunk = decoder.decode(chunk, final=final)
+        buffer += chunk
+        start = 0
+        while True:
+            index = buffer.find(BLOCK_SEPARATOR, search_from)
+            if index == -1:
+                break
+            block = buffer[start:index].strip()
+            if len(block) > 0:
+                yield block
+            start = index + len(BLOCK_SEPARATOR)
+            search_from = start
+        buffer = buffer[start:]
+        # a separator may straddle the chunk boundary
+        search_from = max(0, len(buffer) - 1)
+        if final:
+            break
+    block = buffer.strip()
+    if len(block) > 0:
+        yield block
+
+
+def read_markdown_blocks(path: str, use_mmap: bool = False) -> Iterator[str]:
+    if not use_mmap:
+        with open(path, "r") as file:
+            yield from iter_markdown_blocks(file)
+        return
+    with open(path, "rb") as file:
+        if file.seek(0, 2) == 0:
+            # mmap cannot map an empty file
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter_markdown_blocks(mapped)
 
 
 def extract_title(markdown: str):
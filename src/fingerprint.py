@@ -0,0 +1,181 @@
+import os
+import posixpath
+import re
+import shutil
+
+from manifest import hash_inputs
+from sync import file_hash, remove_orphans
+from template import rewrite_root_url, split_url
+
+FINGERPRINT_LENGTH = 8
+CSS_URL_REGEX = re.compile(r"""url\(\s*(['"]?)([^'")\s]+)\1\s*\)""")
+CSS_IMPORT_REGEX = re.compile(r"""@import\s+(['"])([^'"]+)\1""")
+EXTERNAL_URL_REGEX = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)")
+
+
+class FingerprintError(Exception):
+    pass
+
+
+def fingerprint_name(path: str, digest: str) -> str:
+    root, extension = posixpath.splitext(path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def cached_file_hash(path: str, entry: dict | None) -> tuple[str, dict]:
+    # size and mtime match the last build, so the old hash still holds
+    stat = os.stat(path)
+    if (
+        entry is not None
+        and entry.get("size") == stat.st_size
+        and entry.get("mtime_ns") == stat.st_mtime_ns
+    ):
+        return entry["hash"], entry
+    digest = file_hash(path)
+    return digest, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+
+
+def css_target(url: str, directory: str) -> str | None:
+    # the asset path a stylesheet URL points at, or None for external URLs
+    if url.startswith("/") and not url.startswith("//"):
+        return split_url(url[1:])[0]
+    if EXTERNAL_URL_REGEX.match(url):
+        return None
+    return posixpath.normpath(posixpath.join(directory, split_url(url)[0]))
+
+
+def rewrite_css_url(
+    url: str, directory: str, assets: dict[str, str], basepath: str
+) -> str | None:
+    if url.startswith("/") and not url.startswith("//"):
+        return rewrite_root_url(url, basepath, assets)
+    target = css_target(url, directory)
+    if target is None or target not in assets:
+        return None
+    # relative references stay relative to the stylesheet
+    renamed = posixpath.relpath(assets[target], directory or ".")
+    return renamed + split_url(url)[1]
+
+
+def rewrite_css(
+    text: str, css_path: str, assets: dict[str, str], basepath: str = "/"
+) -> str:
+    directory = posixpath.dirname(css_path)
+
+    def replace_url(match: re.Match) -> str:
+        quote = match.group(1)
+        url = rewrite_css_url(match.group(2), directory, assets, basepath)
+        if url is None:
+            return match.group(0)
+        return f"url({quote}{url}{quote})"
+
+    def replace_import(match: re.Match) -> str:
+        quote = match.group(1)
+        url = rewrite_css_url(match.group(2), directory, assets, basepath)
+        if url is None:
+            return match.group(0)
+        return f"@import {quote}{url}{quote}"
+
+    text = CSS_URL_REGEX.sub(replace_url, text)
+    return CSS_IMPORT_REGEX.sub(replace_import, text)
+
+
+def css_references(text: str, css_path: str) -> set[str]:
+    directory = posixpath.dirname(css_path)
+    targets = set()
+    for regex in (CSS_URL_REGEX, CSS_IMPORT_REGEX):
+        for match in regex.finditer(text):
+            target = css_target(match.group(2), directory)
+            if target is not None:
+                targets.add(target)
+    return targets
+
+
+def stylesheet_order(texts: dict[str, str]) -> list[str]:
+    # A stylesheet's hash covers the hashed names it references, so every
+    # stylesheet it points at has to be named first. A cycle has no such order.
+    order = []
+    done = set()
+
+    def visit(path: str, chain: list[str]):
+        if path in done:
+            return
+        if path in chain:
+            cycle = " -> ".join(chain[chain.index(path) :] + [path])
+            raise FingerprintError(f"stylesheets reference each other: {cycle}")
+        chain.append(path)
+        for target in sorted(css_references(texts[path], path)):
+            if target in texts:
+                visit(target, chain)
+        chain.pop()
+        done.add(path)
+        order.append(path)
+
+    for path in sorted(texts):
+        visit(path, [])
+    return order
+
+
+def list_assets(source: str) -> list[str]:
+    paths = []
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.relpath(os.path.join(root, name), source)
+            paths.append(path.replace(os.sep, "/"))
+    return paths
+
+
+def fingerprint_assets(
+    source: str,
+    destination: str,
+    cache: dict[str, dict],
+    basepath: str = "/",
+    keep: set[str] | None = None,
+) -> dict[str, str]:
+    # Copies every asset to a content-hashed name and returns the mapping from
+    # original to hashed paths. cache is updated in place with the size, mtime
+    # and hash of each source, so unchanged assets are never read again.
+    assets: dict[str, str] = {}
+    stylesheets = []
+    expected = set()
+    paths = list_assets(source)
+    for path in paths:
+        if path.endswith(".css"):
+            stylesheets.append(path)
+            continue
+        digest, cache[path] = cached_file_hash(
+            os.path.join(source, path), cache.get(path)
+        )
+        assets[path] = fingerprint_name(path, digest)
+    # stylesheets embed the hashed names of what they reference, so they are
+    # rewritten and hashed after everything else is named
+    texts = {}
+    for path in stylesheets:
+        with open(os.path.join(source, path), "r") as file:
+            texts[path] = file.read()
+    rendered = {}
+    for path in stylesheet_order(texts):
+        text = rewrite_css(texts[path], path, assets, basepath)
+        rendered[path] = text
+        assets[path] = fingerprint_name(path, hash_inputs(text))
+        cache.pop(path, None)
+    for path in set(cache) - set(paths):
+        del cache[path]
+    for path, name in assets.items():
+        dest_path = os.path.join(destination, *name.split("/"))
+        expected.add(os.path.abspath(dest_path))
+        expected.add(os.path.abspath(os.path.dirname(dest_path)))
+        # the name is derived from the content, so an existing file is current
+        if os.path.exists(dest_path):
+            continue
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if path in rendered:
+            with open(dest_path, "w") as file:
+                file.write(rendered[path])
+        else:
+            shutil.copy2(os.path.join(source, *path.split("/")), dest_path)
+    expected.add(os.path.abspath(destination))
+    kept = {os.path.abspath(path) for path in keep or ()}
+    remove_orphans(destination, expected, kept)
+    return assets
@@ -1,32 +1,60 @@
 from __future__ import annotations
 
-import re
-
-from block import BlockType
-
-
-def get_tag_from_block_type(block_type: BlockType, block: str) -> str:
-    match block_type:
-        case BlockType.PARAGRAPH:
-            return "p"
-        case BlockType.HEADING:
-            prefix = re.match("^#{1,6}", block)
-            if prefix:
-                level = len(prefix.group(0))
-                return f"h{level}"
-            # fallback is level cannot be determined
-            return "h1"
-        case BlockType.CODE:
-            return "pre"
-        case BlockType.QUOTE:
-            return "blockquote"
-        case BlockType.UNORDERED_LIST:
-            return "ul"
-        case BlockType.ORDERED_LIST:
-            return "ol"
+from functools import lru_cache
+from typing import Iterator
+
+from block import BlockType, ClassifiedBlock
+
+BLOCK_TAGS = {
+    BlockType.PARAGRAPH: "p",
+    BlockType.CODE: "pre",
+    BlockType.QUOTE: "blockquote",
+    BlockType.UNORDERED_LIST: "ul",
+    BlockType.ORDERED_LIST: "ol",
+}
+
+
+def get_tag_for_block(block: ClassifiedBlock) -> str:
+    if block.block_type == BlockType.HEADING:
+        return f"h{block.level}"
+    return BLOCK_TAGS[block.block_type]
+
+
+# multi-attribute sets (images with their sizes and srcset) repeat across pages
+PROPS_CACHE_SIZE = 4096
+
+
+def escape_text(text: str) -> str:
+    # most text has nothing to escape, and `in` is much cheaper than replace
+    if "&" in text or "<" in text or ">" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    if "&" in value or "<" in value or ">" in value or '"' in value:
+        return (
+            value.replace("&", "&amp;")
+            .replace("<", "&lt;")
+            .replace(">", "&gt;")
+            .replace('"', "&quot;")
+        )
+    return value
+
+
+# keyed by the items rather than the dict: images and template rewrite props
+# in place after the node is built
+@lru_cache(maxsize=PROPS_CACHE_SIZE)
+def serialize_props(items: tuple[tuple[str, str], ...]) -> str:
+    attributes = " ".join(
+        f'{name}="{escape_attribute(value)}"' for name, value in items
+    )
+    return f" {attributes} "
 
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str | None = None,
@@ -42,12 +70,18 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError
 
+    def iter_html(self) -> Iterator[str]:
+        raise NotImplementedError
+
     def props_to_html(self):
         if self.props is None:
             return ""
-        obj = self.props
-        output_list = map(lambda x: f'{x}="{obj[x]}"', obj)
-        return f" {' '.join(output_list)} "
+        if len(self.props) == 1:
+            # a lone href or src is usually unique to its page, so it would
+            # only push the shared attribute sets out of the cache
+            ((name, value),) = self.props.items()
+            return f' {name}="{escape_attribute(value)}" '
+        return serialize_props(tuple(self.props.items()))
 
     def __repr__(self) -> str:
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
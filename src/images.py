@@ -0,0 +1,212 @@
+import os
+import posixpath
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from fingerprint import cached_file_hash, list_assets
+from htmlnode import HTMLNode
+from metadata import SiteIndex
+from template import rewrite_root_url, split_url
+
+try:
+    from PIL import Image
+except ImportError:
+    # Pillow is optional; only the --images stage needs it
+    Image = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+DEFAULT_WIDTHS = (480, 960, 1440)
+VARIANT_KIND = "image"
+
+
+def imaging_available() -> bool:
+    return Image is not None
+
+
+class ImageInfo:
+    __slots__ = ("path", "digest", "width", "height", "widths")
+
+    def __init__(
+        self, path: str, digest: str, width: int, height: int, widths: list[int]
+    ):
+        self.path = path
+        self.digest = digest
+        self.width = width
+        self.height = height
+        self.widths = widths
+
+    def __repr__(self):
+        return (
+            f"ImageInfo({self.path}, {self.digest[:8]}, "
+            f"{self.width}x{self.height}, {self.widths})"
+        )
+
+    def key(self) -> str:
+        widths = ",".join(str(width) for width in self.widths)
+        return f"{self.path}\0{self.digest}\0{self.width}x{self.height}\0{widths}"
+
+    def variant_path(self, width: int) -> str:
+        # named after the source hash, so a variant never needs revalidating
+        root, extension = posixpath.splitext(self.path)
+        return f"{root}.{self.digest[:8]}-{width}w{extension}"
+
+
+def read_size(path: str) -> tuple[int, int]:
+    # Pillow only parses the header here, the pixels are never decoded
+    with Image.open(path) as image:
+        return image.size
+
+
+def scan_images(
+    source: str, cache: dict[str, dict], widths: tuple[int, ...] = DEFAULT_WIDTHS
+) -> dict[str, ImageInfo]:
+    images = {}
+    for path in list_assets(source):
+        if not path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        full_path = os.path.join(source, *path.split("/"))
+        digest, entry = cached_file_hash(full_path, cache.get(path))
+        if "width" not in entry:
+            entry = dict(entry)
+            entry["width"], entry["height"] = read_size(full_path)
+        cache[path] = entry
+        smaller = sorted(width for width in set(widths) if width < entry["width"])
+        images[path] = ImageInfo(path, digest, entry["width"], entry["height"], smaller)
+    for path in set(cache) - set(images):
+        del cache[path]
+    return images
+
+
+def apply_image_attributes(
+    node: HTMLNode,
+    images: dict[str, ImageInfo],
+    basepath: str = "/",
+    assets: dict[str, str] | None = None,
+):
+    # runs before rewrite_node_urls, while src still names the source asset
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.children:
+            stack.extend(current.children)
+            continue
+        if current.tag != "img" or not current.props:
+            continue
+        src = current.props.get("src", "")
+        if not src.startswith("/"):
+            continue
+        info = images.get(split_url(src[1:])[0])
+        if info is None:
+            continue
+        props = current.props
+        props["width"] = str(info.width)
+        props["height"] = str(info.height)
+        if info.widths:
+            candidates = []
+            for width in info.widths:
+                url = rewrite_root_url("/" + info.variant_path(width), basepath, assets)
+                candidates.append(f"{url} {width}w")
+            url = rewrite_root_url(src, basepath, assets)
+            candidates.append(f"{url} {info.width}w")
+            props["srcset"] = ", ".join(candidates)
+            props["sizes"] = f"(max-width: {info.width}px) 100vw, {info.width}px"
+        props["loading"] = "lazy"
+
+
+def referenced_images(
+    manifest: dict[str, dict], index: SiteIndex | None = None
+) -> set[str]:
+    if index is None:
+        index = SiteIndex.from_manifest(manifest)
+    referenced = set()
+    for _, page in index.items():
+        for url in page.images:
+            if url.startswith("/") and not url.startswith("//"):
+                referenced.add(split_url(url[1:])[0])
+    return referenced
+
+
+def encode_variant(job: tuple[str, str, int]) -> str:
+    source_path, cache_path, width = job
+    with Image.open(source_path) as image:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        tmp_path = f"{cache_path}.tmp"
+        resized.save(tmp_path, format=image.format)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def prune_variant_cache(cache_dir: str, images: dict[str, ImageInfo]) -> list[str]:
+    # cached variants are named "<source digest>-<width>", so any other digest
+    # belongs to an image that has since changed or been deleted
+    digests = {info.digest for info in images.values()}
+    removed = []
+    for name in sorted(os.listdir(cache_dir)):
+        if name.split("-", 1)[0] in digests and not name.endswith(".tmp"):
+            continue
+        path = os.path.join(cache_dir, name)
+        if os.path.isfile(path):
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+
+def build_variants(
+    images: dict[str, ImageInfo],
+    referenced: set[str],
+    source: str,
+    cache_dir: str,
+    destination: str,
+) -> dict[str, tuple[str, int]]:
+    # Variants live in cache_dir keyed by source hash and width, so a variant
+    # is encoded once per image revision and then only copied into place.
+    os.makedirs(cache_dir, exist_ok=True)
+    prune_variant_cache(cache_dir, images)
+    pending = []
+    outputs = []
+    for path in sorted(referenced):
+        info = images.get(path)
+        if info is None:
+            continue
+        extension = posixpath.splitext(path)[1]
+        source_path = os.path.join(source, *path.split("/"))
+        for width in info.widths:
+            name = f"{info.digest}-{width}{extension}"
+            cache_path = os.path.join(cache_dir, name)
+            if not os.path.exists(cache_path):
+                pending.append((source_path, cache_path, width))
+            variant = info.variant_path(width)
+            dest_path = os.path.join(destination, *variant.split("/"))
+            outputs.append((cache_path, dest_path, info.digest, width))
+    # encoding is CPU-bound and independent of --jobs, which sizes page rendering
+    workers = min(len(pending), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(encode_variant, pending))
+    else:
+        for job in pending:
+            encode_variant(job)
+    for cache_path, dest_path, _, _ in outputs:
+        if not os.path.exists(dest_path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy2(cache_path, dest_path)
+    # each variant is fully determined by its source revision and width
+    return {dest_path: (digest, width) for _, dest_path, digest, width in outputs}
+
+
+def record_variants(
+    manifest: dict[str, dict], variants: dict[str, tuple[str, int]]
+) -> list[str]:
+    for dest_path, (digest, width) in variants.items():
+        entry = {"generated": VARIANT_KIND, "hash": digest, "width": width}
+        manifest[dest_path] = entry
+    removed = []
+    for dest_path, entry in sorted(manifest.items()):
+        if entry.get("generated") == VARIANT_KIND and dest_path not in variants:
+            removed.append(dest_path)
+    for dest_path in removed:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        del manifest[dest_path]
+    return removed
@@ -1,7 +1,11 @@
-from htmlnode import HTMLNode
+from typing import Iterator
+
+from htmlnode import HTMLNode, escape_text
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str | None,
@@ -11,8 +15,16 @@ class LeafNode(HTMLNode):
         super().__init__(tag, value, None, props)
 
     def to_html(self):
-        if self.value is None:
+        value = self.value
+        if value is None:
             raise ValueError("All leaf nodes must have a value.")
+        if "&" in value or "<" in value or ">" in value:
+            value = escape_text(value)
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value
+        if self.props is None:
+            return f"<{self.tag}>{value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
+
+    def iter_html(self) -> Iterator[str]:
+        yield self.to_html()
@@ -0,0 +1,290 @@
+import os
+import time
+
+from htmlnode import escape_attribute, escape_text
+from leafnode import LeafNode
+from manifest import hash_inputs
+from metadata import SiteIndex
+from output import DirectoryWriter, Writer
+from parentnode import ParentNode
+from template import Template, rewrite_node_urls
+
+INDEX_PAGE = "index.html"
+SITEMAP = "sitemap.xml"
+FEED = "feed.xml"
+FEED_LIMIT = 20
+# the sitemap protocol caps each file at 50,000 URLs
+SITEMAP_LIMIT = 50000
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+LISTING_KINDS = ("section", "sitemap", "feed")
+
+
+class Listing:
+    __slots__ = ("dest_path", "url", "title", "updated")
+
+    def __init__(self, dest_path: str, url: str, title: str, updated: str):
+        self.dest_path = dest_path
+        self.url = url
+        self.title = title
+        self.updated = updated
+
+    def __repr__(self):
+        return f"Listing({self.url}, {self.title!r}, {self.updated})"
+
+
+def format_timestamp(seconds: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+
+def dest_to_url(dest_path: str, dest_root: str) -> str:
+    prefix = os.path.join(dest_root, "")
+    if dest_path.startswith(prefix):
+        # plain slicing; relpath dominates listing time on large sites
+        relative = dest_path[len(prefix) :]
+    else:
+        relative = os.path.relpath(dest_path, dest_root)
+    relative = relative.replace(os.sep, "/")
+    if relative == INDEX_PAGE:
+        return "/"
+    if relative.endswith(f"/{INDEX_PAGE}"):
+        return "/" + relative[: -len(INDEX_PAGE)]
+    return "/" + relative
+
+
+def page_directory(dest_path: str) -> str:
+    # a directory's index page stands for the directory itself
+    if os.path.basename(dest_path) == INDEX_PAGE:
+        return os.path.dirname(dest_path)
+    return dest_path
+
+
+def section_title(directory: str) -> str:
+    return os.path.basename(directory).replace("-", " ").replace("_", " ").title()
+
+
+def is_generated(entry: dict) -> bool:
+    return "generated" in entry
+
+
+def generated_outputs(
+    manifest: dict[str, dict], kinds: tuple[str, ...] | None = None
+) -> set[str]:
+    return {
+        path
+        for path, entry in manifest.items()
+        if is_generated(entry) and (kinds is None or entry["generated"] in kinds)
+    }
+
+
+def collect_listings(
+    manifest: dict[str, dict], dest_root: str, index: SiteIndex | None = None
+) -> list[Listing]:
+    if index is None:
+        index = SiteIndex.from_manifest(manifest)
+    return [
+        Listing(
+            dest_path,
+            dest_to_url(dest_path, dest_root),
+            index.plain_title(dest_path),
+            manifest[dest_path].get("updated", format_timestamp(0)),
+        )
+        for dest_path, _ in index.items()
+    ]
+
+
+def plan_sections(
+    pages: list[Listing], dest_root: str
+) -> dict[str, tuple[Listing, list[Listing]]]:
+    # every directory between a page and the root gets a listing unless the
+    # content tree already provides its index page
+    dest_root = os.path.normpath(dest_root)
+    directories = [page_directory(page.dest_path) for page in pages]
+    covered = set(directories)
+    children: dict[str, list[Listing]] = {}
+    sections: dict[str, Listing] = {}
+    for page, directory in zip(pages, directories):
+        item = page
+        while directory != dest_root:
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            children.setdefault(parent, []).append(item)
+            if parent in covered or parent in sections:
+                break
+            dest_path = os.path.join(parent, INDEX_PAGE)
+            item = Listing(
+                dest_path, dest_to_url(dest_path, dest_root), section_title(parent), ""
+            )
+            sections[parent] = item
+            directory = parent
+    plan = {}
+    # deepest first, so nested sections are dated before their parents
+    for directory in sorted(sections, key=lambda d: d.count(os.sep), reverse=True):
+        section = sections[directory]
+        items = sorted(children[directory], key=lambda item: item.url)
+        section.updated = max(item.updated for item in items)
+        plan[section.dest_path] = (section, items)
+    return plan
+
+
+def section_to_html_node(title: str, items: list[Listing]) -> ParentNode:
+    entries = [
+        ParentNode("li", [LeafNode("a", item.title or item.url, {"href": item.url})])
+        for item in items
+    ]
+    return ParentNode("div", [LeafNode("h1", title), ParentNode("ul", entries)])
+
+
+def render_section(template: Template, title: str, items: list[Listing]) -> str:
+    node = section_to_html_node(title, items)
+    rewrite_node_urls(node, template.basepath, template.assets)
+    return template.render(Title=escape_text(title), Content=node.to_html())
+
+
+def absolute_url(site_url: str, basepath: str, url: str) -> str:
+    return site_url.rstrip("/") + basepath.rstrip("/") + url
+
+
+def render_sitemap(
+    listings: list[Listing], site_url: str, basepath: str
+) -> dict[str, str]:
+    entries = [
+        f"<url><loc>{escape_text(absolute_url(site_url, basepath, listing.url))}</loc>"
+        f"<lastmod>{listing.updated}</lastmod></url>\n"
+        for listing in sorted(listings, key=lambda listing: listing.url)
+    ]
+    header = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<urlset xmlns="{SITEMAP_NAMESPACE}">\n'
+    )
+    footer = "</urlset>\n"
+    if len(entries) <= SITEMAP_LIMIT:
+        return {SITEMAP: header + "".join(entries) + footer}
+    # larger sites get numbered sitemaps behind a sitemap index
+    files = {}
+    index = []
+    for start in range(0, len(entries), SITEMAP_LIMIT):
+        name = f"sitemap-{start // SITEMAP_LIMIT + 1}.xml"
+        chunk = entries[start : start + SITEMAP_LIMIT]
+        files[name] = header + "".join(chunk) + footer
+        location = escape_text(absolute_url(site_url, basepath, "/" + name))
+        index.append(f"<sitemap><loc>{location}</loc></sitemap>\n")
+    files[SITEMAP] = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<sitemapindex xmlns="{SITEMAP_NAMESPACE}">\n'
+        + "".join(index)
+        + "</sitemapindex>\n"
+    )
+    return files
+
+
+def render_feed(
+    pages: list[Listing], site_url: str, basepath: str, title: str, section: str = "/"
+) -> str:
+    if not section.endswith("/"):
+        # "/blog" means the pages under /blog/, not /blog-archive/ as well
+        section += "/"
+    entries = [page for page in pages if page.url.startswith(section)]
+    entries = [page for page in entries if page.url != section]
+    entries.sort(key=lambda page: (page.updated, page.url), reverse=True)
+    entries = entries[:FEED_LIMIT]
+    home = escape_attribute(absolute_url(site_url, basepath, section))
+    feed_url = escape_attribute(absolute_url(site_url, basepath, "/" + FEED))
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"<title>{escape_text(title)}</title>",
+        f"<author><name>{escape_text(title)}</name></author>",
+        f'<link href="{feed_url}" rel="self"/>',
+        f'<link href="{home}"/>',
+        f"<id>{home}</id>",
+        f"<updated>{entries[0].updated if entries else format_timestamp(0)}</updated>",
+    ]
+    for page in entries:
+        url = escape_attribute(absolute_url(site_url, basepath, page.url))
+        lines.extend(
+            [
+                "<entry>",
+                f"<title>{escape_text(page.title)}</title>",
+                f'<link href="{url}"/>',
+                f"<id>{url}</id>",
+                f"<updated>{page.updated}</updated>",
+                "</entry>",
+            ]
+        )
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def write_generated(
+    manifest: dict[str, dict],
+    dest_path: str,
+    kind: str,
+    digest: str,
+    text: str,
+    writer: Writer,
+):
+    writer.write_text(dest_path, text)
+    manifest[dest_path] = {"generated": kind, "hash": digest}
+    print(f"Generating {kind} {writer.describe(dest_path)}")
+
+
+def is_current(
+    manifest: dict[str, dict], dest_path: str, digest: str, writer: Writer
+) -> bool:
+    entry = manifest.get(dest_path)
+    if entry is None or entry.get("hash") != digest:
+        return False
+    return writer.exists(dest_path)
+
+
+def generate_listings(
+    manifest: dict[str, dict],
+    template: Template,
+    dest_root: str,
+    site_url: str | None = None,
+    sections: bool = False,
+    feed_section: str = "/",
+    writer: Writer | None = None,
+    index: SiteIndex | None = None,
+) -> list[str]:
+    # everything here comes from the manifest, so no source is read twice
+    if writer is None:
+        writer = DirectoryWriter(dest_root)
+    if index is None:
+        index = SiteIndex.from_manifest(manifest)
+    pages = collect_listings(manifest, dest_root, index)
+    listings = list(pages)
+    outputs = set()
+    if sections:
+        for dest_path, (section, items) in plan_sections(pages, dest_root).items():
+            listings.append(section)
+            outputs.add(dest_path)
+            # hash the inputs so unchanged sections are not even rendered
+            digest = hash_inputs(
+                template.digest,
+                section.title,
+                *(f"{item.url}\0{item.title}" for item in items),
+            )
+            if not is_current(manifest, dest_path, digest, writer):
+                text = render_section(template, section.title, items)
+                write_generated(manifest, dest_path, "section", digest, text, writer)
+    if site_url:
+        files = render_sitemap(listings, site_url, template.basepath)
+        title = index.plain_title(os.path.join(dest_root, INDEX_PAGE)) or site_url
+        files[FEED] = render_feed(
+            pages, site_url, template.basepath, title, feed_section
+        )
+        for name, text in files.items():
+            dest_path = os.path.join(dest_root, name)
+            outputs.add(dest_path)
+            digest = hash_inputs(text)
+            if not is_current(manifest, dest_path, digest, writer):
+                kind = "feed" if name == FEED else "sitemap"
+                write_generated(manifest, dest_path, kind, digest, text, writer)
+    for dest_path in sorted(generated_outputs(manifest, LISTING_KINDS) - outputs):
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        del manifest[dest_path]
+        print(f"Removed stale {dest_path}")
+    return sorted(outputs)
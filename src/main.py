@@ -1,19 +1,74 @@
+import argparse
 import os
 import shutil
 import sys
-from pathlib import Path
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, repeat
+from typing import Iterable, Iterator
 
-from extract import extract_title
-from transform import markdown_to_html_node
+from archive import ARCHIVE_EXTENSIONS, archive_tree, open_archive
+from blockcache import BlockCache
+from blockparser import PARSERS, parse_document
+from extract import extract_title, read_markdown_blocks
+from fingerprint import FingerprintError, fingerprint_assets
+from images import (
+    DEFAULT_WIDTHS,
+    ImageInfo,
+    apply_image_attributes,
+    build_variants,
+    imaging_available,
+    record_variants,
+    referenced_images,
+    scan_images,
+)
+from htmlnode import HTMLNode, escape_text
+from listings import format_timestamp, generate_listings, generated_outputs
+from manifest import hash_file, load_manifest, prune_manifest, save_manifest
+from metadata import PageMetadata, SiteIndex
+from output import DirectoryWriter, Writer
+from profiler import BuildProfile, StageTimings, timed_chunks
+from shard import (
+    SHARD_MANIFEST,
+    SHARD_SITE,
+    ShardMergeError,
+    merge_shards,
+    parse_shard,
+    shard_directory,
+    shard_pages,
+)
+from sync import sync_tree
+from template import Template, load_template, rewrite_node_urls
+from transform import (
+    configure_inline_cache,
+    inline_cache_info,
+    inline_cache_maxsize,
+    iter_block_nodes,
+    markdown_to_html_node,
+    stream_blocks_to_html,
+)
+from validate import validate_references
+from watch import Watcher, start_server
 
 DEST = "./docs"
 SRC = "./static"
+CONTENT = "content"
+TEMPLATE = "template.html"
+MANIFEST = "./.build/manifest.json"
+BLOCK_CACHE = "./.build/blocks.sqlite"
+ASSET_MANIFEST = "./.build/assets.json"
+IMAGE_MANIFEST = "./.build/images.json"
+IMAGE_CACHE = "./.build/images"
 
 
-def initialize_public(path=""):
+def initialize_public(path="", clean=True, keep: set[str] | None = None):
     global DEST, SRC
     destination = os.path.join(DEST, path)
     source = os.path.join(SRC, path)
+    if not clean:
+        sync_tree(source, destination, keep)
+        return
     if os.path.exists(destination):
         shutil.rmtree(destination)
     os.mkdir(destination)
@@ -28,43 +83,541 @@ def initialize_public(path=""):
             )
 
 
-def generate_page(from_path: str, template_path: str, dest_path: str, basepath: str):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    md = read_file_to_string(from_path)
-    template = read_file_to_string(template_path)
-    html = markdown_to_html_node(md).to_html()
-    title = extract_title(md)
-    out = (
-        template.replace("{{ Title }}", title)
-        .replace("{{ Content }}", html)
-        .replace('src="/', f'src="{basepath}')
-        .replace('href="/', f'href="{basepath}')
+def initialize_fingerprinted_public(
+    basepath: str, clean=True, keep: set[str] | None = None
+) -> dict[str, str]:
+    if clean and os.path.exists(DEST):
+        shutil.rmtree(DEST)
+    asset_manifest = {} if clean else load_manifest(ASSET_MANIFEST)
+    files = asset_manifest.get("files", {})
+    assets = fingerprint_assets(SRC, DEST, files, basepath, keep)
+    save_manifest(ASSET_MANIFEST, {"assets": assets, "files": files})
+    return assets
+
+
+def scan_public_images(widths: tuple[int, ...]) -> dict[str, ImageInfo]:
+    image_manifest = load_manifest(IMAGE_MANIFEST)
+    images = scan_images(SRC, image_manifest, widths)
+    save_manifest(IMAGE_MANIFEST, image_manifest)
+    return images
+
+
+class PageGenerationError(Exception):
+    pass
+
+
+class RenderContext:
+    # everything a page needs besides its own paths; workers get one per batch
+    __slots__ = ("template", "writer", "block_cache", "profiling", "io_threads")
+
+    def __init__(
+        self,
+        template: Template,
+        writer: Writer,
+        block_cache: BlockCache | None = None,
+        profiling: bool = False,
+        io_threads: int = 0,
+    ):
+        self.template = template
+        self.writer = writer
+        self.block_cache = block_cache
+        self.profiling = profiling
+        self.io_threads = io_threads
+
+
+class InlineExecutor:
+    # stands in for the I/O thread pool without --io-threads, so every build
+    # runs the same loop and just does its reads and writes in place
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        pass
+
+
+def render_page(
+    from_path: str,
+    template: Template,
+    dest_path: str,
+    previous_hash: str | None = None,
+    block_cache: BlockCache | None = None,
+) -> tuple[str, PageMetadata] | None:
+    writer = DirectoryWriter(os.path.dirname(dest_path))
+    context = RenderContext(template, writer, block_cache)
+    _, _, rendered, _ = next(
+        render_pages([(from_path, dest_path, previous_hash)], context)
     )
-    dest = Path(dest_path)
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    dest.write_text(out)
+    return rendered
 
 
-def generate_pages_recursive(
-    dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str
+def hash_page(from_path: str, template: Template) -> tuple[str, float]:
+    # hashed in chunks, so deciding to skip a page never holds it in memory
+    start = time.perf_counter()
+    digest = hash_file(from_path, template.digest)
+    return digest, time.perf_counter() - start
+
+
+def prepare_page(
+    from_path: str,
+    template: Template,
+    block_cache: BlockCache | None = None,
+    timings: StageTimings | None = None,
+) -> tuple[PageMetadata, Iterable[str]]:
+    metadata = PageMetadata()
+    if block_cache is None and template.parser == "simple":
+        title, content = stream_page(from_path, template, metadata, timings)
+        return metadata, template.stream(Title=escape_text(title), Content=content)
+    # the cache looks a page's blocks up in one batch and CommonMark does not
+    # split on blank lines, so both still take the whole source at once
+    start = time.perf_counter()
+    md = read_file_to_string(from_path)
+    if timings is not None:
+        timings.add("read", time.perf_counter() - start, 0)
+    node = build_page_tree(md, template, block_cache, metadata, timings)
+    title = page_title(md, metadata)
+    content = node.iter_html()
+    if timings is not None:
+        content = timed_chunks(content, timings, "render")
+    return metadata, template.stream(Title=escape_text(title), Content=content)
+
+
+def stream_page(
+    from_path: str,
+    template: Template,
+    metadata: PageMetadata,
+    timings: StageTimings | None = None,
+) -> tuple[str, Iterator[str]]:
+    # Blocks are parsed as they are read and rendered as they are written;
+    # only the ones ahead of the title, which the template needs first, wait.
+    nodes = iter_block_nodes(read_markdown_blocks(from_path), metadata, timings)
+    head = []
+    while metadata.title is None:
+        node = next(nodes, None)
+        if node is None:
+            page_title(read_file_to_string(from_path), metadata)
+            break
+        head.append(node)
+    nodes = rewrite_nodes(chain(head, nodes), template, timings)
+    return metadata.title, stream_blocks_to_html(nodes, timings)
+
+
+def rewrite_nodes(
+    nodes: Iterable[HTMLNode],
+    template: Template,
+    timings: StageTimings | None = None,
+) -> Iterator[HTMLNode]:
+    for node in nodes:
+        start = time.perf_counter()
+        rewrite_page_urls(node, template)
+        if timings is not None:
+            timings.add("render", time.perf_counter() - start, 0)
+        yield node
+
+
+def write_output(
+    writer: Writer,
+    dest_path: str,
+    chunks: Iterable[str],
+    timings: StageTimings | None = None,
 ):
+    start = time.perf_counter()
+    spent = 0.0 if timings is None else timings.total()
+    writer.write_page(dest_path, chunks)
+    if timings is not None:
+        # the page parses and renders as it streams; the rest is the write
+        spent = timings.total() - spent
+        timings.add("write", time.perf_counter() - start - spent)
+
+
+def build_page_tree(
+    md: str,
+    template: Template,
+    block_cache: BlockCache | None = None,
+    metadata: PageMetadata | None = None,
+    timings: StageTimings | None = None,
+) -> HTMLNode:
+    start = time.perf_counter()
+    if block_cache is not None:
+        node = block_cache.render(md, metadata)
+        stage = "cache"
+    elif template.parser == "commonmark":
+        node = parse_document(md, metadata)
+        stage = "parse"
+    else:
+        # times its own split, classify and inline stages
+        node = markdown_to_html_node(md, timings, metadata)
+        stage = None
+    if timings is not None and stage is not None:
+        timings.add(stage, time.perf_counter() - start)
+    start = time.perf_counter()
+    rewrite_page_urls(node, template)
+    if timings is not None:
+        timings.add("render", time.perf_counter() - start, 0)
+    return node
+
+
+def rewrite_page_urls(node: HTMLNode, template: Template):
+    if template.images:
+        apply_image_attributes(
+            node, template.images, template.basepath, template.assets
+        )
+    rewrite_node_urls(node, template.basepath, template.assets)
+
+
+def page_title(md: str, metadata: PageMetadata) -> str:
+    if metadata.title is None:
+        # the parser only sees headings that stand alone as a block
+        metadata.title = extract_title(md)
+    return metadata.title
+
+
+def record_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    rendered: tuple[str, PageMetadata] | None,
+    manifest: dict[str, dict] | None = None,
+    writer: Writer | None = None,
+) -> bool:
+    if rendered is None:
+        return False
+    shown = dest_path if writer is None else writer.describe(dest_path)
+    print(f"Generating page from {from_path} to {shown} using {template_path}")
+    if manifest is not None:
+        digest, metadata = rendered
+        manifest[dest_path] = {
+            "source": from_path,
+            "hash": digest,
+            "meta": metadata.to_dict(),
+            "updated": format_timestamp(os.stat(from_path).st_mtime),
+        }
+    return True
+
+
+def generate_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    basepath: str,
+    manifest: dict[str, dict] | None = None,
+) -> bool:
+    rendered = render_page(
+        from_path,
+        load_template(template_path, basepath),
+        dest_path,
+        get_previous_hash(manifest, dest_path),
+    )
+    return record_page(from_path, template_path, dest_path, rendered, manifest)
+
+
+def get_previous_hash(
+    manifest: dict[str, dict] | None, dest_path: str
+) -> str | None:
+    if manifest is None:
+        return None
+    entry = manifest.get(dest_path)
+    if entry is None or "meta" not in entry:
+        # entries from before the metadata index are rebuilt once to fill it in
+        return None
+    return entry.get("hash")
+
+
+def page_dest(page: tuple[str, str]) -> str:
+    return page[1]
+
+
+def collect_pages(dir_path_content: str, dest_dir_path: str) -> list[tuple[str, str]]:
+    pages = []
     with os.scandir(dir_path_content) as entries:
         for entry in entries:
             src = os.path.join(dir_path_content, entry.name)
             if entry.is_file() and entry.name.endswith(".md"):
-                generate_page(
-                    src,
-                    template_path,
-                    os.path.join(dest_dir_path, entry.name.replace(".md", ".html")),
-                    basepath,
+                dest_path = os.path.join(
+                    dest_dir_path, entry.name.replace(".md", ".html")
                 )
+                pages.append((src, dest_path))
             elif entry.is_dir():
-                generate_pages_recursive(
-                    src,
-                    template_path,
-                    os.path.join(dest_dir_path, entry.name),
-                    basepath,
+                pages.extend(
+                    collect_pages(src, os.path.join(dest_dir_path, entry.name))
                 )
+    return pages
+
+
+def page_error(from_path: str, e: Exception) -> PageGenerationError:
+    return PageGenerationError(
+        f"Failed to generate page from {from_path}: {type(e).__name__}: {e}"
+    )
+
+
+def render_pages(
+    pages: list[tuple[str, str, str | None]], context: RenderContext
+) -> Iterator[
+    tuple[str, str, tuple[str, PageMetadata] | None, StageTimings | None]
+]:
+    # With io_threads, hashing of upcoming pages and writes of finished ones
+    # run on I/O threads while this thread starts the next page; both queues
+    # are bounded by it. Results come out in page order either way.
+    template = context.template
+    if context.io_threads > 0:
+        pool = ThreadPoolExecutor(max_workers=context.io_threads)
+    else:
+        pool = InlineExecutor()
+    remaining = iter(pages)
+    reads = deque()
+    writes = deque()
+
+    def queue_read():
+        page = next(remaining, None)
+        if page is not None:
+            reads.append((page, pool.submit(hash_page, page[0], template)))
+
+    def finish_write():
+        src, dest, rendered, timings, future = writes.popleft()
+        try:
+            if future is not None:
+                future.result()
+        except Exception as e:
+            raise page_error(src, e) from e
+        return src, dest, rendered, timings
+
+    try:
+        for _ in range(max(1, context.io_threads)):
+            queue_read()
+        while reads:
+            (src, dest, previous_hash), future = reads.popleft()
+            queue_read()
+            timings = StageTimings() if context.profiling else None
+            try:
+                digest, seconds = future.result()
+                if timings is not None:
+                    timings.add("read", seconds)
+                if digest == previous_hash and context.writer.exists(dest):
+                    writes.append((src, dest, None, timings, None))
+                else:
+                    metadata, chunks = prepare_page(
+                        src, template, context.block_cache, timings
+                    )
+                    write = pool.submit(
+                        write_output, context.writer, dest, chunks, timings
+                    )
+                    writes.append((src, dest, (digest, metadata), timings, write))
+            except Exception as e:
+                raise page_error(src, e) from e
+            while len(writes) > context.io_threads:
+                yield finish_write()
+        while writes:
+            yield finish_write()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def render_batch(
+    pages: list[tuple[str, str, str | None]], context: RenderContext
+) -> list[tuple[str, str, tuple[str, PageMetadata] | None, StageTimings | None]]:
+    # worker processes run the same loop over their share of the pages
+    return list(render_pages(pages, context))
+
+
+def record_pages(
+    results: Iterable[
+        tuple[str, str, tuple[str, PageMetadata] | None, StageTimings | None]
+    ],
+    template_path: str,
+    manifest: dict[str, dict] | None,
+    profile: BuildProfile | None,
+    writer: Writer | None = None,
+):
+    for src, dest, rendered, timings in results:
+        if record_page(src, template_path, dest, rendered, manifest, writer):
+            add_page_timings(profile, dest, timings)
+
+
+def generate_pages_recursive(
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    basepath: str,
+    manifest: dict[str, dict] | None = None,
+    jobs: int = 1,
+    profile: BuildProfile | None = None,
+    block_cache: BlockCache | None = None,
+    io_threads: int = 0,
+    template_options: dict | None = None,
+    shard: tuple[int, int] | None = None,
+    writer: Writer | None = None,
+) -> list[str]:
+    # path order keeps the log, and an archive's entries, the same every build
+    pages = sorted(collect_pages(dir_path_content, dest_dir_path), key=page_dest)
+    if shard is not None:
+        pages = shard_pages(pages, dir_path_content, *shard)
+    template = load_template(template_path, basepath, **(template_options or {}))
+    if writer is None:
+        writer = DirectoryWriter(dest_dir_path)
+    context = RenderContext(
+        template,
+        writer,
+        block_cache,
+        profile is not None,
+        io_threads,
+    )
+    render_jobs = [
+        (src, dest, get_previous_hash(manifest, dest)) for src, dest in pages
+    ]
+    if jobs > 1 and len(render_jobs) > 1:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=configure_inline_cache,
+            initargs=(inline_cache_maxsize(),),
+        ) as executor:
+            size = max(1, len(render_jobs) // (jobs * 4))
+            batches = [
+                render_jobs[i : i + size] for i in range(0, len(render_jobs), size)
+            ]
+            results = chain.from_iterable(
+                executor.map(render_batch, batches, repeat(context))
+            )
+            try:
+                # map yields in submission order, so logs match a serial build
+                record_pages(results, template_path, manifest, profile, writer)
+            except PageGenerationError:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+    else:
+        results = render_pages(render_jobs, context)
+        record_pages(results, template_path, manifest, profile, writer)
+    return [dest for _, dest in pages]
+
+
+def add_page_timings(
+    profile: BuildProfile | None, dest_path: str, timings: StageTimings | None
+):
+    if profile is not None and timings is not None:
+        profile.add_page(dest_path, timings)
+
+
+def is_within(path: str, root: str) -> bool:
+    root = os.path.abspath(root)
+    return os.path.commonpath([os.path.abspath(path), root]) == root
+
+
+def content_to_dest(path: str, content_root: str, dest_root: str) -> str:
+    directory, name = os.path.split(os.path.relpath(path, content_root))
+    return os.path.join(dest_root, directory, name.replace(".md", ".html"))
+
+
+def apply_changes(
+    changes: tuple[list[str], list[str], list[str]],
+    template: Template,
+    manifest: dict[str, dict],
+    content_root: str,
+    static_root: str,
+    dest_root: str,
+) -> Template:
+    added, modified, removed = changes
+    changed = added + modified
+    if template.path in changed:
+        # every page embeds the template, so this is a full (incremental) rebuild
+        template = load_template(
+            template.path, template.basepath, parser=template.parser
+        )
+        visited = generate_pages_recursive(
+            content_root,
+            template.path,
+            dest_root,
+            template.basepath,
+            manifest,
+            template_options={"parser": template.parser},
+        )
+        keep = set(visited) | generated_outputs(manifest)
+        for dest_path in prune_manifest(manifest, keep):
+            print(f"Removed stale page {dest_path}")
+    else:
+        for path in changed:
+            if path.endswith(".md") and is_within(path, content_root):
+                dest_path = content_to_dest(path, content_root, dest_root)
+                rendered = render_page(
+                    path, template, dest_path, get_previous_hash(manifest, dest_path)
+                )
+                record_page(path, template.path, dest_path, rendered, manifest)
+    for path in changed:
+        if is_within(path, static_root):
+            dest_path = os.path.join(dest_root, os.path.relpath(path, static_root))
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy2(path, dest_path)
+            print(f"Copied asset {path} to {dest_path}")
+    for path in removed:
+        if path.endswith(".md") and is_within(path, content_root):
+            dest_path = content_to_dest(path, content_root, dest_root)
+            manifest.pop(dest_path, None)
+            print(f"Removed stale page {dest_path}")
+        elif is_within(path, static_root):
+            dest_path = os.path.join(dest_root, os.path.relpath(path, static_root))
+            print(f"Removed asset {dest_path}")
+        else:
+            continue
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+    return template
+
+
+def report_broken_references(
+    manifest: dict[str, dict], dest_root: str, index: SiteIndex | None = None
+) -> bool:
+    broken = validate_references(manifest, dest_root, SRC, index)
+    for reference in broken:
+        print(f"Warning: {reference}", file=sys.stderr)
+    return len(broken) == 0
+
+
+def watch(
+    basepath: str,
+    manifest: dict[str, dict],
+    port: int,
+    interval: float,
+    listing_options: dict | None = None,
+    parser: str = "simple",
+):
+    dest_root = os.path.normpath(DEST)
+    template = load_template(TEMPLATE, basepath, parser=parser)
+    watcher = Watcher([CONTENT, SRC, TEMPLATE])
+    server = start_server(dest_root, port)
+    print(f"Serving {dest_root} at http://localhost:{port}/, watching for changes")
+    try:
+        while True:
+            time.sleep(interval)
+            changes = watcher.poll()
+            if not any(changes):
+                continue
+            start = time.perf_counter()
+            try:
+                template = apply_changes(
+                    changes, template, manifest, CONTENT, SRC, dest_root
+                )
+                index = SiteIndex.from_manifest(manifest)
+                generate_listings(
+                    manifest,
+                    template,
+                    dest_root,
+                    index=index,
+                    **(listing_options or {}),
+                )
+                report_broken_references(manifest, dest_root, index)
+            except Exception as e:
+                # a broken edit should not take the dev server down with it
+                print(f"Rebuild failed: {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+            save_manifest(MANIFEST, manifest)
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
 
 
 def read_file_to_string(path):
@@ -74,12 +627,341 @@ def read_file_to_string(path):
     return out
 
 
-def main():
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
-    initialize_public()
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="ignore the build manifest and regenerate every page",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="render pages across N worker processes (0 uses every CPU)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print per-stage timings and the slowest pages after the build",
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        help="write the build profile as JSON to PATH (implies --profile)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="serve the output and rebuild pages and assets as they change",
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.2,
+        help="seconds between change polls in --watch mode",
+    )
+    parser.add_argument(
+        "--inline-cache-size",
+        type=int,
+        default=4096,
+        metavar="N",
+        help="number of inline text runs to memoize per process (0 disables)",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSERS,
+        default="simple",
+        help="block parser: the original blank-line splitter, or CommonMark"
+        " block structure (lazy continuation, nested lists, fences with blank lines)",
+    )
+    parser.add_argument(
+        "--block-cache",
+        action="store_true",
+        help="reuse rendered HTML for unchanged blocks across builds",
+    )
+    parser.add_argument(
+        "--block-cache-max-mb",
+        type=float,
+        metavar="MB",
+        help="evict least recently used blocks beyond this cache size",
+    )
+    parser.add_argument(
+        "--block-cache-max-age",
+        type=float,
+        metavar="DAYS",
+        help="evict blocks that have not been used for this many days",
+    )
+    parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="absolute site URL; enables sitemap.xml and feed.xml",
+    )
+    parser.add_argument(
+        "--section-indexes",
+        action="store_true",
+        help="generate listing pages for directories without an index.md",
+    )
+    parser.add_argument(
+        "--feed-section",
+        default="/",
+        metavar="PATH",
+        help="only pages under this URL path go into feed.xml",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="copy assets to content-hashed names and point every reference at them",
+    )
+    parser.add_argument(
+        "--images",
+        action="store_true",
+        help="add resized srcset variants and dimensions to images (needs Pillow)",
+    )
+    parser.add_argument(
+        "--image-widths",
+        type=lambda value: tuple(int(width) for width in value.split(",")),
+        default=DEFAULT_WIDTHS,
+        metavar="W,W,...",
+        help="variant widths in pixels for --images",
+    )
+    parser.add_argument(
+        "--strict-links",
+        action="store_true",
+        help="fail the build when a link or image points at nothing",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=0,
+        metavar="N",
+        help="overlap page reads and writes with parsing on N threads"
+        " (in every worker process with --jobs)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="build only shard I of N into its own directory under .build/shards",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=int,
+        metavar="N",
+        help="combine the output of shards 1..N into the site",
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="PATH",
+        help="write the site straight into a .tar, .tar.gz or .zip at PATH"
+        " instead of docs/ (always a full build)",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be zero or a positive integer")
+    if args.io_threads < 0:
+        parser.error("--io-threads must be zero or a positive integer")
+    if args.fingerprint and args.watch:
+        parser.error("--fingerprint cannot be combined with --watch")
+    if args.images and args.watch:
+        parser.error("--images cannot be combined with --watch")
+    if args.images and not imaging_available():
+        parser.error("--images needs Pillow: pip install Pillow")
+    if any(width <= 0 for width in args.image_widths):
+        parser.error("--image-widths must be positive integers")
+    if args.block_cache and args.parser != "simple":
+        # cached blocks are split on blank lines, which CommonMark does not do
+        parser.error("--block-cache only works with --parser simple")
+    if args.inline_cache_size < 0:
+        parser.error("--inline-cache-size must be zero or a positive integer")
+    if args.shard is not None:
+        if len(args.shard) != 2 or not 1 <= args.shard[0] <= args.shard[1]:
+            parser.error("--shard must be I/N with 1 <= I <= N")
+    if args.merge_shards is not None and args.merge_shards < 1:
+        parser.error("--merge-shards must be a positive integer")
+    if args.shard is not None or args.merge_shards is not None:
+        if args.shard is not None and args.merge_shards is not None:
+            parser.error("--shard cannot be combined with --merge-shards")
+        # shards render pages without the static tree, so every pass has to
+        # agree on asset names and image sizes without sharing them
+        for option in ("watch", "fingerprint", "images"):
+            if getattr(args, option):
+                parser.error(f"--{option} cannot be combined with sharded builds")
+    if args.archive is not None:
+        if not args.archive.endswith(ARCHIVE_EXTENSIONS):
+            extensions = ", ".join(ARCHIVE_EXTENSIONS)
+            parser.error(f"--archive must end in one of {extensions}")
+        # pages go in one at a time; assets and variants would need a tree
+        for option in ("watch", "fingerprint", "images", "shard", "merge_shards"):
+            if getattr(args, option):
+                flag = option.replace("_", "-")
+                parser.error(f"--{flag} cannot be combined with --archive")
+        if args.jobs > 1:
+            parser.error("--archive renders one page at a time without --jobs")
+        if args.io_threads > 0:
+            parser.error("--io-threads cannot be combined with --archive")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+
+def finish_build(
+    args: argparse.Namespace,
+    profile: BuildProfile | None,
+    block_cache: BlockCache | None,
+):
+    if block_cache is not None:
+        max_bytes = None
+        if args.block_cache_max_mb is not None:
+            max_bytes = int(args.block_cache_max_mb * 1024 * 1024)
+        max_age = None
+        if args.block_cache_max_age is not None:
+            max_age = args.block_cache_max_age * 24 * 60 * 60
+        block_cache.evict(max_bytes, max_age)
+    if profile is not None:
+        print(profile.report())
+        cache = inline_cache_info()
+        if cache.hits or cache.misses:
+            print(
+                f"Inline cache: {cache.hits} hits, {cache.misses} misses,"
+                f" {cache.currsize}/{cache.maxsize} entries"
+            )
+        if block_cache is not None and (block_cache.hits or block_cache.misses):
+            print(
+                f"Block cache: {block_cache.hits} hits, {block_cache.misses} misses"
+            )
+        if args.profile_json:
+            profile.write_json(args.profile_json)
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    profile = BuildProfile() if args.profile or args.profile_json else None
+    configure_inline_cache(args.inline_cache_size)
+    manifest_path = MANIFEST
+    dest_root = os.path.normpath(DEST)
+    if args.shard is not None:
+        directory = shard_directory(*args.shard)
+        manifest_path = os.path.join(directory, SHARD_MANIFEST)
+        dest_root = os.path.normpath(os.path.join(directory, SHARD_SITE))
+    # an archive is always built from scratch and leaves the manifest alone
+    full_build = args.force or args.archive is not None
+    manifest = {} if full_build else load_manifest(manifest_path)
+    start = time.perf_counter()
+    assets = None
+    archive = None
+    writer = DirectoryWriter(dest_root)
+    # generated pages live alongside the assets, so spare them from orphan removal
+    if args.archive is not None:
+        archive = writer = open_archive(args.archive, dest_root)
+        archive_tree(archive, SRC)
+    elif args.shard is not None:
+        # static files, listings and checks need the whole site: the merge does them
+        if args.force and os.path.exists(dest_root):
+            shutil.rmtree(dest_root)
+    elif args.fingerprint:
+        try:
+            assets = initialize_fingerprinted_public(
+                args.basepath, clean=args.force, keep=set(manifest)
+            )
+        except FingerprintError as e:
+            print(f"Build failed: {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        initialize_public(clean=args.force, keep=set(manifest))
+    images = scan_public_images(args.image_widths) if args.images else None
+    block_cache = None
+    if args.block_cache:
+        block_cache = BlockCache(BLOCK_CACHE, args.basepath, assets, images)
+    if profile is not None:
+        profile.totals.add("static", time.perf_counter() - start)
+    try:
+        if args.merge_shards is not None:
+            template = load_template(TEMPLATE, args.basepath, parser=args.parser)
+            visited = merge_shards(
+                args.merge_shards,
+                collect_pages(CONTENT, dest_root),
+                dest_root,
+                manifest,
+                template.digest,
+            )
+        else:
+            visited = generate_pages_recursive(
+                CONTENT,
+                TEMPLATE,
+                dest_root,
+                args.basepath,
+                manifest,
+                args.jobs,
+                profile,
+                block_cache,
+                args.io_threads,
+                {"assets": assets, "images": images, "parser": args.parser},
+                args.shard,
+                writer,
+            )
+    except PageGenerationError as e:
+        if archive is not None:
+            archive.discard()
+        else:
+            # keep the pages that did succeed so the retry stays incremental
+            save_manifest(manifest_path, manifest)
+        print(f"Build failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    except ShardMergeError as e:
+        print(f"Merge failed:\n{e}", file=sys.stderr)
+        sys.exit(1)
+    # generated listings are pruned by generate_listings once pages settle
+    keep = set(visited) | generated_outputs(manifest)
+    for dest_path in prune_manifest(manifest, keep):
+        print(f"Removed stale page {dest_path}")
+    if args.shard is not None:
+        save_manifest(manifest_path, manifest)
+        finish_build(args, profile, block_cache)
+        return
+    listing_options = {
+        "site_url": args.site_url,
+        "sections": args.section_indexes,
+        "feed_section": args.feed_section,
+    }
+    template = load_template(TEMPLATE, args.basepath, assets, images, args.parser)
+    # one index of the settled pages serves the listings, images and links
+    index = SiteIndex.from_manifest(manifest)
+    generate_listings(
+        manifest, template, dest_root, writer=writer, index=index, **listing_options
+    )
+    variants = {}
+    if images is not None:
+        variants = build_variants(
+            images,
+            referenced_images(manifest, index),
+            SRC,
+            IMAGE_CACHE,
+            dest_root,
+        )
+    record_variants(manifest, variants)
+    if archive is not None:
+        archive.close()
+        print(f"Wrote {args.archive}")
+    else:
+        save_manifest(manifest_path, manifest)
+    valid = report_broken_references(manifest, dest_root, index)
+    if args.strict_links and not valid:
+        sys.exit(1)
+    finish_build(args, profile, block_cache)
+    if args.watch:
+        watch(
+            args.basepath,
+            manifest,
+            args.port,
+            args.interval,
+            listing_options,
+            args.parser,
+        )
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+
+
+def hash_inputs(*inputs: str) -> str:
+    digest = hashlib.sha256()
+    update_inputs(digest, inputs)
+    return digest.hexdigest()
+
+
+def update_inputs(digest, inputs: tuple[str, ...]):
+    for value in inputs:
+        encoded = value.encode()
+        # length prefix keeps ("ab", "c") and ("a", "bc") from colliding
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+
+
+def hash_file(path: str, *inputs: str, chunk_size: int = 1 << 16) -> str:
+    # hash_inputs(<file text>, *inputs) for a UTF-8 file with \n newlines,
+    # read in chunks so the file is never held in memory
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        digest.update(os.fstat(file.fileno()).st_size.to_bytes(8, "big"))
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    update_inputs(digest, inputs)
+    return digest.hexdigest()
+
+
+def load_manifest(path: str) -> dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        # a corrupt manifest only costs a full rebuild
+        return {}
+    if not isinstance(manifest, dict):
+        return {}
+    return manifest
+
+
+def save_manifest(path: str, manifest: dict[str, dict]):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def prune_manifest(
+    manifest: dict[str, dict], visited: set[str]
+) -> list[str]:
+    removed = []
+    for dest_path in sorted(set(manifest) - visited):
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        del manifest[dest_path]
+        removed.append(dest_path)
+    return removed
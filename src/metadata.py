@@ -0,0 +1,169 @@
+import re
+from typing import Iterable
+
+from textnode import TextNode, TextType
+
+SLUG_STRIP_REGEX = re.compile(r"[^\w\s-]")
+SLUG_SEPARATOR_REGEX = re.compile(r"[\s-]+")
+# stray punctuation left around removed images is not a word
+WORD_CHAR_REGEX = re.compile(r"\w")
+
+
+def slugify(text: str) -> str:
+    slug = SLUG_STRIP_REGEX.sub("", text.lower())
+    return SLUG_SEPARATOR_REGEX.sub("-", slug).strip("-")
+
+
+class Heading:
+    __slots__ = ("level", "text", "slug")
+
+    def __init__(self, level: int, text: str, slug: str):
+        self.level = level
+        self.text = text
+        self.slug = slug
+
+    def __eq__(self, other):
+        if not isinstance(other, Heading):
+            return False
+        return (
+            self.level == other.level
+            and self.text == other.text
+            and self.slug == other.slug
+        )
+
+    def __repr__(self):
+        return f"Heading({self.level}, {self.text!r}, {self.slug!r})"
+
+    def to_dict(self) -> dict:
+        return {"level": self.level, "text": self.text, "slug": self.slug}
+
+
+class PageMetadata:
+    __slots__ = ("title", "headings", "word_count", "links", "images", "slugs")
+
+    def __init__(self):
+        self.title: str | None = None
+        self.headings: list[Heading] = []
+        self.word_count = 0
+        self.links: list[str] = []
+        self.images: list[str] = []
+        self.slugs: set[str] = set()
+
+    def __eq__(self, other):
+        if not isinstance(other, PageMetadata):
+            return False
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return (
+            f"PageMetadata({self.title!r}, {len(self.headings)} headings, "
+            f"{self.word_count} words, {len(self.links)} links)"
+        )
+
+    def add_heading(self, level: int, text: str):
+        # repeated headings get -1, -2, ... so every anchor stays unique
+        slug = base = slugify(text) or "section"
+        suffix = 1
+        while slug in self.slugs:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+        self.slugs.add(slug)
+        self.headings.append(Heading(level, text, slug))
+
+    def add_title(self, level: int, source: str):
+        if level == 1 and self.title is None:
+            self.title = source.strip()
+
+    def add_text(self, text: str):
+        self.word_count += sum(
+            1 for word in text.split() if WORD_CHAR_REGEX.search(word)
+        )
+
+    def add_tokens(self, tokens: Iterable[TextNode]):
+        visible = []
+        for token in tokens:
+            if token.text_type == TextType.IMAGE:
+                self.images.append(token.url or "")
+                continue
+            if token.text_type == TextType.LINK:
+                self.links.append(token.url or "")
+            visible.append(token.text)
+        self.add_text("".join(visible))
+
+    def merge(self, other: "PageMetadata"):
+        if self.title is None:
+            self.title = other.title
+        for heading in other.headings:
+            self.add_heading(heading.level, heading.text)
+        self.word_count += other.word_count
+        self.links.extend(other.links)
+        self.images.extend(other.images)
+
+    def to_dict(self) -> dict:
+        return {
+            "title": self.title,
+            "headings": [heading.to_dict() for heading in self.headings],
+            "word_count": self.word_count,
+            "links": self.links,
+            "images": self.images,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PageMetadata":
+        metadata = cls()
+        metadata.title = data.get("title")
+        # the slugs were made unique when the page was parsed
+        metadata.headings = [
+            Heading(heading["level"], heading["text"], heading["slug"])
+            for heading in data.get("headings", [])
+        ]
+        metadata.slugs = {heading.slug for heading in metadata.headings}
+        metadata.word_count = data.get("word_count", 0)
+        metadata.links = list(data.get("links", []))
+        metadata.images = list(data.get("images", []))
+        return metadata
+
+
+def heading_text(tokens: Iterable[TextNode]) -> str:
+    return "".join(token.text for token in tokens)
+
+
+class SiteIndex:
+    def __init__(self, pages: dict[str, PageMetadata] | None = None):
+        self.pages = pages if pages is not None else {}
+
+    def __len__(self):
+        return len(self.pages)
+
+    def get(self, dest_path: str) -> PageMetadata | None:
+        return self.pages.get(dest_path)
+
+    def items(self) -> list[tuple[str, PageMetadata]]:
+        return sorted(self.pages.items())
+
+    def titles(self) -> dict[str, str | None]:
+        return {path: page.title for path, page in self.items()}
+
+    def plain_title(self, dest_path: str) -> str:
+        # a page's title keeps the heading's Markdown for its own <title>;
+        # listings use the same heading as text, without ** or link syntax
+        page = self.pages.get(dest_path)
+        if page is None:
+            return ""
+        for heading in page.headings:
+            if heading.level == 1:
+                return heading.text
+        return page.title or ""
+
+    def to_dict(self) -> dict[str, dict]:
+        return {path: page.to_dict() for path, page in self.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, dict]) -> "SiteIndex":
+        return cls({path: PageMetadata.from_dict(page) for path, page in data.items()})
+
+    @classmethod
+    def from_manifest(cls, manifest: dict[str, dict]) -> "SiteIndex":
+        return cls.from_dict(
+            {path: entry["meta"] for path, entry in manifest.items() if "meta" in entry}
+        )
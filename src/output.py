@@ -0,0 +1,43 @@
+import os
+from typing import Iterable
+
+from archive import Archive
+
+
+class DirectoryWriter:
+    def __init__(self, root: str):
+        self.root = root
+        # each output directory is created once per process, not once per page
+        self.directories: set[str] = set()
+
+    def exists(self, dest_path: str) -> bool:
+        return os.path.exists(dest_path)
+
+    def describe(self, dest_path: str) -> str:
+        return dest_path
+
+    def make_parent(self, dest_path: str):
+        directory = os.path.dirname(dest_path) or "."
+        if directory not in self.directories:
+            os.makedirs(directory, exist_ok=True)
+            self.directories.add(directory)
+
+    def write_page(self, dest_path: str, chunks: Iterable[str]):
+        # A page that fails halfway must not be left in place looking current,
+        # so it is streamed into a sibling file and only renamed once complete.
+        self.make_parent(dest_path)
+        tmp_path = f"{dest_path}.tmp"
+        try:
+            with open(tmp_path, "w") as file:
+                file.writelines(chunks)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, dest_path)
+
+    def write_text(self, dest_path: str, text: str):
+        self.write_page(dest_path, (text,))
+
+
+Writer = DirectoryWriter | Archive
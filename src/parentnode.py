@@ -1,17 +1,25 @@
-from functools import reduce
+from typing import Iterator
 
 from htmlnode import HTMLNode
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self, tag: str, children: list[HTMLNode], props: dict[str, str] | None = None
     ):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
         if self.tag is None:
             raise ValueError("All parent nodes must have a tag.")
         if self.children is None:
             raise ValueError("All parent nodes must have children.")
-        return f"<{self.tag}{self.props_to_html()}>{reduce(lambda x, y: x + y.to_html(), self.children, '')}</{self.tag}>"
+        yield f"<{self.tag}{self.props_to_html()}>"
+        for child in self.children:
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
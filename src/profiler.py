@@ -0,0 +1,114 @@
+import json
+import time
+from typing import Iterable, Iterator
+
+STAGES = (
+    "static",
+    "read",
+    "cache",
+    "parse",
+    "split",
+    "classify",
+    "inline",
+    "render",
+    "write",
+)
+
+
+class StageTimings:
+    __slots__ = ("seconds", "counts")
+
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float, count: int = 1):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self.counts[stage] = self.counts.get(stage, 0) + count
+
+    def merge(self, other: "StageTimings"):
+        for stage, seconds in other.seconds.items():
+            self.add(stage, seconds, other.counts[stage])
+
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+    def to_dict(self) -> dict[str, dict[str, float]]:
+        return {
+            stage: {"seconds": self.seconds[stage], "count": self.counts[stage]}
+            for stage in sorted(self.seconds, key=stage_order)
+        }
+
+
+def timed_chunks(
+    chunks: Iterable[str], timings: StageTimings, stage: str, count: int = 1
+) -> Iterator[str]:
+    # charges the time spent producing each chunk to stage, so a streamed
+    # write can be split into rendering and the file I/O around it
+    clock = time.perf_counter
+    iterator = iter(chunks)
+    elapsed = 0.0
+    while True:
+        start = clock()
+        chunk = next(iterator, None)
+        elapsed += clock() - start
+        if chunk is None:
+            break
+        yield chunk
+    timings.add(stage, elapsed, count)
+
+
+def stage_order(stage: str) -> int:
+    if stage in STAGES:
+        return STAGES.index(stage)
+    return len(STAGES)
+
+
+class BuildProfile:
+    def __init__(self):
+        self.totals = StageTimings()
+        self.pages: dict[str, StageTimings] = {}
+
+    def add_page(self, page: str, timings: StageTimings):
+        self.pages[page] = timings
+        self.totals.merge(timings)
+
+    def slowest_pages(self, top: int) -> list[tuple[str, StageTimings]]:
+        ranked = sorted(self.pages.items(), key=lambda x: x[1].total(), reverse=True)
+        return ranked[:top]
+
+    def to_dict(self, top: int | None = None) -> dict:
+        pages = self.slowest_pages(len(self.pages) if top is None else top)
+        return {
+            "total_seconds": self.totals.total(),
+            "page_count": len(self.pages),
+            "stages": self.totals.to_dict(),
+            "pages": [
+                {"page": page, "seconds": timings.total(), "stages": timings.to_dict()}
+                for page, timings in pages
+            ],
+        }
+
+    def write_json(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def report(self, top: int = 10) -> str:
+        total = self.totals.total() or 1.0
+        lines = [f"Build profile: {len(self.pages)} pages generated", "Hottest stages:"]
+        for stage in sorted(
+            self.totals.seconds, key=lambda x: self.totals.seconds[x], reverse=True
+        ):
+            seconds = self.totals.seconds[stage]
+            lines.append(
+                f"  {stage:<10} {seconds * 1000:10.2f} ms {seconds / total:6.1%}"
+                f" {self.totals.counts[stage]:>8} calls"
+            )
+        if self.pages:
+            lines.append("Slowest pages:")
+        for page, timings in self.slowest_pages(top):
+            hottest = max(timings.seconds, key=lambda x: timings.seconds[x])
+            lines.append(
+                f"  {timings.total() * 1000:10.2f} ms {page} (mostly {hottest})"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,18 @@
+from typing import Iterator
+
+from htmlnode import HTMLNode
+
+
+class RawNode(HTMLNode):
+    __slots__ = ()
+
+    def __init__(self, html: str):
+        super().__init__(None, html, None, None)
+
+    def to_html(self):
+        if self.value is None:
+            raise ValueError("All raw nodes must have a value.")
+        return self.value
+
+    def iter_html(self) -> Iterator[str]:
+        yield self.to_html()
@@ -0,0 +1,109 @@
+import os
+import shutil
+
+from manifest import hash_file, hash_inputs, load_manifest
+
+SHARD_ROOT = "./.build/shards"
+SHARD_SITE = "site"
+SHARD_MANIFEST = "manifest.json"
+
+
+class ShardMergeError(Exception):
+    pass
+
+
+def parse_shard(value: str) -> tuple[int, ...]:
+    return tuple(int(part) for part in value.split("/"))
+
+
+def shard_of(path: str, count: int) -> int:
+    # hashed on the path alone, so a page keeps its shard as the site grows
+    # and each shard's manifest stays useful for incremental builds
+    return int(hash_inputs(path)[:16], 16) % count + 1
+
+
+def shard_pages(
+    pages: list[tuple[str, str]], content_root: str, index: int, count: int
+) -> list[tuple[str, str]]:
+    selected = []
+    for src, dest in pages:
+        path = os.path.relpath(src, content_root).replace(os.sep, "/")
+        if shard_of(path, count) == index:
+            selected.append((src, dest))
+    return selected
+
+
+def shard_directory(index: int, count: int, root: str = SHARD_ROOT) -> str:
+    return os.path.join(root, f"{index}-of-{count}")
+
+
+def load_shards(
+    count: int, dest_root: str, root: str = SHARD_ROOT
+) -> tuple[dict[str, list[tuple[int, str, dict]]], list[str]]:
+    # maps each final dest path to every (shard, built file, entry) claiming it
+    claims: dict[str, list[tuple[int, str, dict]]] = {}
+    problems = []
+    for index in range(1, count + 1):
+        directory = shard_directory(index, count, root)
+        manifest_path = os.path.join(directory, SHARD_MANIFEST)
+        if not os.path.exists(manifest_path):
+            problems.append(f"shard {index}/{count} has no manifest at {manifest_path}")
+            continue
+        site = os.path.join(directory, SHARD_SITE)
+        for shard_path, entry in load_manifest(manifest_path).items():
+            dest_path = os.path.join(dest_root, os.path.relpath(shard_path, site))
+            claims.setdefault(dest_path, []).append((index, shard_path, entry))
+    return claims, problems
+
+
+def check_claims(
+    claims: dict[str, list[tuple[int, str, dict]]],
+    pages: list[tuple[str, str]],
+    template_digest: str,
+) -> list[str]:
+    sources = {dest: src for src, dest in pages}
+    problems = []
+    for dest_path, claimed in sorted(claims.items()):
+        if len(claimed) > 1:
+            shards = ", ".join(str(index) for index, _, _ in claimed)
+            problems.append(f"{dest_path} was built by more than one shard ({shards})")
+            continue
+        index, shard_path, entry = claimed[0]
+        src = sources.get(dest_path)
+        if src is None or entry.get("source") != src:
+            problems.append(f"{dest_path} from shard {index} is not a page in content")
+        elif not os.path.exists(shard_path):
+            problems.append(f"{dest_path} is missing from shard {index}'s output")
+        else:
+            digest = hash_file(src, template_digest)
+            # the shard saw different content, template or options
+            if entry.get("hash") != digest:
+                problems.append(f"{dest_path} from shard {index} is out of date")
+    for dest_path in sorted(set(sources) - set(claims)):
+        problems.append(f"{dest_path} was not built by any shard")
+    return problems
+
+
+def merge_shards(
+    count: int,
+    pages: list[tuple[str, str]],
+    dest_root: str,
+    manifest: dict[str, dict],
+    template_digest: str,
+    root: str = SHARD_ROOT,
+) -> list[str]:
+    # Every shard is checked against the content tree before anything is
+    # copied, so a failed merge leaves the previous pages in place.
+    claims, problems = load_shards(count, dest_root, root)
+    problems.extend(check_claims(claims, pages, template_digest))
+    if problems:
+        raise ShardMergeError("\n".join(problems))
+    for dest_path, ((_, shard_path, entry),) in sorted(claims.items()):
+        previous = manifest.get(dest_path)
+        current = previous is not None and previous.get("hash") == entry["hash"]
+        if not current or not os.path.exists(dest_path):
+            print(f"Merging page {shard_path} into {dest_path}")
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copyfile(shard_path, dest_path)
+        manifest[dest_path] = entry
+    return sorted(claims)
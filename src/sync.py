@@ -0,0 +1,72 @@
+import hashlib
+import os
+import shutil
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def needs_copy(source: str, destination: str) -> bool:
+    try:
+        dest_stat = os.stat(destination)
+    except FileNotFoundError:
+        return True
+    source_stat = os.stat(source)
+    if source_stat.st_size != dest_stat.st_size:
+        return True
+    if source_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return False
+    # same size but a different mtime could be a touch or a real edit
+    if file_hash(source) != file_hash(destination):
+        return True
+    # a touch: take the source's mtime so the next sync skips the hashing
+    shutil.copystat(source, destination)
+    return False
+
+
+def sync_tree(
+    source: str, destination: str, keep: set[str] | None = None
+) -> tuple[list[str], list[str]]:
+    kept = {os.path.abspath(path) for path in keep or ()}
+    expected = set()
+    copied = []
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        dest_root = os.path.join(destination, os.path.relpath(root, source))
+        dest_root = os.path.normpath(dest_root)
+        if os.path.isfile(dest_root):
+            os.remove(dest_root)
+        os.makedirs(dest_root, exist_ok=True)
+        expected.add(os.path.abspath(dest_root))
+        for name in sorted(files):
+            src_path = os.path.join(root, name)
+            dest_path = os.path.join(dest_root, name)
+            expected.add(os.path.abspath(dest_path))
+            if os.path.isdir(dest_path):
+                shutil.rmtree(dest_path)
+            if needs_copy(src_path, dest_path):
+                # copy2 carries the mtime over so the next sync can skip hashing
+                shutil.copy2(src_path, dest_path)
+                copied.append(dest_path)
+    removed = remove_orphans(destination, expected, kept)
+    return copied, removed
+
+
+def remove_orphans(destination: str, expected: set[str], kept: set[str]) -> list[str]:
+    # both sets hold absolute paths; emptied directories go too
+    removed = []
+    for root, dirs, files in os.walk(destination, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            absolute = os.path.abspath(path)
+            if absolute not in expected and absolute not in kept:
+                os.remove(path)
+                removed.append(path)
+        if os.path.abspath(root) not in expected and not os.listdir(root):
+            os.rmdir(root)
+    return removed
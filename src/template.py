@@ -0,0 +1,144 @@
+import re
+from typing import Iterable, Iterator
+
+from htmlnode import HTMLNode
+from manifest import hash_inputs
+from version import RENDER_VERSION
+
+TEMPLATE_SLOT_REGEX = re.compile(r"\{\{ (Title|Content) \}\}")
+# whitespace before the name, so data-src and data-href are left alone
+ROOT_URL_ATTRIBUTE_REGEX = re.compile(r'(?<=\s)(src|href)="/([^"]*)"')
+URL_PROPS = ("src", "href")
+DEFAULT_PARSER = "simple"
+
+
+def split_url(url: str) -> tuple[str, str]:
+    # separates the path from any query string or fragment
+    for index, char in enumerate(url):
+        if char == "?" or char == "#":
+            return url[:index], url[index:]
+    return url, ""
+
+
+def rewrite_root_url(url: str, basepath: str, assets: dict[str, str] | None) -> str:
+    # url starts with "/"; fingerprinted assets swap in their hashed name
+    if assets:
+        path, suffix = split_url(url[1:])
+        return basepath + assets.get(path, path) + suffix
+    return basepath + url[1:]
+
+
+def rewrite_root_urls(
+    text: str, basepath: str, assets: dict[str, str] | None = None
+) -> str:
+    if basepath == "/" and not assets:
+        return text
+
+    def replace(match: re.Match) -> str:
+        url = rewrite_root_url("/" + match.group(2), basepath, assets)
+        return f'{match.group(1)}="{url}"'
+
+    return ROOT_URL_ATTRIBUTE_REGEX.sub(replace, text)
+
+
+def rewrite_node_urls(
+    node: HTMLNode, basepath: str, assets: dict[str, str] | None = None
+):
+    if basepath == "/" and not assets:
+        return
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.props:
+            for prop in URL_PROPS:
+                value = current.props.get(prop)
+                if value is not None and value.startswith("/"):
+                    current.props[prop] = rewrite_root_url(value, basepath, assets)
+        if current.children:
+            stack.extend(current.children)
+
+
+def assets_digest(assets: dict[str, str] | None) -> str:
+    if not assets:
+        return ""
+    return hash_inputs(*(f"{path}\0{name}" for path, name in sorted(assets.items())))
+
+
+def images_digest(images: dict | None) -> str:
+    # values are images.ImageInfo; key() covers everything rendered from them
+    if not images:
+        return ""
+    return hash_inputs(*(images[path].key() for path in sorted(images)))
+
+
+def context_digest(assets: dict[str, str] | None, images: dict | None) -> str:
+    if not assets and not images:
+        return ""
+    return hash_inputs(assets_digest(assets), images_digest(images))
+
+
+class Template:
+    def __init__(
+        self,
+        source: str,
+        basepath: str = "/",
+        path: str | None = None,
+        assets: dict[str, str] | None = None,
+        images: dict | None = None,
+        parser: str = DEFAULT_PARSER,
+    ):
+        self.source = source
+        self.basepath = basepath
+        self.path = path
+        self.assets = assets
+        self.images = images
+        self.parser = parser
+        self.context = context_digest(assets, images)
+        # a new generator renders old pages differently, so they rebuild once
+        inputs = [RENDER_VERSION, source, basepath]
+        if self.context:
+            # any renamed asset or resized image may be referenced from any page
+            inputs.append(self.context)
+        if parser != DEFAULT_PARSER:
+            # a different parser may render the same markdown differently
+            inputs.append(parser)
+        self.digest = hash_inputs(*inputs)
+        # re.split with a capture group alternates static text and slot names
+        pieces = TEMPLATE_SLOT_REGEX.split(source)
+        self.parts = [
+            rewrite_root_urls(piece, basepath, assets) if index % 2 == 0 else ""
+            for index, piece in enumerate(pieces)
+        ]
+        self.slots = [(index, pieces[index]) for index in range(1, len(pieces), 2)]
+
+    def render(self, **values: str) -> str:
+        parts = self.parts.copy()
+        for index, name in self.slots:
+            parts[index] = values[name]
+        return "".join(parts)
+
+    def stream(self, **values: str | Iterable[str]) -> Iterator[str]:
+        slots = dict(self.slots)
+        for index, part in enumerate(self.parts):
+            if index not in slots:
+                yield part
+                continue
+            value = values[slots[index]]
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def __repr__(self) -> str:
+        return f"Template({self.path}, {self.basepath}, {[n for _, n in self.slots]})"
+
+
+def load_template(
+    path: str,
+    basepath: str = "/",
+    assets: dict[str, str] | None = None,
+    images: dict | None = None,
+    parser: str = DEFAULT_PARSER,
+) -> Template:
+    with open(path, "r") as file:
+        return Template(file.read(), basepath, path, assets, images, parser)
@@ -0,0 +1,138 @@
+import contextlib
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from archive import ARCHIVE_DATE, ARCHIVE_MTIME, archive_tree, open_archive
+from main import generate_pages_recursive
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "b.png"), "png")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.content, "about.md"), "# About\n\nx < y")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def build(self, path, manifest=None):
+        archive = open_archive(path, self.dest)
+        archive_tree(archive, self.static)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                {} if manifest is None else manifest,
+                writer=archive,
+            )
+        archive.close()
+        return out.getvalue()
+
+    def test_tar_entries(self):
+        path = os.path.join(self.tmp.name, "site.tar")
+        self.build(path)
+        with tarfile.open(path) as tar:
+            members = tar.getmembers()
+            self.assertEqual(
+                [member.name for member in members],
+                [
+                    "index.css",
+                    "images/a.png",
+                    "images/b.png",
+                    "about.html",
+                    "blog/index.html",
+                    "index.html",
+                ],
+            )
+            self.assertTrue(all(member.mtime == ARCHIVE_MTIME for member in members))
+            page = tar.extractfile("about.html").read().decode()
+        self.assertEqual(
+            page, "<title>About</title><div><h1>About</h1><p>x &lt; y</p></div>"
+        )
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertFalse(os.path.exists(f"{path}.tmp"))
+
+    def test_zip_entries(self):
+        path = os.path.join(self.tmp.name, "site.zip")
+        self.build(path)
+        with zipfile.ZipFile(path) as archive:
+            infos = archive.infolist()
+            self.assertEqual(infos[0].filename, "index.css")
+            self.assertTrue(all(info.date_time == ARCHIVE_DATE for info in infos))
+            self.assertEqual(archive.read("images/a.png"), b"png")
+            self.assertEqual(
+                archive.read("index.html").decode(),
+                "<title>Home</title><div><h1>Home</h1></div>",
+            )
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_archives_are_reproducible(self):
+        for name in ("site.tar", "site.tar.gz", "site.zip"):
+            first = os.path.join(self.tmp.name, name)
+            second = os.path.join(self.tmp.name, f"again-{name}")
+            self.build(first)
+            # a later mtime must not leak into the archive
+            os.utime(os.path.join(self.static, "index.css"), (0, 1_000_000_000))
+            self.build(second)
+            with open(first, "rb") as a, open(second, "rb") as b:
+                self.assertEqual(a.read(), b.read(), name)
+
+    def test_matches_directory_build(self):
+        path = os.path.join(self.tmp.name, "site.tar")
+        archived = {}
+        self.build(path, archived)
+        built = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.dest, "/", built
+            )
+        self.assertEqual(archived, built)
+        with tarfile.open(path) as tar:
+            for dest_path in built:
+                name = os.path.relpath(dest_path, self.dest).replace(os.sep, "/")
+                text = tar.extractfile(name).read().decode()
+                self.assertEqual(text, self.read(dest_path))
+
+    def test_log_names_archive_entries(self):
+        path = os.path.join(self.tmp.name, "site.zip")
+        log = self.build(path)
+        self.assertIn(f"to {path}:blog/index.html using", log)
+        self.assertNotIn(self.dest, log)
+
+    def test_discard_removes_partial_archive(self):
+        path = os.path.join(self.tmp.name, "site.tar.gz")
+        archive = open_archive(path, self.dest)
+        archive_tree(archive, self.static)
+        archive.discard()
+        self.assertEqual(
+            sorted(os.listdir(self.tmp.name)), ["content", "static", "template.html"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from block import BlockType, block_to_block_type
+from block import BlockType, ClassifiedBlock, block_to_block_type, classify_block
 
 
 class TestBlock(unittest.TestCase):
@@ -104,6 +104,42 @@ class TestBlock(unittest.TestCase):
         result = block_to_block_type(block)
         self.assertEqual(BlockType.PARAGRAPH, result)
 
+    def test_classify_block_heading_level(self):
+        self.assertEqual(
+            classify_block("###   Title"),
+            ClassifiedBlock(BlockType.HEADING, "Title", 3),
+        )
+
+    def test_classify_block_code_body(self):
+        self.assertEqual(
+            classify_block("```\nline 1\nline 2\n```"),
+            ClassifiedBlock(BlockType.CODE, "line 1\nline 2\n"),
+        )
+
+    def test_classify_block_code_unterminated(self):
+        block = "```\nline 1\nline 2"
+        self.assertEqual(classify_block(block).block_type, BlockType.PARAGRAPH)
+
+    def test_classify_block_quote_text(self):
+        self.assertEqual(
+            classify_block("> quoted"), ClassifiedBlock(BlockType.QUOTE, "quoted")
+        )
+
+    def test_classify_block_unordered_items(self):
+        classified = classify_block("- Item 1\n-   Item 2")
+        self.assertEqual(classified.block_type, BlockType.UNORDERED_LIST)
+        self.assertListEqual(classified.items, ["Item 1", "Item 2"])
+
+    def test_classify_block_ordered_items(self):
+        classified = classify_block("3. Third\n4. Fourth")
+        self.assertEqual(classified.block_type, BlockType.ORDERED_LIST)
+        self.assertListEqual(classified.items, ["Third", "Fourth"])
+
+    def test_classify_block_list_with_plain_line(self):
+        # Every line of a list block must be a list item
+        block = "- Item 1\nnot an item"
+        self.assertEqual(classify_block(block).block_type, BlockType.PARAGRAPH)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,90 @@
+import os
+import pickle
+import tempfile
+import time
+import unittest
+
+from blockcache import BlockCache, connect
+from metadata import PageMetadata
+from template import rewrite_node_urls
+from transform import markdown_to_html_node
+
+MARKDOWN = """# Title
+
+A paragraph with a [link](/about).
+
+- one
+- two"""
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "blocks.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected(self, markdown, basepath):
+        node = markdown_to_html_node(markdown)
+        rewrite_node_urls(node, basepath)
+        return node.to_html()
+
+    def test_render_matches_uncached(self):
+        cache = BlockCache(self.path, "/site/")
+        for _ in range(2):
+            self.assertEqual(
+                cache.render(MARKDOWN).to_html(), self.expected(MARKDOWN, "/site/")
+            )
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+    def test_render_reparses_only_changed_blocks(self):
+        BlockCache(self.path).render(MARKDOWN)
+        cache = BlockCache(self.path)
+        edited = MARKDOWN.replace("- two", "- three")
+        self.assertEqual(cache.render(edited).to_html(), self.expected(edited, "/"))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_render_collects_metadata_on_hits(self):
+        expected = PageMetadata()
+        markdown_to_html_node(MARKDOWN, metadata=expected)
+        cache = BlockCache(self.path)
+        for _ in range(2):
+            metadata = PageMetadata()
+            cache.render(MARKDOWN, metadata)
+            self.assertEqual(metadata, expected)
+        self.assertEqual(metadata.title, "Title")
+        self.assertEqual(metadata.links, ["/about"])
+
+    def test_key_depends_on_basepath(self):
+        root = BlockCache(self.path, "/")
+        nested = BlockCache(self.path, "/b/")
+        self.assertNotEqual(root.key("# a"), nested.key("# a"))
+
+    def test_evict_by_size(self):
+        cache = BlockCache(self.path)
+        cache.render(MARKDOWN)
+        removed = cache.evict(max_bytes=0)
+        self.assertEqual(removed, 3)
+        cache.render(MARKDOWN)
+        self.assertEqual(cache.misses, 6)
+
+    def test_evict_by_age(self):
+        cache = BlockCache(self.path)
+        cache.render(MARKDOWN)
+        self.assertEqual(cache.evict(max_age=60), 0)
+        connection = connect(self.path)
+        with connection:
+            connection.execute("UPDATE blocks SET accessed = ?", (time.time() - 120,))
+        self.assertEqual(cache.evict(max_age=60), 3)
+
+    def test_pickle_drops_statistics(self):
+        cache = BlockCache(self.path, "/site/")
+        cache.render(MARKDOWN)
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual((copy.path, copy.basepath), (self.path, "/site/"))
+        self.assertEqual((copy.hits, copy.misses), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+import json
+import os
+import random
+import re
+import time
+import unittest
+
+from blockparser import parse_document
+from metadata import Heading, PageMetadata
+from transform import markdown_to_html_node
+
+try:
+    import commonmark
+except ImportError:
+    # the reference implementation is optional; only the randomized
+    # comparison needs it
+    commonmark = None
+
+# Every example from the block sections of CommonMark spec 0.29 with the
+# spec's HTML, less those that depend on what this parser leaves out: inline
+# syntax (inline tags or any of ` * _ [ \ & in the expected text), raw HTML,
+# backslash escapes and link reference definitions.
+SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spec_blocks.json")
+SPEC_SECTIONS = {
+    "Tabs",
+    "Precedence",
+    "Thematic breaks",
+    "ATX headings",
+    "Setext headings",
+    "Indented code blocks",
+    "Fenced code blocks",
+    "Paragraphs",
+    "Blank lines",
+    "Block quotes",
+    "List items",
+    "Lists",
+}
+BLOCK_TAG = r"</?(?:p|ul|ol|li|blockquote|h[1-6])(?: [^>]*)?>|<hr />|</pre>"
+LINE_AFTER_TAG_REGEX = re.compile(f"({BLOCK_TAG})\n")
+LINE_BEFORE_TAG_REGEX = re.compile(r"\n(?=<(?:ul|ol|blockquote|pre|p|h[1-6]|hr|/li)\b)")
+ATTRIBUTES_REGEX = re.compile(r'(<\w+(?: [\w-]+="[^"]*")+)>')
+WORDS = ("alpha", "beta", "gamma", "delta", "echo")
+
+
+def tree_html(html: str) -> str:
+    # the reference rendering puts blocks on lines of their own and closes
+    # attributes without the space serialize_props leaves
+    html = LINE_AFTER_TAG_REGEX.sub(r"\1", html)
+    html = LINE_BEFORE_TAG_REGEX.sub("", html)
+    return ATTRIBUTES_REGEX.sub(r"\1 >", html)
+
+
+def random_line(rng: random.Random) -> str:
+    # Lines of every kind the parser knows, with plain words for text so the
+    # inline rules, which differ from CommonMark's, never come into it
+    text = " ".join(rng.choices(WORDS, k=rng.randint(1, 3)))
+    kind = rng.randrange(10)
+    if kind == 0:
+        line = "#" * rng.randint(1, 7) + rng.choice(("", " ", "\t")) + text
+    elif kind == 1:
+        line = rng.choice(("===", "---", "--", "=", "* * *", "- - -"))
+    elif kind == 2:
+        marker = rng.choice(("-", "*", "+", "1.", "2)", "10."))
+        spacing = rng.choice(("", " ", "  ", "\t", "     "))
+        line = marker + (spacing + text if rng.random() < 0.8 else spacing[:1])
+    elif kind == 3:
+        marker = rng.choice(("-", "*", "1.", "3)"))
+        line = "\n".join(f"{marker} {text}" for _ in range(rng.randint(1, 3)))
+    elif kind == 4:
+        line = rng.choice((">", "> ", ">>")) + text
+    elif kind == 5:
+        line = rng.choice(("~~~", "~~~~")) + rng.choice(("", WORDS[0]))
+    elif kind == 6:
+        line = "    " + text
+    elif kind == 7:
+        line = ""
+    else:
+        line = text
+    if rng.random() < 0.3:
+        line = rng.choice((" ", "  ", "   ", "\t", "    ")) + line
+    if rng.random() < 0.05 and not line.endswith(" "):
+        # one trailing space only; two would be a hard line break
+        line += " "
+    return line
+
+
+def random_document(rng: random.Random) -> str:
+    lines = [random_line(rng) for _ in range(rng.randint(1, 14))]
+    return "\n".join(lines) + rng.choice(("", "\n", "\n\n"))
+
+
+class TestBlockParser(unittest.TestCase):
+    def test_spec_examples(self):
+        with open(SPEC_PATH) as file:
+            examples = json.load(file)
+        self.assertEqual(len(examples), 202)
+        for example in examples:
+            with self.subTest(example=example["example"]):
+                self.assertIn(example["section"], SPEC_SECTIONS)
+                self.assertEqual(
+                    parse_document(example["markdown"]).to_html(),
+                    f"<div>{tree_html(example['html'])}</div>",
+                )
+
+    @unittest.skipUnless(commonmark, "commonmark is not installed")
+    def test_matches_reference_on_random_documents(self):
+        rng = random.Random(0)
+        for _ in range(5_000):
+            markdown = random_document(rng)
+            with self.subTest(markdown=markdown):
+                expected = tree_html(commonmark.commonmark(markdown))
+                self.assertEqual(
+                    parse_document(markdown).to_html(), f"<div>{expected}</div>"
+                )
+
+    def test_whole_blocks_between_blank_lines(self):
+        # chunks that look like whole blocks but are not, checked against the
+        # reference implementation
+        cases = [
+            ("one\ntwo\n\n", "<p>one\ntwo</p>"),
+            (
+                "- a\n- b\n\n- c\n",
+                "<ul><li><p>a</p></li><li><p>b</p></li><li><p>c</p></li></ul>",
+            ),
+            (
+                "- a\n- b\n\n  c\n",
+                "<ul><li><p>a</p></li><li><p>b</p><p>c</p></li></ul>",
+            ),
+            (
+                "1. a\n2. b\n\n3) c\n",
+                '<ol><li>a</li><li>b</li></ol><ol start="3" ><li>c</li></ol>',
+            ),
+            ("- a\n- b\n\n\n* c\n", "<ul><li>a</li><li>b</li></ul><ul><li>c</li></ul>"),
+            (
+                "```\ncode\n```\n\n~~~ text\nopen\n\n",
+                "<pre><code>code\n</code></pre>"
+                '<pre><code class="language-text" >open\n\n</code></pre>',
+            ),
+            (
+                "2. a\n3. b\n\nafter\n",
+                '<ol start="2" ><li>a</li><li>b</li></ol><p>after</p>',
+            ),
+        ]
+        for markdown, html in cases:
+            with self.subTest(markdown=markdown):
+                self.assertEqual(
+                    parse_document(markdown).to_html(), f"<div>{html}</div>"
+                )
+
+    def test_fenced_code_keeps_blank_lines(self):
+        markdown = "```python\nfirst()\n\n\nsecond()\n```\n\nafter"
+        self.assertEqual(
+            parse_document(markdown).to_html(),
+            '<div><pre><code class="language-python" >first()\n\n\nsecond()\n'
+            "</code></pre><p>after</p></div>",
+        )
+
+    def test_multi_paragraph_blockquote(self):
+        markdown = '> "I am in fact a Hobbit."\n>\n> -- J.R.R. Tolkien'
+        self.assertEqual(
+            parse_document(markdown).to_html(),
+            '<div><blockquote><p>"I am in fact a Hobbit."</p>'
+            "<p>-- J.R.R. Tolkien</p></blockquote></div>",
+        )
+
+    def test_inline_markdown(self):
+        markdown = "- **bold** and [a link](/about)\n- `code`"
+        self.assertEqual(
+            parse_document(markdown).to_html(),
+            '<div><ul><li><b>bold</b> and <a href="/about" >a link</a></li>'
+            "<li><code>code</code></li></ul></div>",
+        )
+
+    def test_metadata(self):
+        markdown = (
+            "# Title\n\nSome *words* [here](/x).\n\n## Part two\n"
+            "- item\n\n```\ncode text\n```"
+        )
+        metadata = PageMetadata()
+        parse_document(markdown, metadata)
+        self.assertEqual(metadata.title, "Title")
+        self.assertEqual(
+            metadata.headings,
+            [Heading(1, "Title", "title"), Heading(2, "Part two", "part-two")],
+        )
+        self.assertEqual(metadata.links, ["/x"])
+
+    def test_metadata_matches_simple_parser(self):
+        markdown = (
+            "# Home\n\nA paragraph with ![an image](/a.png) and [a link](/b).\n\n"
+            "## Section\n\n- one\n- two\n\n```\nsome code\n```"
+        )
+        simple = PageMetadata()
+        tree = PageMetadata()
+        expected = markdown_to_html_node(markdown, metadata=simple).to_html()
+        self.assertEqual(parse_document(markdown, tree).to_html(), expected)
+        self.assertEqual(tree, simple)
+
+    def test_empty_document(self):
+        self.assertEqual(parse_document("").to_html(), "<div></div>")
+        self.assertEqual(parse_document("\n  \n\n").to_html(), "<div></div>")
+
+    def test_deep_nesting_is_linear(self):
+        for markdown in ("> " * 2_000 + "x", "- " * 2_000 + "x", "- a\n" * 20_000):
+            start = time.perf_counter()
+            parse_document(markdown)
+            self.assertLess(time.perf_counter() - start, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
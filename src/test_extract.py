@@ -1,10 +1,19 @@
+import io
+import os
+import random
+import re
+import tempfile
 import unittest
 
+import constants
 from extract import (
     extract_markdown_images,
     extract_markdown_links,
     extract_title,
+    iter_markdown_blocks,
     markdown_to_blocks,
+    read_markdown_blocks,
+    scan_markdown_references,
 )
 
 
@@ -157,6 +166,34 @@ Paragraph two"""
         output = markdown_to_blocks(input)
         self.assertListEqual(expected, output)
 
+    def test_iter_markdown_blocks_matches_markdown_to_blocks(self):
+        # Tiny chunks force separators to straddle chunk boundaries
+        markdown = "# Heading\n\n\nPara one\n\n```\ncode\n\nmore\n```\n\n  \n- a\n- b\n"
+        for chunk_size in (1, 2, 3, 64):
+            blocks = list(iter_markdown_blocks(io.StringIO(markdown), chunk_size))
+            self.assertListEqual(markdown_to_blocks(markdown), blocks)
+
+    def test_iter_markdown_blocks_bytes_source(self):
+        markdown = "Caf\u00e9 au lait\r\n\r\nsecond \u00e9"
+        blocks = list(iter_markdown_blocks(io.BytesIO(markdown.encode()), 1))
+        self.assertListEqual(["Caf\u00e9 au lait", "second \u00e9"], blocks)
+
+    def test_read_markdown_blocks(self):
+        markdown = "# Title\n\nBody text\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.md")
+            with open(path, "w") as file:
+                file.write(markdown)
+            for use_mmap in (False, True):
+                blocks = list(read_markdown_blocks(path, use_mmap))
+                self.assertListEqual(["# Title", "Body text"], blocks)
+
+    def test_read_markdown_blocks_empty_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "empty.md")
+            open(path, "w").close()
+            self.assertListEqual([], list(read_markdown_blocks(path, True)))
+
     def test_extract_title(self):
         input = """
 # a test header
@@ -172,5 +209,29 @@ Paragraph two"""
         self.assertEqual(str(e.exception), "Header not found in input")
 
 
+    def test_scan_markdown_references_matches_regex(self):
+        rng = random.Random(21)
+        cases = (
+            ("[", constants.MARKDOWN_LINK_CAPTURING_REGEX),
+            ("![", constants.MARKDOWN_IMAGE_CAPTURING_REGEX),
+        )
+        for opener, regex in cases:
+            pattern = re.compile(regex)
+            for _ in range(5000):
+                length = rng.randint(0, 24)
+                text = "".join(rng.choice("[]()!a \n") for _ in range(length))
+                expected = [
+                    (match.start(), match.end(), match.group(1), match.group(2))
+                    for match in pattern.finditer(text)
+                ]
+                self.assertEqual(
+                    list(scan_markdown_references(text, opener)), expected, text
+                )
+
+    def test_scan_markdown_references_stays_on_one_line(self):
+        text = "[a\n](b) [c](d\n) [e](f)"
+        self.assertEqual(list(scan_markdown_references(text)), [(16, 22, "e", "f")])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+from fingerprint import (
+    FingerprintError,
+    fingerprint_assets,
+    fingerprint_name,
+    rewrite_css,
+)
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.source, "images"))
+        self.write(os.path.join(self.source, "images", "a.png"), "png bytes")
+        self.write(
+            os.path.join(self.source, "index.css"),
+            'body { background: url("images/a.png"); }',
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_fingerprint_name(self):
+        self.assertEqual(
+            fingerprint_name("images/a.png", "0123456789abcdef"),
+            "images/a.01234567.png",
+        )
+        self.assertEqual(fingerprint_name("LICENSE", "0123456789"), "LICENSE.01234567")
+
+    def test_rewrite_css(self):
+        assets = {"images/a.png": "images/a.11111111.png"}
+        css = (
+            "a { b: url(/images/a.png); c: url('images/a.png?x#y'); "
+            "d: url(data:x); e: url(https://e.com/a.png); f: url(missing.png) }"
+        )
+        self.assertEqual(
+            rewrite_css(css, "index.css", assets, "/site/"),
+            "a { b: url(/site/images/a.11111111.png); "
+            "c: url('images/a.11111111.png?x#y'); "
+            "d: url(data:x); e: url(https://e.com/a.png); f: url(missing.png) }",
+        )
+
+    def test_rewrite_css_relative_to_stylesheet(self):
+        assets = {"images/a.png": "images/a.11111111.png"}
+        self.assertEqual(
+            rewrite_css("url(../images/a.png)", "css/site.css", assets),
+            "url(../images/a.11111111.png)",
+        )
+
+    def test_fingerprint_assets(self):
+        cache = {}
+        assets = fingerprint_assets(self.source, self.dest, cache)
+        image = assets["images/a.png"]
+        self.assertRegex(image, r"^images/a\.[0-9a-f]{8}\.png$")
+        self.assertEqual(self.read(os.path.join(self.dest, image)), "png bytes")
+        css = self.read(os.path.join(self.dest, assets["index.css"]))
+        self.assertIn(f'url("{image}")', css)
+        self.assertEqual(sorted(cache), ["images/a.png"])
+
+    def test_unchanged_assets_are_not_rehashed(self):
+        cache = {}
+        fingerprint_assets(self.source, self.dest, cache)
+        # a poisoned hash is trusted while size and mtime still match
+        cache["images/a.png"]["hash"] = "f" * 64
+        assets = fingerprint_assets(self.source, self.dest, cache)
+        self.assertEqual(assets["images/a.png"], "images/a.ffffffff.png")
+
+    def test_changed_asset_renames_it_and_its_stylesheet(self):
+        cache = {}
+        before = fingerprint_assets(self.source, self.dest, cache)
+        self.write(os.path.join(self.source, "images", "a.png"), "new png bytes")
+        after = fingerprint_assets(self.source, self.dest, cache)
+        self.assertNotEqual(before["images/a.png"], after["images/a.png"])
+        self.assertNotEqual(before["index.css"], after["index.css"])
+        # the superseded files are removed
+        for name in (before["images/a.png"], before["index.css"]):
+            self.assertFalse(os.path.exists(os.path.join(self.dest, name)))
+
+    def test_stylesheets_are_named_after_what_they_import(self):
+        # a.css sorts first but has to wait for the stylesheets it imports
+        self.write(os.path.join(self.source, "a.css"), '@import "z.css";')
+        self.write(os.path.join(self.source, "z.css"), "@import url(/index.css);")
+        before = fingerprint_assets(self.source, self.dest, {})
+        a = self.read(os.path.join(self.dest, before["a.css"]))
+        z = self.read(os.path.join(self.dest, before["z.css"]))
+        self.assertEqual(a, f'@import "{before["z.css"]}";')
+        self.assertEqual(z, f"@import url(/{before['index.css']});")
+        # an edit two imports away still renames the importing stylesheet
+        self.write(os.path.join(self.source, "images", "a.png"), "new png bytes")
+        after = fingerprint_assets(self.source, self.dest, {})
+        self.assertNotEqual(before["a.css"], after["a.css"])
+
+    def test_stylesheet_cycle_is_rejected(self):
+        self.write(os.path.join(self.source, "a.css"), '@import "b.css";')
+        self.write(os.path.join(self.source, "b.css"), "x { y: url(a.css) }")
+        with self.assertRaises(FingerprintError) as context:
+            fingerprint_assets(self.source, self.dest, {})
+        self.assertIn("a.css -> b.css -> a.css", str(context.exception))
+
+    def test_keeps_generated_pages(self):
+        page = os.path.join(self.dest, "index.html")
+        os.makedirs(self.dest)
+        self.write(page, "<p>page</p>")
+        fingerprint_assets(self.source, self.dest, {}, keep={page})
+        self.assertTrue(os.path.exists(page))
+        fingerprint_assets(self.source, self.dest, {})
+        self.assertFalse(os.path.exists(page))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, escape_attribute, escape_text
+from leafnode import LeafNode
+from parentnode import ParentNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -16,11 +18,35 @@ class TestHTMLNode(unittest.TestCase):
         expected = ""
         self.assertEqual(out.props_to_html(), expected)
 
+    def test_escape_text_leaves_plain_text_alone(self):
+        text = "nothing to escape here"
+        self.assertIs(escape_text(text), text)
+        self.assertEqual(escape_text("<&>"), "&lt;&amp;&gt;")
+        self.assertEqual(escape_text('"quoted"'), '"quoted"')
+
+    def test_escape_attribute(self):
+        self.assertEqual(
+            escape_attribute('a "b" <c> & d'), "a &quot;b&quot; &lt;c&gt; &amp; d"
+        )
+        self.assertEqual(escape_attribute("&amp;"), "&amp;amp;")
+
+    def test_props_follow_in_place_changes(self):
+        node = HTMLNode("img", None, None, {"src": "/a.png"})
+        self.assertEqual(node.props_to_html(), ' src="/a.png" ')
+        node.props["src"] = "/b.png"
+        node.props["alt"] = "x < y"
+        self.assertEqual(node.props_to_html(), ' src="/b.png" alt="x &lt; y" ')
+
     def test_repr(self):
         node = HTMLNode("p", "paragraph text", None, {"class": "text-bold"})
         expected = "HTMLNode(p, paragraph text, None, {'class': 'text-bold'})"
         self.assertEqual(repr(node), expected)
 
+    def test_slots_no_instance_dict(self):
+        leaf = LeafNode("b", "text")
+        for node in (HTMLNode("p", "text"), leaf, ParentNode("p", [leaf])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import images
+from images import (
+    ImageInfo,
+    apply_image_attributes,
+    build_variants,
+    imaging_available,
+    record_variants,
+    referenced_images,
+    scan_images,
+)
+from leafnode import LeafNode
+from parentnode import ParentNode
+from template import rewrite_node_urls
+
+INFO = ImageInfo("images/a.png", "0123456789abcdef", 1000, 500, [480, 960])
+
+
+class TestImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.source, "images"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_variant_path(self):
+        self.assertEqual(INFO.variant_path(480), "images/a.01234567-480w.png")
+
+    def test_apply_image_attributes(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("img", "", {"src": "/images/a.png", "alt": "A"}),
+                LeafNode("img", "", {"src": "/images/other.png", "alt": "B"}),
+            ],
+        )
+        apply_image_attributes(node, {"images/a.png": INFO}, "/site/")
+        rewrite_node_urls(node, "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<p><img src="/site/images/a.png" alt="A" width="1000" height="500" '
+            'srcset="/site/images/a.01234567-480w.png 480w, '
+            "/site/images/a.01234567-960w.png 960w, /site/images/a.png 1000w\" "
+            'sizes="(max-width: 1000px) 100vw, 1000px" loading="lazy" ></img>'
+            '<img src="/site/images/other.png" alt="B" ></img></p>',
+        )
+
+    def test_small_image_has_no_srcset(self):
+        node = LeafNode("img", "", {"src": "/tiny.png", "alt": ""})
+        tiny = ImageInfo("tiny.png", "ab", 8, 8, [])
+        apply_image_attributes(node, {"tiny.png": tiny})
+        self.assertNotIn("srcset", node.props)
+        self.assertEqual(node.props["loading"], "lazy")
+
+    def test_referenced_images(self):
+        manifest = {
+            "docs/index.html": {"meta": {"images": ["/images/a.png?x", "b.png"]}},
+            "docs/feed.xml": {"generated": "feed", "hash": ""},
+        }
+        self.assertEqual(referenced_images(manifest), {"images/a.png"})
+
+    def test_record_variants_removes_stale(self):
+        stale = os.path.join(self.tmp.name, "old-480w.png")
+        with open(stale, "w") as file:
+            file.write("")
+        manifest = {stale: {"generated": "image", "hash": "0" * 16, "width": 480}}
+        removed = record_variants(manifest, {"new-480w.png": (INFO.digest, 480)})
+        self.assertEqual(removed, [stale])
+        self.assertEqual(
+            manifest,
+            {"new-480w.png": {"generated": "image", "hash": INFO.digest, "width": 480}},
+        )
+        self.assertFalse(os.path.exists(stale))
+
+    @unittest.skipUnless(imaging_available(), "Pillow is not installed")
+    def test_scan_and_build_variants(self):
+        from PIL import Image
+
+        path = os.path.join(self.source, "images", "a.png")
+        Image.new("RGB", (1000, 500), "red").save(path)
+        cache = {}
+        found = scan_images(self.source, cache, (480, 2000))
+        info = found["images/a.png"]
+        self.assertEqual((info.width, info.height, info.widths), (1000, 500, [480]))
+        arguments = (found, {"images/a.png"}, self.source, self.cache_dir, self.dest)
+        outputs = build_variants(*arguments)
+        expected = os.path.join(self.dest, "images", f"a.{info.digest[:8]}-480w.png")
+        self.assertEqual(outputs, {expected: (info.digest, 480)})
+        with Image.open(expected) as variant:
+            self.assertEqual(variant.size, (480, 240))
+        # cached by source hash: a second build copies but never re-encodes
+        os.remove(expected)
+        with mock.patch.object(images, "encode_variant") as encode:
+            build_variants(*arguments)
+        encode.assert_not_called()
+        self.assertTrue(os.path.exists(expected))
+        # unchanged sources are not reopened for their size
+        with mock.patch.object(images, "read_size") as read_size:
+            scan_images(self.source, cache, (480,))
+        read_size.assert_not_called()
+
+    @unittest.skipUnless(imaging_available(), "Pillow is not installed")
+    def test_variants_encode_on_every_cpu(self):
+        from PIL import Image
+
+        for name in ("a.png", "b.png"):
+            Image.new("RGB", (1000, 500), "red").save(
+                os.path.join(self.source, "images", name)
+            )
+        found = scan_images(self.source, {}, (480, 960))
+        arguments = (found, set(found), self.source, self.cache_dir, self.dest)
+        pool = mock.Mock(wraps=ProcessPoolExecutor)
+        with mock.patch.object(images.os, "cpu_count", return_value=2):
+            with mock.patch.object(images, "ProcessPoolExecutor", pool):
+                outputs = build_variants(*arguments)
+        pool.assert_called_once_with(max_workers=2)
+        self.assertEqual(len(outputs), 4)
+        self.assertTrue(all(os.path.exists(path) for path in outputs))
+
+    def test_stale_cached_variants_are_pruned(self):
+        os.makedirs(self.cache_dir)
+        names = (
+            f"{INFO.digest}-480.png",
+            f"{INFO.digest}-960.png.tmp",
+            "fedcba9876543210-480.png",
+        )
+        for name in names:
+            with open(os.path.join(self.cache_dir, name), "w") as file:
+                file.write("")
+        build_variants(
+            {INFO.path: INFO}, set(), self.source, self.cache_dir, self.dest
+        )
+        self.assertEqual(os.listdir(self.cache_dir), [f"{INFO.digest}-480.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
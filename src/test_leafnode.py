@@ -33,6 +33,20 @@ class TestLeafNode(unittest.TestCase):
             '<a href="https://example.com" target="_blank" >Click here</a>',
         )
 
+    def test_leaf_escapes_text(self):
+        node = LeafNode("code", "if a < b && b > c:")
+        self.assertEqual(
+            node.to_html(), "<code>if a &lt; b &amp;&amp; b &gt; c:</code>"
+        )
+        self.assertEqual(LeafNode(None, "fish & chips").to_html(), "fish &amp; chips")
+
+    def test_leaf_escapes_attributes(self):
+        node = LeafNode("a", "Search", {"href": '/find?q="x"&page=2'})
+        self.assertEqual(
+            node.to_html(),
+            '<a href="/find?q=&quot;x&quot;&amp;page=2" >Search</a>',
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
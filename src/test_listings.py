@@ -0,0 +1,166 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import listings
+from listings import (
+    Listing,
+    dest_to_url,
+    generate_listings,
+    plan_sections,
+    render_feed,
+    render_section,
+    render_sitemap,
+)
+from metadata import PageMetadata
+from template import Template
+from transform import markdown_to_html_node
+
+
+def page_entry(title, updated="2024-01-01T00:00:00Z"):
+    return {
+        "source": "x.md",
+        "hash": title,
+        "meta": {"title": title},
+        "updated": updated,
+    }
+
+
+class TestListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}", "/site/")
+        self.manifest = {
+            os.path.join(self.dest, "index.html"): page_entry("Home"),
+            os.path.join(self.dest, "blog", "tom", "index.html"): page_entry(
+                "Tom", "2024-03-01T00:00:00Z"
+            ),
+            os.path.join(self.dest, "blog", "old.html"): page_entry("Old & <Gone>"),
+            os.path.join(self.dest, "a", "b", "c.html"): page_entry("C"),
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, **options):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            generate_listings(self.manifest, self.template, self.dest, **options)
+        return out.getvalue()
+
+    def test_dest_to_url(self):
+        self.assertEqual(dest_to_url("docs/index.html", "docs"), "/")
+        self.assertEqual(dest_to_url("docs/blog/tom/index.html", "docs"), "/blog/tom/")
+        self.assertEqual(dest_to_url("docs/blog/old.html", "docs"), "/blog/old.html")
+
+    def test_plan_sections(self):
+        pages = listings.collect_listings(self.manifest, self.dest)
+        plan = plan_sections(pages, self.dest)
+        self.assertEqual(
+            sorted(dest_to_url(path, self.dest) for path in plan),
+            ["/a/", "/a/b/", "/blog/"],
+        )
+        section, items = plan[os.path.join(self.dest, "blog", "index.html")]
+        self.assertEqual(section.title, "Blog")
+        self.assertEqual(section.updated, "2024-03-01T00:00:00Z")
+        self.assertEqual([item.url for item in items], ["/blog/old.html", "/blog/tom/"])
+        _, items = plan[os.path.join(self.dest, "a", "index.html")]
+        self.assertEqual([item.url for item in items], ["/a/b/"])
+
+    def test_existing_index_page_is_not_replaced(self):
+        self.manifest[os.path.join(self.dest, "blog", "index.html")] = page_entry("B")
+        pages = listings.collect_listings(self.manifest, self.dest)
+        plan = plan_sections(pages, self.dest)
+        self.assertNotIn(os.path.join(self.dest, "blog", "index.html"), plan)
+
+    def test_section_page(self):
+        self.generate(sections=True)
+        with open(os.path.join(self.dest, "blog", "index.html")) as file:
+            html = file.read()
+        self.assertTrue(html.startswith("<title>Blog</title><div><h1>Blog</h1><ul>"))
+        self.assertIn('<a href="/site/blog/tom/" >Tom</a>', html)
+
+    def test_listings_use_plain_titles(self):
+        metadata = PageMetadata()
+        markdown_to_html_node("# **Tom** and [Jerry](/jerry)", metadata=metadata)
+        self.assertEqual(metadata.title, "**Tom** and [Jerry](/jerry)")
+        tom = os.path.join(self.dest, "blog", "tom", "index.html")
+        self.manifest[tom]["meta"] = metadata.to_dict()
+        self.generate(sections=True, site_url="https://example.com")
+        with open(os.path.join(self.dest, "blog", "index.html")) as file:
+            self.assertIn('<a href="/site/blog/tom/" >Tom and Jerry</a>', file.read())
+        with open(os.path.join(self.dest, "feed.xml")) as file:
+            self.assertIn("<title>Tom and Jerry</title>", file.read())
+
+    def test_section_title_is_escaped(self):
+        template = Template("<title>{{ Title }}</title>")
+        html = render_section(template, "Fish & <Chips>", [])
+        self.assertEqual(html, "<title>Fish &amp; &lt;Chips&gt;</title>")
+
+    def test_incremental_and_stale_outputs(self):
+        options = {"sections": True, "site_url": "https://example.com"}
+        self.assertEqual(self.generate(**options).count("Generating"), 5)
+        self.assertEqual(self.generate(**options), "")
+        tom = os.path.join(self.dest, "blog", "tom", "index.html")
+        self.manifest[tom] = page_entry("Tom Again")
+        log = self.generate(**options)
+        self.assertEqual(
+            log.splitlines(),
+            [
+                f"Generating section {os.path.join(self.dest, 'blog', 'index.html')}",
+                f"Generating sitemap {os.path.join(self.dest, 'sitemap.xml')}",
+                f"Generating feed {os.path.join(self.dest, 'feed.xml')}",
+            ],
+        )
+        log = self.generate()
+        self.assertEqual(log.count("Removed stale"), 5)
+        self.assertEqual(listings.generated_outputs(self.manifest), set())
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "sitemap.xml")))
+
+    def test_sitemap(self):
+        pages = [Listing("docs/x.html", "/x.html", "X", "2024-01-01T00:00:00Z")]
+        files = render_sitemap(pages, "https://example.com/", "/site/")
+        self.assertIn(
+            "<url><loc>https://example.com/site/x.html</loc>"
+            "<lastmod>2024-01-01T00:00:00Z</lastmod></url>",
+            files["sitemap.xml"],
+        )
+
+    def test_sitemap_splits_large_sites(self):
+        pages = [Listing(f"docs/{i}.html", f"/{i}.html", "", "") for i in range(5)]
+        with mock.patch.object(listings, "SITEMAP_LIMIT", 2):
+            files = render_sitemap(pages, "https://example.com", "/")
+        self.assertEqual(
+            sorted(files),
+            ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"],
+        )
+        self.assertIn("<sitemapindex", files["sitemap.xml"])
+        self.assertIn("https://example.com/sitemap-3.xml", files["sitemap.xml"])
+        self.assertEqual(files["sitemap-3.xml"].count("<url>"), 1)
+
+    def test_feed(self):
+        pages = listings.collect_listings(self.manifest, self.dest)
+        feed = render_feed(pages, "https://example.com", "/", "Site", "/blog/")
+        self.assertEqual(feed.count("<entry>"), 2)
+        # newest first
+        self.assertLess(feed.index("/blog/tom/"), feed.index("/blog/old.html"))
+        self.assertIn("<title>Old &amp; &lt;Gone&gt;</title>", feed)
+        self.assertIn("<updated>2024-03-01T00:00:00Z</updated>", feed)
+
+    def test_feed_section_without_trailing_slash(self):
+        archive = os.path.join(self.dest, "blog-archive", "older.html")
+        self.manifest[archive] = page_entry("Older")
+        pages = listings.collect_listings(self.manifest, self.dest)
+        feed = render_feed(pages, "https://example.com", "/", "Site", "/blog")
+        self.assertEqual(feed.count("<entry>"), 2)
+        self.assertNotIn("blog-archive", feed)
+        self.assertIn('<link href="https://example.com/blog/"/>', feed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,312 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from main import (
+    PageGenerationError,
+    apply_changes,
+    collect_pages,
+    generate_pages_recursive,
+    prepare_page,
+    rewrite_page_urls,
+)
+from profiler import BuildProfile
+import template
+from template import load_template
+from transform import markdown_to_html_node
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def build(self, manifest, basepath="/", jobs=1, io_threads=0):
+        log = self.build_log(manifest, basepath, jobs, io_threads=io_threads)
+        return log.count("Generating page")
+
+    def build_log(self, manifest, basepath="/", jobs=1, profile=None, io_threads=0):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                basepath,
+                manifest,
+                jobs,
+                profile,
+                io_threads=io_threads,
+            )
+        return out.getvalue()
+
+    def test_generate_pages_recursive_output(self):
+        self.build(None)
+        self.assertEqual(
+            self.read(os.path.join(self.dest, "blog", "index.html")),
+            "<title>Blog</title><div><h1>Blog</h1></div>",
+        )
+
+    def test_collect_pages(self):
+        pages = collect_pages(self.content, self.dest)
+        self.assertCountEqual(
+            pages,
+            [
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.dest, "index.html"),
+                ),
+                (
+                    os.path.join(self.content, "blog", "index.md"),
+                    os.path.join(self.dest, "blog", "index.html"),
+                ),
+            ],
+        )
+
+    def test_incremental_skips_unchanged_pages(self):
+        manifest = {}
+        self.assertEqual(self.build(manifest), 2)
+        self.assertEqual(self.build(manifest), 0)
+
+    def test_incremental_rebuilds_changed_page(self):
+        manifest = {}
+        self.build(manifest)
+        self.write(os.path.join(self.content, "index.md"), "# Home again")
+        self.assertEqual(self.build(manifest), 1)
+
+    def test_incremental_rebuilds_on_template_change(self):
+        manifest = {}
+        self.build(manifest)
+        self.write(self.template, "{{ Title }}|{{ Content }}")
+        self.assertEqual(self.build(manifest), 2)
+
+    def test_incremental_rebuilds_on_basepath_change(self):
+        manifest = {}
+        self.build(manifest)
+        self.assertEqual(self.build(manifest, "/site/"), 2)
+
+    def test_incremental_rebuilds_missing_output(self):
+        manifest = {}
+        self.build(manifest)
+        os.remove(os.path.join(self.dest, "index.html"))
+        self.assertEqual(self.build(manifest), 1)
+
+    def test_parallel_matches_serial(self):
+        serial_log = self.build_log(None)
+        pages = collect_pages(self.content, self.dest)
+        serial = [self.read(dest) for _, dest in pages]
+        parallel_log = self.build_log(None, jobs=2)
+        self.assertEqual(serial_log, parallel_log)
+        self.assertEqual(serial, [self.read(dest) for _, dest in pages])
+
+    def test_parallel_records_manifest(self):
+        manifest = {}
+        self.assertEqual(self.build(manifest, jobs=2), 2)
+        self.assertEqual(self.build(manifest, jobs=2), 0)
+
+    def test_io_threads_match_serial(self):
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nText")
+        serial_log = self.build_log(None)
+        pages = collect_pages(self.content, self.dest)
+        serial = [self.read(dest) for _, dest in pages]
+        for jobs, io_threads in ((1, 1), (1, 4), (2, 2)):
+            pipelined_log = self.build_log(None, jobs=jobs, io_threads=io_threads)
+            self.assertEqual(serial_log, pipelined_log)
+            self.assertEqual(serial, [self.read(dest) for _, dest in pages])
+
+    def test_commonmark_parser(self):
+        quote = "# Blog\n\n> one\n>\n> two"
+        self.write(os.path.join(self.content, "blog", "index.md"), quote)
+        manifest = {}
+        self.build(manifest)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                manifest,
+                jobs=2,
+                template_options={"parser": "commonmark"},
+            )
+        # a different parser invalidates every page
+        self.assertEqual(out.getvalue().count("Generating page"), 2)
+        self.assertEqual(
+            self.read(os.path.join(self.dest, "blog", "index.html")),
+            "<title>Blog</title><div><h1>Blog</h1>"
+            "<blockquote><p>one</p><p>two</p></blockquote></div>",
+        )
+
+    def test_io_threads_record_manifest(self):
+        manifest = {}
+        self.assertEqual(self.build(manifest, io_threads=2), 2)
+        self.assertEqual(self.build(manifest, io_threads=2), 0)
+        self.write(os.path.join(self.content, "index.md"), "# Home again")
+        self.assertEqual(self.build(manifest, io_threads=2), 1)
+
+    def test_new_renderer_rebuilds_every_page(self):
+        manifest = {}
+        self.assertEqual(self.build(manifest), 2)
+        self.assertEqual(self.build(manifest), 0)
+        with mock.patch.object(template, "RENDER_VERSION", "next"):
+            self.assertEqual(self.build(manifest), 2)
+            self.assertEqual(self.build(manifest), 0)
+
+    def test_manifest_records_metadata(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n## Next up")
+        for jobs, io_threads in ((1, 0), (2, 0), (1, 2), (2, 2)):
+            manifest = {}
+            self.build(manifest, jobs=jobs, io_threads=io_threads)
+            meta = manifest[os.path.join(self.dest, "index.html")]["meta"]
+            self.assertEqual(meta["title"], "Home")
+            self.assertEqual(meta["headings"][1]["slug"], "next-up")
+
+    def test_manifest_without_metadata_rebuilds(self):
+        manifest = {}
+        self.build(manifest)
+        del manifest[os.path.join(self.dest, "index.html")]["meta"]
+        self.assertEqual(self.build(manifest), 1)
+
+    def test_profile_matches_output(self):
+        self.build_log(None)
+        pages = collect_pages(self.content, self.dest)
+        expected = [self.read(dest) for _, dest in pages]
+        for jobs, io_threads in ((1, 0), (2, 0), (1, 2), (2, 2)):
+            profile = BuildProfile()
+            self.build_log(None, jobs=jobs, profile=profile, io_threads=io_threads)
+            self.assertEqual(expected, [self.read(dest) for _, dest in pages])
+            self.assertCountEqual(profile.pages, [dest for _, dest in pages])
+            self.assertEqual(profile.totals.counts["write"], 2)
+
+    def test_apply_changes_rebuilds_only_changed_page(self):
+        manifest = {}
+        self.build(manifest)
+        static = os.path.join(self.tmp.name, "static")
+        os.makedirs(static)
+        index = os.path.join(self.content, "index.md")
+        asset = os.path.join(static, "index.css")
+        self.write(index, "# Home again")
+        self.write(asset, "body {}")
+        template = load_template(self.template)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            apply_changes(
+                ([asset], [index], []),
+                template,
+                manifest,
+                self.content,
+                static,
+                self.dest,
+            )
+        self.assertEqual(out.getvalue().count("Generating page"), 1)
+        self.assertIn("Home again", self.read(os.path.join(self.dest, "index.html")))
+        self.assertEqual(self.read(os.path.join(self.dest, "index.css")), "body {}")
+
+    def test_apply_changes_template_rebuilds_everything(self):
+        manifest = {}
+        self.build(manifest)
+        self.write(self.template, "{{ Title }}!{{ Content }}")
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            template = apply_changes(
+                ([], [self.template], []),
+                load_template(self.template),
+                manifest,
+                self.content,
+                os.path.join(self.tmp.name, "static"),
+                self.dest,
+            )
+        self.assertEqual(out.getvalue().count("Generating page"), 2)
+        self.assertEqual(template.source, "{{ Title }}!{{ Content }}")
+
+    def test_apply_changes_removed_page(self):
+        manifest = {}
+        self.build(manifest)
+        index = os.path.join(self.content, "index.md")
+        os.remove(index)
+        with contextlib.redirect_stdout(io.StringIO()):
+            apply_changes(
+                ([], [], [index]),
+                load_template(self.template),
+                manifest,
+                self.content,
+                os.path.join(self.tmp.name, "static"),
+                self.dest,
+            )
+        dest = os.path.join(self.dest, "index.html")
+        self.assertFalse(os.path.exists(dest))
+        self.assertNotIn(dest, manifest)
+
+    def test_streamed_page_matches_tree(self):
+        page = os.path.join(self.content, "blog", "post.md")
+        md = "Intro first\n\n# Post\n\n[home](/index.html)\n\n## More\n\nText"
+        self.write(page, md)
+        manifest = {}
+        self.build(manifest, basepath="/site/")
+        template = load_template(self.template, "/site/")
+        node = markdown_to_html_node(md)
+        rewrite_page_urls(node, template)
+        self.assertEqual(
+            self.read(os.path.join(self.dest, "blog", "post.html")),
+            f"<title>Post</title>{node.to_html()}",
+        )
+        meta = manifest[os.path.join(self.dest, "blog", "post.html")]["meta"]
+        self.assertEqual(meta["title"], "Post")
+        headings = [heading["text"] for heading in meta["headings"]]
+        self.assertEqual(headings, ["Post", "More"])
+
+    def test_title_outside_a_heading_block(self):
+        # only extract_title sees a "# " line that shares its block
+        self.write(os.path.join(self.content, "index.md"), "Intro\n# Home\n\nText")
+        self.build(None)
+        html = self.read(os.path.join(self.dest, "index.html"))
+        self.assertTrue(html.startswith("<title>Home</title>"))
+
+    def test_title_is_escaped(self):
+        page = os.path.join(self.content, "index.md")
+        source = "<title>{{ Title }}</title>{{ Content }}"
+        for title, escaped in (
+            ("Fish & <Chips>", "Fish &amp; &lt;Chips&gt;"),
+            ("</title><script>", "&lt;/title&gt;&lt;script&gt;"),
+        ):
+            self.write(page, f"# {title}")
+            for parser in ("simple", "commonmark"):
+                with self.subTest(title=title, parser=parser):
+                    page_template = template.Template(source, parser=parser)
+                    _, chunks = prepare_page(page, page_template)
+                    html = "".join(chunks)
+                    self.assertTrue(html.startswith(f"<title>{escaped}</title>"))
+
+    def test_failing_page_raises(self):
+        # A page without a "# " title cannot be rendered
+        broken = os.path.join(self.content, "blog", "broken.md")
+        self.write(broken, "no title here")
+        for jobs, io_threads in ((1, 0), (2, 0), (1, 2), (2, 2)):
+            with self.assertRaises(PageGenerationError) as context:
+                self.build(None, jobs=jobs, io_threads=io_threads)
+            self.assertIn(broken, str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from manifest import (
+    hash_file,
+    hash_inputs,
+    load_manifest,
+    prune_manifest,
+    save_manifest,
+)
+
+
+class TestManifest(unittest.TestCase):
+    def test_hash_inputs_stable(self):
+        self.assertEqual(hash_inputs("a", "b"), hash_inputs("a", "b"))
+
+    def test_hash_inputs_boundaries(self):
+        # Moving characters between inputs must change the hash
+        self.assertNotEqual(hash_inputs("ab", "c"), hash_inputs("a", "bc"))
+
+    def test_hash_file_matches_hash_inputs(self):
+        text = "# Title\n\ncaf\u00e9 " * 5000
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+            self.assertEqual(
+                hash_file(path, "template", chunk_size=7),
+                hash_inputs(text, "template"),
+            )
+
+    def test_load_manifest_missing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(load_manifest(os.path.join(tmp, "missing.json")), {})
+
+    def test_load_manifest_corrupt(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest.json")
+            with open(path, "w") as file:
+                file.write("{not json")
+            self.assertEqual(load_manifest(path), {})
+
+    def test_save_and_load_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "nested", "manifest.json")
+            manifest = {"docs/index.html": {"source": "index.md", "hash": "abc"}}
+            save_manifest(path, manifest)
+            self.assertEqual(load_manifest(path), manifest)
+
+    def test_prune_manifest_removes_stale_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            kept = os.path.join(tmp, "kept.html")
+            stale = os.path.join(tmp, "stale.html")
+            for path in (kept, stale):
+                with open(path, "w") as file:
+                    file.write("<p></p>")
+            manifest = {
+                kept: {"source": "kept.md", "hash": "1"},
+                stale: {"source": "stale.md", "hash": "2"},
+            }
+            removed = prune_manifest(manifest, {kept})
+            self.assertEqual(removed, [stale])
+            self.assertEqual(list(manifest), [kept])
+            self.assertTrue(os.path.exists(kept))
+            self.assertFalse(os.path.exists(stale))
+
+
+if __name__ == "__main__":
+    unittest.main()
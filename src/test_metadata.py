@@ -0,0 +1,105 @@
+import json
+import unittest
+
+from metadata import Heading, PageMetadata, SiteIndex, slugify
+from transform import markdown_to_html_node
+
+MARKDOWN = """# The **Title**
+
+Intro with a [link](/about) and ![a cat](/cat.png).
+
+## Notes
+
+```
+code words here
+```
+
+## Notes
+
+- one [two](https://example.com)"""
+
+
+class TestMetadata(unittest.TestCase):
+    def collect(self, markdown):
+        metadata = PageMetadata()
+        markdown_to_html_node(markdown, metadata=metadata)
+        return metadata
+
+    def test_slugify(self):
+        self.assertEqual(slugify("Hello, World!"), "hello-world")
+        self.assertEqual(slugify("  A -- B  "), "a-b")
+        self.assertEqual(slugify("Café au lait"), "café-au-lait")
+        self.assertEqual(slugify("!!!"), "")
+
+    def test_collects_title_headings_and_links(self):
+        metadata = self.collect(MARKDOWN)
+        self.assertEqual(metadata.title, "The **Title**")
+        self.assertEqual(
+            metadata.headings,
+            [
+                Heading(1, "The Title", "the-title"),
+                Heading(2, "Notes", "notes"),
+                Heading(2, "Notes", "notes-1"),
+            ],
+        )
+        self.assertEqual(metadata.links, ["/about", "https://example.com"])
+        self.assertEqual(metadata.images, ["/cat.png"])
+
+    def test_word_count(self):
+        # image alt text is not visible, code is
+        self.assertEqual(self.collect("Two words").word_count, 2)
+        self.assertEqual(self.collect("one **two**three ![alt](/x.png)").word_count, 2)
+        self.assertEqual(self.collect(MARKDOWN).word_count, 14)
+
+    def test_first_level_one_heading_is_title(self):
+        metadata = self.collect("## Sub\n\n# First\n\n# Second")
+        self.assertEqual(metadata.title, "First")
+
+    def test_no_title(self):
+        self.assertIsNone(self.collect("just text").title)
+
+    def test_empty_heading_slug(self):
+        metadata = self.collect("# !!!\n\n# ???")
+        self.assertEqual([h.slug for h in metadata.headings], ["section", "section-1"])
+
+    def test_round_trip(self):
+        metadata = self.collect(MARKDOWN)
+        data = json.loads(json.dumps(metadata.to_dict()))
+        self.assertEqual(PageMetadata.from_dict(data), metadata)
+
+    def test_merge_keeps_slugs_unique(self):
+        page = self.collect("# A\n\n## Notes")
+        page.merge(self.collect("## Notes"))
+        self.assertEqual([h.slug for h in page.headings], ["a", "notes", "notes-1"])
+        self.assertEqual(page.title, "A")
+
+    def test_site_index_from_manifest(self):
+        manifest = {
+            "docs/index.html": {
+                "source": "content/index.md",
+                "hash": "abc",
+                "meta": self.collect("# Home").to_dict(),
+            },
+            "docs/old.html": {"source": "content/old.md", "hash": "def"},
+        }
+        index = SiteIndex.from_manifest(manifest)
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.titles(), {"docs/index.html": "Home"})
+        self.assertIsNone(index.get("docs/old.html"))
+        self.assertEqual(index.plain_title("docs/old.html"), "")
+        restored = SiteIndex.from_dict(index.to_dict())
+        self.assertEqual(restored.to_dict(), index.to_dict())
+
+    def test_site_index_plain_title(self):
+        index = SiteIndex(
+            {
+                "a.html": self.collect("# **Tom** and [Jerry](/jerry)\n\n# Later"),
+                "b.html": self.collect("Intro"),
+            }
+        )
+        self.assertEqual(index.plain_title("a.html"), "Tom and Jerry")
+        self.assertEqual(index.plain_title("b.html"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
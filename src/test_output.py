@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from output import DirectoryWriter
+
+
+class TestDirectoryWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.writer = DirectoryWriter(self.dest)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_write_page_creates_directories_once(self):
+        first = os.path.join(self.dest, "blog", "a.html")
+        second = os.path.join(self.dest, "blog", "b.html")
+        self.writer.write_page(first, ["<p>", "a", "</p>"])
+        self.writer.write_text(second, "<p>b</p>")
+        self.assertEqual(self.read(first), "<p>a</p>")
+        self.assertEqual(self.read(second), "<p>b</p>")
+        self.assertEqual(self.writer.directories, {os.path.join(self.dest, "blog")})
+        self.assertTrue(self.writer.exists(first))
+
+    def test_write_page_keeps_old_output_on_failure(self):
+        dest = os.path.join(self.dest, "page.html")
+        self.writer.write_text(dest, "old")
+
+        def chunks():
+            yield "<p>half"
+            raise ValueError("render failed")
+
+        with self.assertRaises(ValueError):
+            self.writer.write_page(dest, chunks())
+        self.assertEqual(self.read(dest), "old")
+        self.assertEqual(os.listdir(self.dest), ["page.html"])
+        self.writer.write_page(dest, ["<p>", "new", "</p>"])
+        self.assertEqual(self.read(dest), "<p>new</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
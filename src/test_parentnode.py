@@ -112,6 +112,17 @@ class TestParentNode(unittest.TestCase):
             "<div><section><article><p><b>Deep</b></p></article></section></div>",
         )
 
+    def test_iter_html_fragments(self):
+        node = ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")])
+        self.assertListEqual(
+            list(node.iter_html()), ["<p>", "<b>Bold</b>", " text", "</p>"]
+        )
+
+    def test_iter_html_no_tag_raises_error(self):
+        node = ParentNode(None, [LeafNode("b", "text")])  # type: ignore
+        with self.assertRaises(ValueError):
+            list(node.iter_html())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from profiler import BuildProfile, StageTimings, timed_chunks
+from transform import markdown_to_html_node
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stage_timings_add_and_merge(self):
+        first = StageTimings()
+        first.add("read", 0.5)
+        second = StageTimings()
+        second.add("read", 0.25)
+        second.add("inline", 1.0, 4)
+        first.merge(second)
+        self.assertEqual(first.seconds, {"read": 0.75, "inline": 1.0})
+        self.assertEqual(first.counts, {"read": 2, "inline": 4})
+        self.assertEqual(first.total(), 1.75)
+
+    def test_build_profile_slowest_pages(self):
+        profile = BuildProfile()
+        for page, seconds in (("a.html", 0.1), ("b.html", 0.3), ("c.html", 0.2)):
+            timings = StageTimings()
+            timings.add("write", seconds)
+            profile.add_page(page, timings)
+        slowest = [page for page, _ in profile.slowest_pages(2)]
+        self.assertListEqual(slowest, ["b.html", "c.html"])
+        self.assertEqual(profile.to_dict()["page_count"], 3)
+        self.assertIn("b.html (mostly write)", profile.report())
+
+    def test_markdown_to_html_node_timings_same_output(self):
+        md = "# Title\n\nSome **bold** text\n\n- a\n- b"
+        timings = StageTimings()
+        profiled = markdown_to_html_node(md, timings).to_html()
+        self.assertEqual(profiled, markdown_to_html_node(md).to_html())
+        self.assertEqual(timings.counts, {"split": 1, "classify": 3, "inline": 3})
+
+    def test_timed_chunks_passes_chunks_through(self):
+        timings = StageTimings()
+        chunks = list(timed_chunks(iter(["<p>", "text", "</p>"]), timings, "render"))
+        self.assertListEqual(chunks, ["<p>", "text", "</p>"])
+        self.assertEqual(timings.counts, {"render": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+
+from parentnode import ParentNode
+from rawnode import RawNode
+
+
+class TestRawNode(unittest.TestCase):
+    def test_to_html_passthrough(self):
+        node = RawNode("<p>already <b>rendered</b></p>")
+        self.assertEqual(node.to_html(), "<p>already <b>rendered</b></p>")
+
+    def test_inside_parent(self):
+        node = ParentNode("div", [RawNode("<p>a</p>"), RawNode("<p>b</p>")])
+        self.assertEqual(node.to_html(), "<div><p>a</p><p>b</p></div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from main import collect_pages, generate_pages_recursive
+from manifest import load_manifest, save_manifest
+from shard import (
+    SHARD_MANIFEST,
+    SHARD_SITE,
+    ShardMergeError,
+    merge_shards,
+    parse_shard,
+    shard_directory,
+    shard_pages,
+)
+from template import load_template
+
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.shards = os.path.join(self.tmp.name, "shards")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for name in ("a", "b", "c", "d", "e", "f"):
+            self.write(os.path.join(self.content, name, "index.md"), f"# {name}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def pages(self):
+        return collect_pages(self.content, self.dest)
+
+    def build_shard(self, index, count):
+        directory = shard_directory(index, count, self.shards)
+        manifest_path = os.path.join(directory, SHARD_MANIFEST)
+        manifest = load_manifest(manifest_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                os.path.join(directory, SHARD_SITE),
+                "/",
+                manifest,
+                shard=(index, count),
+            )
+        save_manifest(manifest_path, manifest)
+
+    def merge(self, count, manifest=None):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            merge_shards(
+                count,
+                self.pages(),
+                self.dest,
+                {} if manifest is None else manifest,
+                load_template(self.template).digest,
+                self.shards,
+            )
+        return out.getvalue()
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        with self.assertRaises(ValueError):
+            parse_shard("two/3")
+
+    def test_partition_is_complete_and_disjoint(self):
+        pages = self.pages()
+        for count in (1, 2, 3, 7):
+            shards = [
+                shard_pages(pages, self.content, index, count)
+                for index in range(1, count + 1)
+            ]
+            self.assertEqual(sorted(sum(shards, [])), sorted(pages))
+            self.assertEqual(
+                shards[0], shard_pages(pages, self.content, 1, count)
+            )
+
+    def test_partition_is_stable_as_pages_are_added(self):
+        before = shard_pages(self.pages(), self.content, 1, 3)
+        self.write(os.path.join(self.content, "g", "index.md"), "# g")
+        after = shard_pages(self.pages(), self.content, 1, 3)
+        self.assertTrue(set(before) <= set(after))
+
+    def test_merge_matches_single_build(self):
+        for index in (1, 2, 3):
+            self.build_shard(index, 3)
+        manifest = {}
+        self.merge(3, manifest)
+        single = os.path.join(self.tmp.name, "single")
+        expected = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, single, "/", expected
+            )
+        for src, dest in self.pages():
+            built = os.path.join(single, os.path.relpath(dest, self.dest))
+            self.assertEqual(self.read(dest), self.read(built))
+            self.assertEqual(manifest[dest]["hash"], expected[built]["hash"])
+            self.assertEqual(manifest[dest]["source"], src)
+
+    def test_merge_skips_current_pages(self):
+        for index in (1, 2):
+            self.build_shard(index, 2)
+        manifest = {}
+        self.assertEqual(self.merge(2, manifest).count("Merging page"), 7)
+        self.assertEqual(self.merge(2, manifest).count("Merging page"), 0)
+
+    def test_merge_reports_missing_shard(self):
+        self.build_shard(1, 2)
+        with self.assertRaises(ShardMergeError) as context:
+            self.merge(2)
+        message = str(context.exception)
+        self.assertIn("shard 2/2 has no manifest", message)
+        self.assertIn("was not built by any shard", message)
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_merge_reports_overlap(self):
+        for index in (1, 2):
+            self.build_shard(index, 2)
+        first = shard_directory(1, 2, self.shards)
+        second = shard_directory(2, 2, self.shards)
+        shutil.rmtree(os.path.join(second, SHARD_SITE))
+        shutil.copytree(
+            os.path.join(first, SHARD_SITE), os.path.join(second, SHARD_SITE)
+        )
+        manifest = load_manifest(os.path.join(first, SHARD_MANIFEST))
+        prefix = os.path.join(first, SHARD_SITE)
+        save_manifest(
+            os.path.join(second, SHARD_MANIFEST),
+            {
+                os.path.join(second, SHARD_SITE, os.path.relpath(path, prefix)): entry
+                for path, entry in manifest.items()
+            },
+        )
+        with self.assertRaises(ShardMergeError) as context:
+            self.merge(2)
+        self.assertIn("was built by more than one shard (1, 2)", str(context.exception))
+
+    def test_merge_reports_stale_shard(self):
+        for index in (1, 2):
+            self.build_shard(index, 2)
+        self.write(os.path.join(self.content, "a", "index.md"), "# a, edited")
+        with self.assertRaises(ShardMergeError) as context:
+            self.merge(2)
+        self.assertIn("a/index.html from shard", str(context.exception))
+        self.assertIn("is out of date", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
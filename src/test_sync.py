@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sync
+from sync import needs_copy, sync_tree
+
+
+class TestSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.source, "images"))
+        self.write(os.path.join(self.source, "index.css"), "body {}")
+        self.write(os.path.join(self.source, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def test_sync_tree_copies_new_files(self):
+        copied, removed = sync_tree(self.source, self.dest)
+        self.assertEqual(len(copied), 2)
+        self.assertEqual(removed, [])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "images", "a.png")))
+
+    def test_sync_tree_skips_unchanged_files(self):
+        sync_tree(self.source, self.dest)
+        css = os.path.join(self.dest, "index.css")
+        before = os.stat(css).st_mtime_ns
+        copied, _ = sync_tree(self.source, self.dest)
+        self.assertEqual(copied, [])
+        self.assertEqual(os.stat(css).st_mtime_ns, before)
+
+    def test_sync_tree_copies_changed_files(self):
+        sync_tree(self.source, self.dest)
+        self.write(os.path.join(self.source, "index.css"), "body { margin: 0 }")
+        copied, _ = sync_tree(self.source, self.dest)
+        self.assertEqual(copied, [os.path.join(self.dest, "index.css")])
+
+    def test_sync_tree_removes_orphans(self):
+        sync_tree(self.source, self.dest)
+        os.remove(os.path.join(self.source, "images", "a.png"))
+        _, removed = sync_tree(self.source, self.dest)
+        self.assertEqual(removed, [os.path.join(self.dest, "images", "a.png")])
+
+    def test_sync_tree_keeps_generated_files(self):
+        page = os.path.join(self.dest, "blog", "index.html")
+        self.write(page, "<p></p>")
+        stray = os.path.join(self.dest, "blog", "old.html")
+        self.write(stray, "<p></p>")
+        sync_tree(self.source, self.dest, {page})
+        self.assertTrue(os.path.exists(page))
+        self.assertFalse(os.path.exists(stray))
+
+    def test_sync_tree_removes_empty_orphan_directories(self):
+        self.write(os.path.join(self.dest, "old", "file.txt"), "x")
+        sync_tree(self.source, self.dest)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "old")))
+
+    def test_needs_copy_same_content_different_mtime(self):
+        # A touched file with identical bytes is not copied again
+        sync_tree(self.source, self.dest)
+        css = os.path.join(self.source, "index.css")
+        os.utime(css, ns=(0, 0))
+        self.assertFalse(needs_copy(css, os.path.join(self.dest, "index.css")))
+
+    def test_touched_file_is_hashed_once(self):
+        sync_tree(self.source, self.dest)
+        os.utime(os.path.join(self.source, "index.css"), ns=(0, 0))
+        with mock.patch.object(sync, "file_hash", wraps=sync.file_hash) as file_hash:
+            sync_tree(self.source, self.dest)
+            self.assertEqual(file_hash.call_count, 2)
+            copied, _ = sync_tree(self.source, self.dest)
+            self.assertEqual(file_hash.call_count, 2)
+        self.assertEqual(copied, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from template import Template, rewrite_node_urls
+
+SOURCE = '<link href="/index.css" /><title>{{ Title }}</title><main>{{ Content }}</main>'
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template(SOURCE)
+        self.assertEqual(
+            template.render(Title="Home", Content="<p>Hi</p>"),
+            '<link href="/index.css" /><title>Home</title><main><p>Hi</p></main>',
+        )
+
+    def test_render_rewrites_template_urls(self):
+        template = Template(SOURCE, "/site/")
+        self.assertEqual(
+            template.render(Title="Home", Content=""),
+            '<link href="/site/index.css" /><title>Home</title><main></main>',
+        )
+
+    def test_render_leaves_data_attributes_alone(self):
+        source = '<img data-src="/a.png" src="/a.png"><a data-href="/x" href="/x">'
+        expected = (
+            '<img data-src="/a.png" src="/site/a.1234abcd.png">'
+            '<a data-href="/x" href="/site/x">'
+        )
+        assets = {"a.png": "a.1234abcd.png"}
+        self.assertEqual(Template(source, "/site/", assets=assets).render(), expected)
+        expected = expected.replace("a.1234abcd.png", "a.png")
+        self.assertEqual(Template(source, "/site/").render(), expected)
+
+    def test_render_leaves_slot_values_untouched(self):
+        # Slot values are never rescanned for placeholders or URLs
+        template = Template(SOURCE, "/site/")
+        out = template.render(Title="{{ Content }}", Content='<code>href="/</code>')
+        self.assertIn("<title>{{ Content }}</title>", out)
+        self.assertIn('<code>href="/</code>', out)
+
+    def test_render_unknown_placeholder_kept(self):
+        template = Template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render(Title="T"), "T {{ Author }}")
+
+    def test_render_repeated_slot(self):
+        template = Template("{{ Title }}|{{ Title }}")
+        self.assertEqual(template.render(Title="T"), "T|T")
+
+    def test_stream_accepts_fragment_iterables(self):
+        template = Template(SOURCE)
+        node = ParentNode("p", [LeafNode(None, "Hi")])
+        streamed = "".join(template.stream(Title="Home", Content=node.iter_html()))
+        self.assertEqual(streamed, template.render(Title="Home", Content="<p>Hi</p>"))
+
+    def test_digest_depends_on_basepath(self):
+        self.assertNotEqual(Template(SOURCE).digest, Template(SOURCE, "/site/").digest)
+
+    def test_digest_depends_on_parser(self):
+        commonmark = Template(SOURCE, parser="commonmark")
+        self.assertNotEqual(Template(SOURCE).digest, commonmark.digest)
+        simple = Template(SOURCE, parser="simple")
+        self.assertEqual(Template(SOURCE).digest, simple.digest)
+
+    def test_rewrite_node_urls(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "home", {"href": "/index.html"}),
+                LeafNode("img", "", {"src": "/images/a.png", "alt": "/a"}),
+                LeafNode("a", "out", {"href": "https://example.com"}),
+            ],
+        )
+        rewrite_node_urls(node, "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<p><a href="/site/index.html" >home</a>'
+            '<img src="/site/images/a.png" alt="/a" ></img>'
+            '<a href="https://example.com" >out</a></p>',
+        )
+
+    def test_render_rewrites_fingerprinted_assets(self):
+        assets = {"index.css": "index.1234abcd.css"}
+        template = Template(SOURCE, "/site/", assets=assets)
+        self.assertEqual(
+            template.render(Title="", Content=""),
+            '<link href="/site/index.1234abcd.css" /><title></title><main></main>',
+        )
+        self.assertNotEqual(template.digest, Template(SOURCE, "/site/").digest)
+
+    def test_rewrite_node_urls_with_assets(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("img", "", {"src": "/images/a.png?v=1#x"}),
+                LeafNode("a", "page", {"href": "/blog/"}),
+            ],
+        )
+        rewrite_node_urls(node, "/", {"images/a.png": "images/a.0f0f0f0f.png"})
+        self.assertEqual(
+            node.to_html(),
+            '<p><img src="/images/a.0f0f0f0f.png?v=1#x" ></img>'
+            '<a href="/blog/" >page</a></p>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,21 @@
+import random
+import time
 import unittest
 
+from extract import markdown_to_blocks
 from textnode import TextNode, TextType
 from transform import (
+    INLINE_CACHE_SIZE,
+    configure_inline_cache,
+    inline_cache_info,
+    iter_block_nodes,
     markdown_to_html_node,
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
+    stream_blocks_to_html,
     text_node_to_html_node,
+    text_to_leaf_nodes,
     text_to_textnodes,
 )
 
@@ -68,7 +77,9 @@ class TestTransform(unittest.TestCase):
         # Edge case: text with special characters
         node = TextNode('Text with <special> & "characters"', TextType.PLAIN)
         html_node = text_node_to_html_node(node)
-        self.assertEqual(html_node.to_html(), 'Text with <special> & "characters"')
+        self.assertEqual(
+            html_node.to_html(), 'Text with &lt;special&gt; &amp; "characters"'
+        )
 
     def test_split_nodes_delimiter(self):
         node = TextNode(
@@ -385,6 +396,57 @@ class TestTransform(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_unbalanced_raises(self):
+        for text in ("**bold", "_a **b** c_", "`a_b`_", "a `b ** c` **"):
+            with self.assertRaises(ValueError) as context:
+                text_to_textnodes(text)
+            self.assertEqual(
+                str(context.exception),
+                "Input text node should include pairs of delimiter",
+            )
+
+    def test_text_to_textnodes_empty_delimited_segment(self):
+        # An empty bold run still splits the surrounding plain text
+        nodes = text_to_textnodes("a****b")
+        self.assertListEqual(
+            [TextNode("a", TextType.PLAIN), TextNode("b", TextType.PLAIN)], nodes
+        )
+
+    def test_text_to_textnodes_image_inside_link(self):
+        # Images are matched before links, so a badge-style link is not a link
+        nodes = text_to_textnodes("[![badge](b.png)](https://example.com)")
+        self.assertListEqual(
+            [
+                TextNode("[", TextType.PLAIN),
+                TextNode("badge", TextType.IMAGE, "b.png"),
+                TextNode("](https://example.com)", TextType.PLAIN),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_matches_split_pipeline(self):
+        # The single-pass scanner must agree with chaining the split_nodes_* passes
+        def chained(text):
+            nodes = [TextNode(text, TextType.PLAIN)]
+            nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+            nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+            nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+            return split_nodes_link(split_nodes_image(nodes))
+
+        def outcome(parse, text):
+            try:
+                return parse(text)
+            except ValueError as e:
+                return str(e)
+
+        pieces = ["**", "*", "_", "`", "[", "]", "(", ")", "!", "a", " ", "[l](u)"]
+        rng = random.Random(0)
+        for _ in range(2000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(
+                outcome(chained, text), outcome(text_to_textnodes, text), text
+            )
+
     def test_paragraphs(self):
         md = """
 This is **bolded** paragraph
@@ -485,6 +547,12 @@ This is a paragraph with **bold** text.
             "<div><h1>Title</h1><p>This is a paragraph with <b>bold</b> text.</p><blockquote>A wise quote</blockquote><ul><li>List item 1</li><li>List item 2</li></ul></div>",
         )
 
+    def test_stream_blocks_to_html_matches_tree(self):
+        md = "# Title\n\nSome **bold** text\n\n- a\n- b\n\n```\ncode\n```"
+        nodes = iter_block_nodes(markdown_to_blocks(md))
+        streamed = "".join(stream_blocks_to_html(nodes))
+        self.assertEqual(streamed, markdown_to_html_node(md).to_html())
+
     def test_markdown_to_html_node_empty_string(self):
         # Test with empty markdown
         md = ""
@@ -500,5 +568,89 @@ This is a paragraph with **bold** text.
         self.assertEqual(html, "<div></div>")
 
 
+class TestInlineCache(unittest.TestCase):
+    def setUp(self):
+        configure_inline_cache(INLINE_CACHE_SIZE)
+
+    def tearDown(self):
+        configure_inline_cache(INLINE_CACHE_SIZE)
+
+    def test_repeated_text_hits_cache(self):
+        text = "Shared **footer** with a [link](/about)"
+        first = [node.to_html() for node in text_to_leaf_nodes(text)]
+        second = [node.to_html() for node in text_to_leaf_nodes(text)]
+        self.assertListEqual(first, second)
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_cached_leaf_nodes_are_fresh(self):
+        # Mutating one page's nodes must not leak into the next page
+        text = "[home](/index.html)"
+        first = text_to_leaf_nodes(text)
+        first[0].props["href"] = "/site/index.html"
+        second = text_to_leaf_nodes(text)
+        self.assertEqual(second[0].props, {"href": "/index.html"})
+
+    def test_cache_is_bounded(self):
+        configure_inline_cache(2)
+        for text in ("a", "b", "c", "a"):
+            text_to_leaf_nodes(text)
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 4, 2))
+
+    def test_cache_disabled(self):
+        configure_inline_cache(0)
+        md = "- same\n- same\n- same"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><ul>" + "<li>same</li>" * 3 + "</ul></div>")
+        self.assertEqual(inline_cache_info().hits, 0)
+
+
+# a quadratic parser needs minutes for these; a linear one a few milliseconds
+ADVERSARIAL_SIZE = 100_000
+ADVERSARIAL_BUDGET = 2.0
+
+
+class TestAdversarialInput(unittest.TestCase):
+    def assert_linear(self, markdown: str):
+        start = time.perf_counter()
+        try:
+            markdown_to_html_node(markdown)
+        except ValueError:
+            pass
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, ADVERSARIAL_BUDGET, f"{markdown[:20]!r}...")
+
+    def test_unclosed_brackets(self):
+        n = ADVERSARIAL_SIZE
+        self.assert_linear("[" * n)
+        self.assert_linear("![" * n)
+        self.assert_linear("[" * n + "]" * n + "(x)")
+
+    def test_near_miss_references(self):
+        n = ADVERSARIAL_SIZE
+        self.assert_linear("[a]" * n)
+        self.assert_linear("[a](" * n)
+        self.assert_linear("![a](" * n)
+        self.assert_linear("]([" * n)
+
+    def test_near_miss_blocks(self):
+        n = ADVERSARIAL_SIZE
+        self.assert_linear("```\n" + "x\n" * n)
+        self.assert_linear("- a\n" * n + "-b")
+        self.assert_linear("".join(f"{i}. a\n" for i in range(1, n)) + "1. a")
+        self.assert_linear("> a\n" * n + "b")
+        self.assert_linear("#" * n)
+        self.assert_linear("a" + "\n" * n + "b")
+
+    def test_unbalanced_delimiters(self):
+        self.assert_linear("`" * (2 * ADVERSARIAL_SIZE))
+        self.assert_linear("**_" * ADVERSARIAL_SIZE)
+
+    def test_long_line_of_references(self):
+        # every match here is a node, so keep the total size comparable
+        self.assert_linear("[a](b) ![c](d) " * (ADVERSARIAL_SIZE // 10))
+
+
 if __name__ == "__main__":
     unittest.main()
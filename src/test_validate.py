@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from validate import (
+    BrokenReference,
+    find_line,
+    is_published,
+    resolve_reference,
+    validate_references,
+)
+
+
+class TestValidate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "cat.png"), "w") as file:
+            file.write("")
+        self.source = os.path.join(self.tmp.name, "post.md")
+        with open(self.source, "w") as file:
+            file.write("# Post\n\n[ok](/)\n\n[gone](/nowhere) ![cat](/images/dog.png)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def entry(self, links, images=()):
+        return {
+            "source": self.source,
+            "hash": "",
+            "meta": {"title": "Post", "links": list(links), "images": list(images)},
+        }
+
+    def test_resolve_root_relative(self):
+        self.assertEqual(resolve_reference("/", "/blog/"), "index.html")
+        self.assertEqual(resolve_reference("/blog/tom", "/"), "blog/tom")
+        self.assertEqual(resolve_reference("/blog/?page=2#top", "/"), "blog/index.html")
+
+    def test_resolve_page_relative(self):
+        self.assertEqual(resolve_reference("../tom", "/blog/post/"), "blog/tom")
+        self.assertEqual(
+            resolve_reference("cat.png", "/blog/post.html"), "blog/cat.png"
+        )
+        self.assertIsNone(resolve_reference("../../up", "/blog/"))
+
+    def test_is_published(self):
+        outputs = {"index.html", "blog/tom/index.html", "about.html", "a.png"}
+        self.assertTrue(is_published("blog/tom", outputs))
+        self.assertTrue(is_published("about", outputs))
+        self.assertTrue(is_published("a.png", outputs))
+        self.assertFalse(is_published("blog", outputs))
+
+    def test_find_line(self):
+        self.assertEqual(find_line(self.source, "/nowhere"), 5)
+        self.assertIsNone(find_line(self.source, "/missing"))
+        self.assertIsNone(find_line(os.path.join(self.tmp.name, "none.md"), "/"))
+
+    def test_validate_references(self):
+        manifest = {
+            os.path.join(self.dest, "index.html"): self.entry(
+                ["/", "/blog/tom", "https://example.com", "#top", "mailto:a@b.c"],
+                ["/images/cat.png"],
+            ),
+            os.path.join(self.dest, "blog", "tom", "index.html"): self.entry(
+                ["/nowhere", "../../"], ["/images/dog.png"]
+            ),
+        }
+        broken = validate_references(manifest, self.dest, self.static)
+        self.assertEqual(
+            broken,
+            [
+                BrokenReference(self.source, 5, "link", "/nowhere"),
+                BrokenReference(self.source, 5, "image", "/images/dog.png"),
+            ],
+        )
+        self.assertEqual(str(broken[0]), f"{self.source}:5: broken link /nowhere")
+
+    def test_basepath_in_source_link_is_broken(self):
+        # rewrite_node_urls would turn this into /site/site/blog/tom
+        manifest = {
+            os.path.join(self.dest, "index.html"): self.entry(["/site/blog/tom"]),
+            os.path.join(self.dest, "blog", "tom", "index.html"): self.entry([]),
+        }
+        broken = validate_references(manifest, self.dest, self.static)
+        self.assertEqual([reference.url for reference in broken], ["/site/blog/tom"])
+
+
+if __name__ == "__main__":
+    unittest.main()
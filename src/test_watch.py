@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from watch import Watcher, diff_snapshots, scan_files
+
+
+class TestWatch(unittest.TestCase):
+    def test_diff_snapshots(self):
+        old = {"a": 1, "b": 1, "c": 1}
+        new = {"a": 1, "b": 2, "d": 1}
+        self.assertEqual(diff_snapshots(old, new), (["d"], ["b"], ["c"]))
+
+    def test_scan_files_directories_and_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            nested = os.path.join(tmp, "content", "blog")
+            os.makedirs(nested)
+            page = os.path.join(nested, "index.md")
+            template = os.path.join(tmp, "template.html")
+            for path in (page, template):
+                with open(path, "w") as file:
+                    file.write("x")
+            snapshot = scan_files([os.path.join(tmp, "content"), template])
+            self.assertCountEqual(snapshot, [page, template])
+
+    def test_watcher_poll(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.md")
+            with open(path, "w") as file:
+                file.write("# One")
+            watcher = Watcher([tmp])
+            self.assertEqual(watcher.poll(), ([], [], []))
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(watcher.poll(), ([], [path], []))
+            os.remove(path)
+            self.assertEqual(watcher.poll(), ([], [], [path]))
+
+
+if __name__ == "__main__":
+    unittest.main()
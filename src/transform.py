@@ -1,62 +1,133 @@
 import re
+import time
+from functools import lru_cache
+from typing import Iterable, Iterator
 
-import constants
-from block import BlockType, block_to_block_type
-from extract import extract_markdown_images, extract_markdown_links, markdown_to_blocks
-from htmlnode import HTMLNode, get_tag_from_block_type
+from block import BlockType, ClassifiedBlock, classify_block
+from extract import markdown_to_blocks, scan_markdown_references
+from htmlnode import HTMLNode, get_tag_for_block
 from leafnode import LeafNode
+from metadata import PageMetadata, heading_text
 from parentnode import ParentNode
+from profiler import StageTimings, timed_chunks
 from textnode import TextNode, TextType
 
 
-def text_to_leaf_nodes(text: str) -> list[HTMLNode]:
-    nodes = text_to_textnodes(text)
-    return list(map(text_node_to_html_node, nodes))
-
-
-def get_children_for_block_type(type: BlockType, block: str) -> list[HTMLNode]:
-    if type == BlockType.HEADING:
-        text = re.sub(r"^#{1,6}\s+", "", block)
-        return text_to_leaf_nodes(text)
-    if type == BlockType.QUOTE:
-        text = re.sub(r"^>\s?", "", block)
-        return text_to_leaf_nodes(text)
-    if type == BlockType.UNORDERED_LIST:
-        lines = block.split("\n")
-        return list(
-            map(
-                lambda x: ParentNode("li", text_to_leaf_nodes(re.sub(r"^-\s+", "", x))),
-                lines,
-            )
-        )
-    if type == BlockType.ORDERED_LIST:
-        lines = block.split("\n")
-        return list(
-            map(
-                lambda x: ParentNode(
-                    "li", text_to_leaf_nodes(re.sub(r"^\d+\.\s+", "", x))
-                ),
-                lines,
-            )
-        )
-    if type == BlockType.CODE:
+INLINE_CACHE_SIZE = 4096
+
+
+def tokenize_inline(text: str) -> tuple[TextNode, ...]:
+    return tuple(text_to_textnodes(text))
+
+
+# Cached token tuples are shared between pages and must never be mutated;
+# text_to_leaf_nodes builds fresh LeafNodes from them on every call.
+inline_cache = lru_cache(maxsize=INLINE_CACHE_SIZE)(tokenize_inline)
+
+
+def configure_inline_cache(maxsize: int | None):
+    global inline_cache
+    inline_cache = lru_cache(maxsize=maxsize)(tokenize_inline)
+
+
+def inline_cache_maxsize() -> int | None:
+    return inline_cache.cache_parameters()["maxsize"]
+
+
+def inline_cache_info():
+    return inline_cache.cache_info()
+
+
+def text_to_leaf_nodes(
+    text: str, metadata: PageMetadata | None = None
+) -> list[HTMLNode]:
+    tokens = inline_cache(text)
+    if metadata is not None:
+        metadata.add_tokens(tokens)
+    return [text_node_to_html_node(node) for node in tokens]
+
+
+def get_children_for_block(
+    block: ClassifiedBlock, metadata: PageMetadata | None = None
+) -> list[HTMLNode]:
+    if block.block_type == BlockType.CODE:
+        if metadata is not None:
+            metadata.add_text(block.text)
+        return [LeafNode("code", block.text)]
+    if block.items is not None:
         return [
-            text_node_to_html_node(
-                TextNode("".join(block.splitlines(True)[1:-1]), TextType.CODE)
-            )
+            ParentNode("li", text_to_leaf_nodes(item, metadata)) for item in block.items
         ]
-    return text_to_leaf_nodes(block.strip().replace("\n", " "))
+    if block.block_type == BlockType.PARAGRAPH:
+        return text_to_leaf_nodes(block.text.strip().replace("\n", " "), metadata)
+    if block.block_type == BlockType.HEADING and metadata is not None:
+        # headings feed the title and outline from the same tokens as the page
+        tokens = inline_cache(block.text)
+        metadata.add_title(block.level, block.text)
+        metadata.add_heading(block.level, heading_text(tokens))
+        metadata.add_tokens(tokens)
+        return [text_node_to_html_node(node) for node in tokens]
+    return text_to_leaf_nodes(block.text, metadata)
 
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
+def markdown_to_html_node(
+    markdown: str,
+    timings: StageTimings | None = None,
+    metadata: PageMetadata | None = None,
+) -> HTMLNode:
+    start = time.perf_counter()
     blocks = markdown_to_blocks(markdown)
-    html_children = []
+    if timings is not None:
+        timings.add("split", time.perf_counter() - start)
+    return ParentNode(
+        "div", [block_to_html_node(block, metadata, timings) for block in blocks]
+    )
+
+
+def iter_block_nodes(
+    blocks: Iterable[str],
+    metadata: PageMetadata | None = None,
+    timings: StageTimings | None = None,
+) -> Iterator[HTMLNode]:
+    # markdown_to_html_node's children, built as the blocks arrive
+    if timings is not None:
+        blocks = timed_chunks(blocks, timings, "split")
     for block in blocks:
-        block_type = block_to_block_type(block)
-        tag = get_tag_from_block_type(block_type, block)
-        children = get_children_for_block_type(block_type, block)
-        html_children.append(ParentNode(tag, children))
-    return ParentNode("div", html_children)
+        yield block_to_html_node(block, metadata, timings)
+
+
+def stream_blocks_to_html(
+    nodes: Iterable[HTMLNode], timings: StageTimings | None = None
+) -> Iterator[str]:
+    # same output as markdown_to_html_node(...).iter_html(), one block at a time
+    yield "<div>"
+    for node in nodes:
+        html = node.iter_html()
+        if timings is not None:
+            html = timed_chunks(html, timings, "render", 0)
+        yield from html
+    yield "</div>"
+    if timings is not None:
+        # one render per page, as when the whole tree is rendered at once
+        timings.add("render", 0.0)
+
+
+def block_to_html_node(
+    block: str,
+    metadata: PageMetadata | None = None,
+    timings: StageTimings | None = None,
+) -> HTMLNode:
+    if timings is not None:
+        start = time.perf_counter()
+    classified = classify_block(block)
+    tag = get_tag_for_block(classified)
+    if timings is not None:
+        middle = time.perf_counter()
+        timings.add("classify", middle - start)
+    children = get_children_for_block(classified, metadata)
+    if timings is not None:
+        timings.add("inline", time.perf_counter() - middle)
+    return ParentNode(tag, children)
 
 
 def text_node_to_html_node(text_node: TextNode) -> LeafNode:
@@ -106,16 +177,15 @@ def split_nodes_image(nodes_to_transform: list[TextNode]) -> list[TextNode]:
         if node.text_type != TextType.PLAIN:
             output.append(node)
             continue
-        segments = re.split(constants.MARKDOWN_IMAGE_REGEX, node.text)
-        for segment in segments:
-            if len(segment) == 0:
-                continue
-            if re.fullmatch(constants.MARKDOWN_IMAGE_REGEX, segment) is None:
-                output.append(TextNode(segment, TextType.PLAIN))
-                continue
-            images = extract_markdown_images(segment)
-            for alt, image in images:
-                output.append(TextNode(alt, TextType.IMAGE, image))
+        text = node.text
+        position = 0
+        for start, end, label, url in scan_markdown_references(text, "!["):
+            if start > position:
+                output.append(TextNode(text[position:start], TextType.PLAIN))
+            output.append(TextNode(label, TextType.IMAGE, url))
+            position = end
+        if position < len(text):
+            output.append(TextNode(text[position:], TextType.PLAIN))
     return output
 
 
@@ -125,23 +195,85 @@ def split_nodes_link(nodes_to_transform: list[TextNode]) -> list[TextNode]:
         if node.text_type != TextType.PLAIN:
             output.append(node)
             continue
-        segments = re.split(constants.MARKDOWN_LINK_REGEX, node.text)
-        for segment in segments:
-            if len(segment) == 0:
-                continue
-            if re.fullmatch(constants.MARKDOWN_LINK_REGEX, segment) is None:
-                output.append(TextNode(segment, TextType.PLAIN))
-                continue
-            links = extract_markdown_links(segment)
-            for text, url in links:
-                output.append(TextNode(text, TextType.LINK, url))
+        text = node.text
+        position = 0
+        for start, end, label, url in scan_markdown_references(text):
+            if start > position:
+                output.append(TextNode(text[position:start], TextType.PLAIN))
+            output.append(TextNode(label, TextType.LINK, url))
+            position = end
+        if position < len(text):
+            output.append(TextNode(text[position:], TextType.PLAIN))
     return output
 
 
-def text_to_textnodes(text: str):
-    root_node = TextNode(text, TextType.PLAIN)
-    with_bold = split_nodes_delimiter([root_node], "**", TextType.BOLD)
-    with_italics = split_nodes_delimiter(with_bold, "_", TextType.ITALIC)
-    with_code = split_nodes_delimiter(with_italics, "`", TextType.CODE)
-    with_images = split_nodes_image(with_code)
-    return split_nodes_link(with_images)
+INLINE_DELIMITER_REGEX = re.compile(r"\*\*|[_`]")
+INLINE_DELIMITER_TYPES = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+
+def append_links(text: str, output: list[TextNode]):
+    if len(text) == 0:
+        return
+    if "[" not in text:
+        output.append(TextNode(text, TextType.PLAIN))
+        return
+    position = 0
+    for start, end, label, url in scan_markdown_references(text):
+        if start > position:
+            output.append(TextNode(text[position:start], TextType.PLAIN))
+        output.append(TextNode(label, TextType.LINK, url))
+        position = end
+    if position < len(text):
+        output.append(TextNode(text[position:], TextType.PLAIN))
+
+
+def append_plain_text(text: str, output: list[TextNode]):
+    if "[" not in text:
+        output.append(TextNode(text, TextType.PLAIN))
+        return
+    # images take precedence over links, which may only match between them
+    position = 0
+    for start, end, alt, url in scan_markdown_references(text, "!["):
+        append_links(text[position:start], output)
+        output.append(TextNode(alt, TextType.IMAGE, url))
+        position = end
+    append_links(text[position:], output)
+
+
+def text_to_textnodes(text: str) -> list[TextNode]:
+    # Single left-to-right walk with the same precedence as running
+    # split_nodes_delimiter for **, _ and ` followed by the image and link
+    # splitters: a stronger delimiter always toggles, weaker ones are ignored
+    # inside it, and closing a region over an open weaker one is unbalanced.
+    output: list[TextNode] = []
+    open_delimiter = None
+    start = 0
+    for match in INLINE_DELIMITER_REGEX.finditer(text):
+        delimiter = match.group()
+        if open_delimiter is None:
+            if match.start() > start:
+                append_plain_text(text[start : match.start()], output)
+            open_delimiter = delimiter
+        elif delimiter == open_delimiter:
+            if match.start() > start:
+                output.append(
+                    TextNode(
+                        text[start : match.start()],
+                        INLINE_DELIMITER_TYPES[delimiter],
+                    )
+                )
+            open_delimiter = None
+        elif open_delimiter == "**" or (open_delimiter == "_" and delimiter == "`"):
+            continue
+        else:
+            raise ValueError("Input text node should include pairs of delimiter")
+        start = match.end()
+    if open_delimiter is not None:
+        raise ValueError("Input text node should include pairs of delimiter")
+    if start < len(text):
+        append_plain_text(text[start:], output)
+    return output
@@ -0,0 +1,114 @@
+import os
+import posixpath
+import re
+
+from listings import INDEX_PAGE, dest_to_url
+from metadata import SiteIndex
+
+EXTERNAL_URL_REGEX = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//)")
+
+
+class BrokenReference:
+    __slots__ = ("source", "line", "kind", "url")
+
+    def __init__(self, source: str, line: int | None, kind: str, url: str):
+        self.source = source
+        self.line = line
+        self.kind = kind
+        self.url = url
+
+    def __eq__(self, other):
+        if not isinstance(other, BrokenReference):
+            return False
+        return (
+            self.source == other.source
+            and self.line == other.line
+            and self.kind == other.kind
+            and self.url == other.url
+        )
+
+    def __repr__(self):
+        return f"BrokenReference({self.source}, {self.line}, {self.kind}, {self.url})"
+
+    def __str__(self):
+        location = self.source if self.line is None else f"{self.source}:{self.line}"
+        return f"{location}: broken {self.kind} {self.url}"
+
+
+def relative_output(path: str, root: str) -> str:
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def collect_outputs(
+    manifest: dict[str, dict], dest_root: str, static_root: str
+) -> set[str]:
+    # one walk of the assets up front; every reference is then a set lookup
+    outputs = {relative_output(path, dest_root) for path in manifest}
+    for directory, _, files in os.walk(static_root):
+        for name in files:
+            outputs.add(relative_output(os.path.join(directory, name), static_root))
+    return outputs
+
+
+def resolve_reference(url: str, page_url: str) -> str | None:
+    # the output path a reference points at, or None if it leaves the site
+    path = url.split("#", 1)[0].split("?", 1)[0]
+    if path.startswith("/"):
+        # rewrite_node_urls serves "/x" from basepath + "x", which is "x" in the
+        # output tree; a link that already spells out the basepath ends up
+        # doubled and so fails the lookup, as it would in the browser
+        path = path[1:]
+    else:
+        path = page_url[1 : page_url.rfind("/") + 1] + path
+    if path.endswith("/") or path == "":
+        path += INDEX_PAGE
+    normalized = posixpath.normpath(path)
+    if normalized.startswith("../") or normalized == "..":
+        return None
+    return normalized
+
+
+def is_published(target: str, outputs: set[str]) -> bool:
+    return (
+        target in outputs
+        or f"{target}/{INDEX_PAGE}" in outputs
+        or f"{target}.html" in outputs
+    )
+
+
+def find_line(source: str, url: str) -> int | None:
+    try:
+        with open(source, "r") as file:
+            text = file.read()
+    except OSError:
+        return None
+    index = text.find(f"]({url}")
+    if index == -1:
+        return None
+    return text.count("\n", 0, index) + 1
+
+
+def validate_references(
+    manifest: dict[str, dict],
+    dest_root: str,
+    static_root: str,
+    index: SiteIndex | None = None,
+) -> list[BrokenReference]:
+    if index is None:
+        index = SiteIndex.from_manifest(manifest)
+    outputs = collect_outputs(manifest, dest_root, static_root)
+    broken = []
+    for dest_path, page in index.items():
+        page_url = dest_to_url(dest_path, dest_root)
+        references = [("link", url) for url in page.links]
+        references.extend(("image", url) for url in page.images)
+        for kind, url in references:
+            if url.startswith("#") or EXTERNAL_URL_REGEX.match(url):
+                continue
+            target = resolve_reference(url, page_url)
+            if target is not None and is_published(target, outputs):
+                continue
+            # sources are only reread to locate the rare broken reference
+            source = manifest[dest_path]["source"]
+            broken.append(BrokenReference(source, find_line(source, url), kind, url))
+    return broken
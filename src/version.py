@@ -0,0 +1,41 @@
+import os
+
+from manifest import hash_inputs
+
+# Output is only valid for the code that produced it, so versions are derived
+# from the source of the modules involved rather than bumped by hand.
+PARSER_MODULES = (
+    "block.py",
+    "constants.py",
+    "extract.py",
+    "htmlnode.py",
+    "images.py",
+    "leafnode.py",
+    "metadata.py",
+    "parentnode.py",
+    "template.py",
+    "textnode.py",
+    "transform.py",
+)
+# everything that shapes a finished page: the block parsers, how main puts a
+# page together and how listings render their sections
+RENDER_MODULES = PARSER_MODULES + (
+    "blockparser.py",
+    "listings.py",
+    "main.py",
+    "rawnode.py",
+)
+
+
+def source_version(names: tuple[str, ...]) -> str:
+    directory = os.path.dirname(os.path.abspath(__file__))
+    sources = []
+    for name in names:
+        with open(os.path.join(directory, name), "r") as file:
+            sources.append(file.read())
+    return hash_inputs(*sources)
+
+
+# cached blocks only depend on the simple parser's modules
+PARSER_VERSION = source_version(PARSER_MODULES)
+RENDER_VERSION = source_version(RENDER_MODULES)
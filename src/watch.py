@@ -0,0 +1,55 @@
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+def scan_files(roots: list[str]) -> dict[str, int]:
+    snapshot = {}
+    for root in roots:
+        if os.path.isfile(root):
+            snapshot[root] = os.stat(root).st_mtime_ns
+            continue
+        for directory, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    snapshot[path] = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    # deleted between listing and stat; the next poll sees it gone
+                    continue
+    return snapshot
+
+
+def diff_snapshots(
+    old: dict[str, int], new: dict[str, int]
+) -> tuple[list[str], list[str], list[str]]:
+    added = sorted(path for path in new if path not in old)
+    modified = sorted(path for path in new if path in old and new[path] != old[path])
+    removed = sorted(path for path in old if path not in new)
+    return added, modified, removed
+
+
+class Watcher:
+    def __init__(self, roots: list[str]):
+        self.roots = roots
+        self.snapshot = scan_files(roots)
+
+    def poll(self) -> tuple[list[str], list[str], list[str]]:
+        current = scan_files(self.roots)
+        changes = diff_snapshots(self.snapshot, current)
+        self.snapshot = current
+        return changes
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory: str, port: int) -> ThreadingHTTPServer:
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server